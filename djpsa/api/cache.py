@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class TTLCache:
+    """
+    A thread safe in-process cache whose entries expire ttl seconds after
+    they are set. Once it holds maxsize entries, the oldest are dropped.
+    """
+
+    def __init__(self, ttl=60, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return default
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if not ttl:
+            return
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + ttl, value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SingleFlight:
+    """
+    Run a call at most once per key at a time. Callers that ask for a key
+    while its call is in flight wait for it and share its result, or its
+    exception.
+
+    If given, copy_result is applied to the result for each waiting caller,
+    so callers that change their result don't affect each other.
+    """
+
+    def __init__(self, copy_result=None):
+        self.copy_result = copy_result
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            result = future.result()
+            if self.copy_result is not None:
+                result = self.copy_result(result)
+            return result
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from djpsa.api.exceptions import CircuitOpenError
+from djpsa.utils import get_djpsa_settings, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+LOCAL = 'local'
+REDIS = 'redis'
+
+# The state of each breaker, for monitoring.
+CIRCUIT_STATE_CACHE_KEY = 'djpsa_circuit_state:{}'
+CIRCUIT_REDIS_KEY = 'djpsa_circuit:{}:{}'
+
+
+class CircuitBreaker:
+    """
+    Fail fast while an API is down.
+
+    After failure_threshold failures in a row, the circuit opens and
+    allow() raises CircuitOpenError for reset_timeout seconds. Then it is
+    half open: one probe request is let through, closing the circuit if it
+    succeeds and opening it again if it fails.
+
+    State changes are logged, and the current state is kept in the Django
+    cache, see get_state.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    def allow(self):
+        """Raise CircuitOpenError unless a request may be made now."""
+        with self._lock:
+            state = self._state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        raise CircuitOpenError(
+            'Circuit {} is open after repeated failures.'.format(self.name))
+
+    def record_success(self):
+        with self._lock:
+            was_closed = self._opened_at is None
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+        if not was_closed:
+            self._changed(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            reopen = self._probing or (
+                self._opened_at is None and
+                self._failures >= self.failure_threshold)
+            if reopen:
+                self._opened_at = time.monotonic()
+                self._probing = False
+        if reopen:
+            self._changed(OPEN)
+
+    def _changed(self, state):
+        if state == OPEN:
+            logger.warning(
+                'Circuit {} opened, failing fast for {} seconds.'.format(
+                    self.name, self.reset_timeout))
+        else:
+            logger.info('Circuit {} closed.'.format(self.name))
+        cache.set(CIRCUIT_STATE_CACHE_KEY.format(self.name), {
+            'state': state,
+            'changed': timezone.now(),
+        }, timeout=None)
+
+
+class RedisCircuitBreaker(CircuitBreaker):
+    """
+    A circuit breaker shared by every process through Redis, so one
+    process' failures open the circuit for all of them.
+    """
+
+    def _key(self, suffix):
+        return CIRCUIT_REDIS_KEY.format(self.name, suffix)
+
+    @property
+    def state(self):
+        client = get_redis_client()
+        if client.exists(self._key('open')):
+            return OPEN
+        if client.exists(self._key('tripped')):
+            return HALF_OPEN
+        return CLOSED
+
+    def allow(self):
+        client = get_redis_client()
+        if not client.exists(self._key('open')):
+            if not client.exists(self._key('tripped')):
+                return
+            # Half open, only one process gets to probe.
+            if client.set(self._key('probe'), 1, nx=True,
+                          ex=self.reset_timeout):
+                return
+        raise CircuitOpenError(
+            'Circuit {} is open after repeated failures.'.format(self.name))
+
+    def record_success(self):
+        pipe = get_redis_client().pipeline(transaction=True)
+        pipe.delete(self._key('tripped'))
+        pipe.delete(self._key('failures'), self._key('probe'))
+        pipe.exists(self._key('open'))
+        was_tripped, _, is_open = pipe.execute()
+        # Unless another process opened it again meanwhile.
+        if was_tripped and not is_open:
+            self._changed(CLOSED)
+
+    def record_failure(self):
+        client = get_redis_client()
+        if client.exists(self._key('tripped')):
+            reopen = bool(client.delete(self._key('probe')))
+        else:
+            failures = client.incr(self._key('failures'))
+            reopen = failures >= self.failure_threshold
+        if reopen:
+            client.set(self._key('open'), 1, ex=self.reset_timeout)
+            client.set(self._key('tripped'), 1)
+            client.delete(self._key('failures'))
+            self._changed(OPEN)
+
+
+def get_state(name):
+    """
+    Return the last recorded state of the named breaker, as a dict of
+    'state' and 'changed', or None if it never changed.
+    """
+    return cache.get(CIRCUIT_STATE_CACHE_KEY.format(name))
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, djpsa_settings=None):
+    """
+    Return this process' breaker for the name, i.e. an API's address, from
+    the circuit breaker settings.
+    """
+    djpsa_settings = djpsa_settings or get_djpsa_settings()
+    backend = djpsa_settings['circuit_breaker_backend']
+    with _breakers_lock:
+        breaker = _breakers.get((name, backend))
+        if breaker is None:
+            breaker_class = RedisCircuitBreaker if backend == REDIS \
+                else CircuitBreaker
+            breaker = _breakers[(name, backend)] = breaker_class(
+                name,
+                failure_threshold=djpsa_settings[
+                    'circuit_failure_threshold'],
+                reset_timeout=djpsa_settings['circuit_reset_timeout'],
+            )
+        return breaker
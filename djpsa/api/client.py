@@ -28,6 +28,11 @@ def retry_if_api_error(exception):
 
 
 class APIClient:
+    # A requests.Session shared by every client. Long-running processes,
+    # such as the sync daemon, set this to reuse connections between syncs.
+    session = None
+    # Size of the body of the last JSON response, for page size tuning.
+    last_response_bytes = None
 
     def __init__(self, conditions=None):
         self.conditions = conditions if conditions else []
@@ -98,10 +103,13 @@ class APIClient:
             if files:
                 kwargs['files'] = files
 
+            headers = self._get_headers()
+            headers.update(kwargs.pop('headers', None) or {})
+
             response = self._request(
                 method,
                 endpoint_url,
-                headers=self._get_headers(),
+                headers=headers,
                 params=self._format_params(params),
                 **kwargs
             )
@@ -121,7 +129,9 @@ class APIClient:
             content_type = response.headers.get('Content-Type', '').lower()
             if 'application/json' in content_type or content_type == '':
                 try:
-                    return response.json()
+                    data = response.json()
+                    self.last_response_bytes = len(response.content)
+                    return data
                 except JSONDecodeError as e:
                     logger.error(
                         'Request failed during decoding JSON: GET {}: {}'
@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+from djpsa.api.exceptions import APIError
+from djpsa.utils import get_djpsa_settings
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY_CACHE_KEY = 'djpsa_concurrency:{}'
+# Weight of the newest latency in the moving average of latencies.
+LATENCY_ALPHA = 0.1
+# Weight of a spike, lower so a few slow responses barely move the average,
+# but a lasting change in latency is learned eventually.
+SPIKE_ALPHA = 0.02
+# Latency averages kept per limiter, the oldest is dropped beyond this.
+MAX_LATENCY_KEYS = 256
+
+
+class AIMDLimiter:
+    """
+    Limit the requests in flight to an API, adjusting the limit from how
+    the API copes: additive increase, multiplicative decrease.
+
+    Every healthy response raises the limit by 1/limit, so about one more
+    per limit's worth of requests. An overloaded response (429 or 5xx, a
+    failed request, or a latency over latency_tolerance times the usual
+    one) multiplies it by decrease_factor, once for all the requests that
+    were in flight together.
+
+    The usual latency is kept per key given to release, i.e. per endpoint
+    name and page size, so slow endpoints aren't compared with fast ones.
+    Keys should not include record IDs, at most MAX_LATENCY_KEYS are kept.
+
+    The limit is kept in the Django cache, so the next run starts from it.
+    """
+
+    def __init__(self, name, initial=4, bounds=(1, 16),
+                 latency_tolerance=3.0, decrease_factor=0.5,
+                 acquire_timeout=None):
+        self.name = name
+        self.min_limit, self.max_limit = bounds
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.acquire_timeout = acquire_timeout
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        # Bumped on each decrease, so requests started before it don't
+        # decrease the limit again.
+        self._epoch = 0
+        self._latencies = {}
+
+        stored = cache.get(self.cache_key)
+        self.limit = self._clamp(stored or initial)
+        self._stored_limit = self.limit
+
+    @property
+    def cache_key(self):
+        return CONCURRENCY_CACHE_KEY.format(self.name)
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def _clamp(self, limit):
+        return max(self.min_limit, min(self.max_limit, float(limit)))
+
+    def acquire(self, timeout=None):
+        """
+        Wait for a free slot and take it. Return a token for release.
+
+        Raises APIError if no slot is free within timeout seconds, defaulting
+        to acquire_timeout.
+        """
+        timeout = timeout if timeout is not None else self.acquire_timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                remaining = None if deadline is None \
+                    else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise APIError(
+                        'Timed out waiting for one of {} request slots to '
+                        '{}.'.format(int(self.limit), self.name))
+                self._cond.wait(remaining)
+            self._in_flight += 1
+            return self._epoch
+
+    def release(self, token, latency=None, overloaded=False, key=None):
+        """
+        Free the slot taken by acquire, with how its request went. The
+        latency is compared with earlier ones for the same key.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            spike = self._is_spike(key, latency)
+            if latency is not None:
+                self._observe(key, latency, spike)
+            if overloaded or spike:
+                self._decrease(token)
+            else:
+                self.limit = self._clamp(self.limit + 1 / self.limit)
+            self._cond.notify_all()
+            limit = self.limit
+
+        if abs(limit - self._stored_limit) >= 1:
+            self._stored_limit = limit
+            cache.set(self.cache_key, limit, timeout=None)
+
+    def _is_spike(self, key, latency):
+        usual = self._latencies.get(key)
+        return latency is not None and usual is not None and \
+            self.latency_tolerance is not None and \
+            latency > usual * self.latency_tolerance
+
+    def _observe(self, key, latency, spike):
+        usual = self._latencies.get(key)
+        if usual is None:
+            if len(self._latencies) >= MAX_LATENCY_KEYS:
+                del self._latencies[next(iter(self._latencies))]
+            self._latencies[key] = latency
+            return
+        alpha = SPIKE_ALPHA if spike else LATENCY_ALPHA
+        self._latencies[key] = (1 - alpha) * usual + alpha * latency
+
+    def _decrease(self, token):
+        if token != self._epoch:
+            return
+        self._epoch += 1
+        previous = self.limit
+        self.limit = self._clamp(self.limit * self.decrease_factor)
+        logger.info('Reduced concurrency of {} from {:.1f} to {:.1f}.'.format(
+            self.name, previous, self.limit))
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name, djpsa_settings=None):
+    """
+    Return this process' shared limiter for the name, i.e. an API's
+    address, from the concurrency settings.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            djpsa_settings = djpsa_settings or get_djpsa_settings()
+            limiter = _limiters[name] = AIMDLimiter(
+                name,
+                initial=djpsa_settings['concurrency_initial'],
+                bounds=djpsa_settings['concurrency_bounds'],
+                latency_tolerance=djpsa_settings[
+                    'concurrency_latency_tolerance'],
+                acquire_timeout=djpsa_settings[
+                    'concurrency_acquire_timeout'],
+            )
+        return limiter
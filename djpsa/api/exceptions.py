@@ -27,3 +27,11 @@ class RecordNotFoundError(APIClientError):
 class SecurityPermissionsException(APIClientError):
     """The API credentials have insufficient security permissions."""
     pass
+
+
+class CircuitOpenError(APIError):
+    """
+    The API failed repeatedly, so requests fail fast without being made
+    until the circuit breaker lets a probe request through.
+    """
+    pass
@@ -0,0 +1,75 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from djpsa.api.cache import TTLCache, SingleFlight
+
+
+class TestTTLCache(unittest.TestCase):
+
+    @patch('djpsa.api.cache.time.monotonic')
+    def test_entries_expire(self, monotonic):
+        monotonic.return_value = 100
+        cache = TTLCache(ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=20)
+
+        monotonic.return_value = 115
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+
+    def test_zero_ttl_is_not_cached(self):
+        cache = TTLCache(ttl=10)
+        cache.set('a', 1, ttl=0)
+
+        self.assertIsNone(cache.get('a'))
+
+    def test_oldest_dropped_when_full(self):
+        cache = TTLCache(ttl=10, maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 2)
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_callers_share_call(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'asset'
+
+        leader = threading.Thread(
+            target=lambda: results.append(flight.do(7, fetch)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(
+            target=lambda: results.append(flight.do(7, fetch)))
+        follower.start()
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(results, ['asset', 'asset'])
+        self.assertEqual(len(calls), 1)
+
+    def test_exception_raised_and_key_released(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            flight.do(7, fail)
+        self.assertEqual(flight.do(7, lambda: 'ok'), 'ok')
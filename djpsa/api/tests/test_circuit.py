@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import patch
+
+from django.core.cache import cache
+
+from djpsa.api.circuit import CircuitBreaker, RedisCircuitBreaker, \
+    get_state, CLOSED, OPEN, HALF_OPEN
+from djpsa.api.exceptions import CircuitOpenError
+
+
+@patch('djpsa.api.circuit.time.monotonic', return_value=100)
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.breaker = CircuitBreaker(
+            'halo', failure_threshold=3, reset_timeout=30)
+
+    def trip(self):
+        for _ in range(3):
+            self.breaker.allow()
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self, _):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+        self.assertEqual(get_state('halo')['state'], OPEN)
+
+    def test_half_open_lets_one_probe_through(self, monotonic):
+        self.trip()
+        monotonic.return_value = 131
+
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.allow()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.allow()
+        self.assertEqual(get_state('halo')['state'], CLOSED)
+
+    def test_failed_probe_opens_again(self, monotonic):
+        self.trip()
+        monotonic.return_value = 131
+        self.breaker.allow()
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+
+
+class TestRedisCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        cache.clear()
+        patcher = patch('djpsa.api.circuit.get_redis_client')
+        self.redis = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.breaker = RedisCircuitBreaker(
+            'halo', failure_threshold=2, reset_timeout=30)
+
+    def test_fails_fast_while_open_in_any_process(self):
+        self.redis.exists.side_effect = lambda key: key.endswith(':open')
+
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+
+    def test_opens_after_threshold(self):
+        self.redis.exists.return_value = False
+        self.redis.incr.side_effect = [1, 2]
+
+        self.breaker.record_failure()
+        self.redis.set.assert_not_called()
+        self.breaker.record_failure()
+
+        self.redis.set.assert_any_call(
+            'djpsa_circuit:halo:open', 1, ex=30)
+        self.assertEqual(get_state('halo')['state'], OPEN)
@@ -0,0 +1,109 @@
+import threading
+import unittest
+
+from django.core.cache import cache
+
+from djpsa.api import concurrency
+from djpsa.api.concurrency import AIMDLimiter
+from djpsa.api.exceptions import APIError
+
+
+class TestAIMDLimiter(unittest.TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_healthy_responses_increase_limit(self):
+        limiter = AIMDLimiter('halo', initial=2, bounds=(1, 8))
+
+        for _ in range(4):
+            limiter.release(limiter.acquire(), latency=0.1)
+
+        self.assertGreaterEqual(int(limiter.limit), 3)
+
+    def test_overload_halves_limit_once_per_window(self):
+        limiter = AIMDLimiter('halo', initial=8, bounds=(1, 8))
+        slots = [limiter.acquire() for _ in range(4)]
+
+        for slot in slots:
+            limiter.release(slot, overloaded=True)
+
+        self.assertEqual(limiter.limit, 4)
+        limiter.release(limiter.acquire(), overloaded=True)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_latency_spike_decreases_limit(self):
+        limiter = AIMDLimiter('halo', initial=4, bounds=(1, 8),
+                              latency_tolerance=3.0)
+        limiter.release(limiter.acquire(), latency=0.1)
+        limit = limiter.limit
+
+        limiter.release(limiter.acquire(), latency=1.0)
+
+        self.assertEqual(limiter.limit, limit / 2)
+
+    def test_latency_compared_per_key(self):
+        limiter = AIMDLimiter('halo', initial=4, bounds=(1, 8),
+                              latency_tolerance=3.0)
+        limiter.release(limiter.acquire(), latency=0.1, key='lookup')
+        limiter.release(limiter.acquire(), latency=2.0, key='tickets')
+        limit = limiter.limit
+
+        limiter.release(limiter.acquire(), latency=2.0, key='tickets')
+
+        self.assertGreater(limiter.limit, limit)
+
+    def test_latency_keys_bounded(self):
+        limiter = AIMDLimiter('halo')
+
+        for key in range(concurrency.MAX_LATENCY_KEYS + 10):
+            limiter.release(limiter.acquire(), latency=0.1, key=key)
+
+        self.assertEqual(
+            len(limiter._latencies), concurrency.MAX_LATENCY_KEYS)
+        self.assertNotIn(0, limiter._latencies)
+
+    def test_lasting_latency_change_is_learned(self):
+        limiter = AIMDLimiter('halo', initial=8, bounds=(1, 64),
+                              latency_tolerance=3.0)
+        limiter.release(limiter.acquire(), latency=0.1)
+
+        for _ in range(100):
+            limiter.release(limiter.acquire(), latency=1.0)
+
+        self.assertGreater(limiter.limit, 1)
+        limit = limiter.limit
+        limiter.release(limiter.acquire(), latency=1.0)
+        self.assertGreater(limiter.limit, limit)
+
+    def test_acquire_times_out(self):
+        limiter = AIMDLimiter('halo', initial=1, bounds=(1, 1),
+                              acquire_timeout=0.05)
+        limiter.acquire()
+
+        with self.assertRaises(APIError):
+            limiter.acquire()
+
+    def test_blocks_at_limit(self):
+        limiter = AIMDLimiter('halo', initial=1, bounds=(1, 1))
+        slot = limiter.acquire()
+        acquired = threading.Event()
+
+        def second():
+            limiter.release(limiter.acquire())
+            acquired.set()
+
+        thread = threading.Thread(target=second)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+
+        limiter.release(slot)
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+
+    def test_limit_persisted_for_next_run(self):
+        limiter = AIMDLimiter('halo', initial=8, bounds=(1, 16))
+        limiter.release(limiter.acquire(), overloaded=True)
+
+        self.assertEqual(AIMDLimiter('halo', initial=8).limit, 4)
+        self.assertEqual(AIMDLimiter('other', initial=8).limit, 8)
@@ -134,3 +134,16 @@ class CannedTextAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'team', 'agent')
     search_fields = ['id', 'name', 'text']
     list_filter = ('team', 'agent')
+
+
+@admin.register(models.Attachment)
+class AttachmentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'filename', 'ticket', 'file_size', 'date_created')
+    search_fields = ['id', 'filename']
+
+
+@admin.register(models.Asset)
+class AssetAdmin(admin.ModelAdmin):
+    list_display = ('id', 'inventory_number', 'key_field', 'asset_type_name',
+                    'client', 'site')
+    search_fields = ['id', 'inventory_number', 'key_field']
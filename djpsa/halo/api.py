@@ -1,13 +1,20 @@
+import copy
 import json
 import logging
+import time
 import requests
 import hashlib
+import uuid
 from django.conf import settings
 from django.core.cache import cache
 
+from djpsa.api.cache import SingleFlight, TTLCache
 from djpsa.api.client import APIClient
+from djpsa.api.circuit import get_breaker
+from djpsa.api.concurrency import get_limiter
 from djpsa.api.exceptions import APIError, APIClientError
-from djpsa.utils import LockNotAcquiredError, redis_lock
+from djpsa.utils import LockNotAcquiredError, redis_lock, \
+    get_redis_client, get_djpsa_settings
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +26,36 @@ TOKEN_REQUEST_TIMEOUT = 30
 TOKEN_LOCK_LIFETIME = TOKEN_REQUEST_TIMEOUT + 1
 TOKEN_LOCK_ACQUIRE_TIMEOUT = 60
 
+REQUEST_FLIGHT_KEY = 'halo_request_flight:{}'
+# Seconds between checks for the result of a request another process is
+# making.
+REQUEST_FLIGHT_POLL_INTERVAL = 0.05
+
+
+def _copy_result(result):
+    # Decoded JSON is copied, anything else, i.e. a binary response, is
+    # shared as is.
+    if isinstance(result, (dict, list)):
+        return copy.deepcopy(result)
+    return result
+
+
+# GET requests in flight in this process, by request.
+_request_flight = SingleFlight(copy_result=_copy_result)
+
+# Version of each record, bumped to drop its cached copies in every process.
+RECORD_VERSION_KEY = 'halo_record_version:{}:{}:{}'
+_record_cache = None
+
+
+def get_record_cache():
+    """Return this process' cache of records fetched with get_record."""
+    global _record_cache
+    if _record_cache is None:
+        _record_cache = TTLCache(
+            maxsize=get_djpsa_settings()['record_cache_max_entries'])
+    return _record_cache
+
 
 class HaloAPICredentials:
     def __init__(self, authorisation_server, client_id, client_secret):
@@ -65,24 +102,194 @@ class HaloAPIClient(APIClient):
     def get(self, record_id):
         return self.request('GET', params={'search_id': record_id})
 
+    def get_record(self, record_id, params=None, cached=True):
+        """
+        Fetch a single record by ID, through the read-through cache if the
+        record_cache_ttls setting has a TTL for this endpoint, unless cached
+        is False.
+        """
+        def fetch():
+            return self.request(
+                'GET',
+                endpoint_url=self._format_endpoint(record_id),
+                params=params,
+            )
+
+        ttl = self.request_settings['record_cache_ttls'].get(self.endpoint)
+        if not ttl or not cached:
+            return fetch()
+
+        record_cache = get_record_cache()
+        key = (
+            self.resource_server, self.endpoint, str(record_id),
+            json.dumps(self._format_params(params), sort_keys=True,
+                       default=str),
+        )
+        # Read the version first, so an invalidation during the fetch
+        # isn't missed.
+        version = cache.get(
+            self._record_version_key(self.resource_server, record_id), 0)
+        entry = record_cache.get(key)
+        if entry is not None and entry[0] == version:
+            return copy.deepcopy(entry[1])
+
+        result = fetch()
+        if isinstance(result, (dict, list)):
+            record_cache.set(key, (version, copy.deepcopy(result)), ttl)
+        return result
+
+    @classmethod
+    def _record_version_key(cls, resource_server, record_id):
+        return RECORD_VERSION_KEY.format(
+            resource_server, cls.endpoint, record_id)
+
+    @classmethod
+    def invalidate_record(cls, record_id, resource_server=None,
+                          request_settings=None):
+        """
+        Drop the cached copies of the record, in every process. Does nothing
+        if record_cache_ttls has no TTL for this endpoint.
+        """
+        ttls = (request_settings or get_djpsa_settings())['record_cache_ttls']
+        if not ttls.get(cls.endpoint):
+            return
+
+        resource_server = resource_server or settings.HALO_RESOURCE_SERVER
+        if not resource_server.endswith('/'):
+            resource_server += '/'
+        key = cls._record_version_key(resource_server, record_id)
+        # Copies cached before the key expires have expired by then too.
+        timeout = max(ttls.values())
+        cache.add(key, 0, timeout=timeout)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted meanwhile.
+            cache.set(key, 1, timeout=timeout)
+
+    def _invalidate_records(self, data):
+        for record in data if isinstance(data, list) else [data]:
+            if isinstance(record, dict) and record.get('id'):
+                self._invalidate_record(record['id'])
+
+    def _invalidate_record(self, record_id):
+        self.invalidate_record(
+            record_id, self.resource_server, self.request_settings)
+
+    def request(self,
+                method,
+                endpoint_url=None,
+                body=None,
+                params=None,
+                files=None,
+                **kwargs):
+        """
+        Issue the request. Identical GET requests made at once share one
+        request to Halo and its decoded result, see coalesce_requests.
+        """
+        if method != 'GET' or body or files or kwargs or \
+                not self.request_settings['coalesce_requests']:
+            return super().request(
+                method, endpoint_url, body, params, files, **kwargs)
+
+        endpoint_url = endpoint_url or self._format_endpoint()
+        key = self._request_flight_key(
+            endpoint_url, self._format_params(params))
+
+        def fetch():
+            return super(HaloAPIClient, self).request(
+                method, endpoint_url, params=params)
+
+        if self.request_settings['coalesce_requests_redis']:
+            return _request_flight.do(
+                key, self._request_across_processes, key, fetch)
+        return _request_flight.do(key, fetch)
+
+    def _request_flight_key(self, endpoint_url, params):
+        # Different credentials may see different records.
+        client_id = getattr(
+            getattr(self.token_fetcher, 'credentials', None),
+            'client_id', None)
+        request = json.dumps(
+            [client_id, endpoint_url, params], sort_keys=True, default=str)
+        return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+    def _request_across_processes(self, key, fetch):
+        """
+        Make the request, unless another process is making it, in which case
+        wait for its result.
+
+        Each request in flight has its own result key, which only the
+        processes that found it in flight know. So a result is only shared
+        with requests made while it was in flight, never with later ones,
+        i.e. after a write. It is kept for coalesce_requests_window seconds
+        for the waiting processes to read.
+        """
+        client = get_redis_client()
+        lock_key = REQUEST_FLIGHT_KEY.format(key)
+        window = self.request_settings['coalesce_requests_window']
+        timeout = self.request_settings['timeout']
+
+        flight_id = uuid.uuid4().hex
+        if client.set(lock_key, flight_id, nx=True, ex=int(timeout) + 1):
+            try:
+                result = fetch()
+                if result is None or isinstance(result, (dict, list)):
+                    client.set('{}:{}'.format(lock_key, flight_id),
+                               json.dumps(result), px=int(window * 1000))
+                return result
+            finally:
+                client.delete(lock_key)
+
+        flight_id = client.get(lock_key)
+        if flight_id is None:
+            # Finished meanwhile, its result is too old to share.
+            return fetch()
+        result_key = '{}:{}'.format(lock_key, flight_id.decode())
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(REQUEST_FLIGHT_POLL_INTERVAL)
+            result = client.get(result_key)
+            if result is not None:
+                return json.loads(result)
+            if client.get(lock_key) != flight_id:
+                # The other process failed, or its result couldn't be
+                # shared.
+                break
+        return fetch()
+
     def create(self, data):
         # Halo API expects a list of records, even if we're only creating one
         if not isinstance(data, list):
             data = [data]
 
-        return self.request('POST', body=data)
+        response = self.request('POST', body=data)
+        # Halo creates and updates with the same request.
+        self._invalidate_records(data)
+        return response
 
     def update(self, record_id, data):
         data.update({'id': record_id})
         if not isinstance(data, list):
             data = [data]
-        return self.request('POST', body=data)
+        response = self.request('POST', body=data)
+        self._invalidate_record(record_id)
+        return response
+
+    def update_many(self, data):
+        # Each record carries its own id.
+        response = self.request('POST', body=data)
+        self._invalidate_records(data)
+        return response
 
     def delete(self, record_id):
-        return self.request(
+        response = self.request(
             'DELETE',
             endpoint_url=self._format_endpoint(record_id)
         )
+        self._invalidate_record(record_id)
+        return response
 
     def remove_condition(self, condition):
         # self.conditions is a list of dictionaries, so we need to remove the
@@ -131,21 +338,57 @@ class HaloAPIClient(APIClient):
             'Making %s request to %s: params %s, kwargs %s',
             method, endpoint_url, params, kwargs
         )
+        http = self.session or requests
+
         # Make the actual request
-        response = requests.request(
-            method,
-            endpoint_url,
-            headers=headers,
-            params=params,
-            timeout=self.request_settings['timeout'],
-            **kwargs
-        )
+        breaker = get_breaker(self.resource_server, self.request_settings) \
+            if self.request_settings['circuit_breaker'] else None
+        if breaker:
+            # Raises CircuitOpenError, which isn't retried.
+            breaker.allow()
+        limiter = get_limiter(self.resource_server, self.request_settings) \
+            if self.request_settings['adaptive_concurrency'] else None
+        slot = None
+        failed = overloaded = True
+        try:
+            # Inside the try, so a probe let through by the breaker is
+            # recorded as failed if no slot frees up in time.
+            if limiter:
+                slot = limiter.acquire()
+            started = time.monotonic()
+            response = http.request(
+                method,
+                endpoint_url,
+                headers=headers,
+                params=params,
+                timeout=self.request_settings['timeout'],
+                **kwargs
+            )
+            failed = response.status_code >= 500
+            overloaded = failed or response.status_code == 429
+        finally:
+            if slot is not None:
+                # A streamed response returns before its body is read, so
+                # its latency says little about the load.
+                latency = None if kwargs.get('stream') \
+                    else time.monotonic() - started
+                limiter.release(
+                    slot, latency, overloaded,
+                    key=(method, self.endpoint, (params or {}).get(
+                        'page_size')))
+            if breaker:
+                if failed:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
 
         # If the token is invalid, refresh it and retry
         if response.status_code == 401:
+            # A streamed response holds its connection until closed.
+            response.close()
             token = self.token_fetcher.get_token()
             headers['Authorization'] = f'Bearer {token}'
-            response = requests.request(
+            response = http.request(
                 method,
                 endpoint_url,
                 headers=headers,
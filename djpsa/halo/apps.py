@@ -10,3 +10,6 @@ class HaloConfig(AppConfig):
     def ready(self):
         from djpsa.halo import provider
         settings.PROVIDER = provider
+
+        # Register the cached configuration lookups.
+        from djpsa.halo import lookups  # noqa: F401
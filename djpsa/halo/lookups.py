@@ -0,0 +1,16 @@
+# Configuration records that are small and rarely change, cached in-process
+# by djpsa.sync.lookup. Use these instead of querying, i.e.
+#
+#   lookups.get(models.Status).get(status_id)
+#   lookups.get(models.Team).get_by_name(team_name)
+
+from djpsa.halo import models
+from djpsa.sync.lookup import lookups
+
+lookups.register(models.Status)
+lookups.register(models.Priority)
+lookups.register(models.SLA)
+lookups.register(models.TicketType)
+lookups.register(models.Team)
+lookups.register(models.Outcome, name_field='outcome')
+lookups.register(models.ChargeRate)
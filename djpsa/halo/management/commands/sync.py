@@ -5,6 +5,7 @@ from djpsa.sync.management.commands.base_sync import BaseSyncCommand
 
 
 class Command(BaseSyncCommand):
+    sync_grades_class = sync.HaloSyncGrades
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
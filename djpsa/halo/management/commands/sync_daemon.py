@@ -0,0 +1,14 @@
+from collections import OrderedDict
+
+from djpsa.halo.records import sync
+from djpsa.sync.management.commands.base_sync_daemon import \
+    BaseSyncDaemonCommand
+
+
+class Command(BaseSyncDaemonCommand):
+    sync_grades_class = sync.HaloSyncGrades
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.synchronizer_map = OrderedDict(sync.sync_command_list)
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('halo', '0033_agent_cost_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Attachment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(blank=True, default='', max_length=255)),
+                ('file_size', models.BigIntegerField(blank=True, null=True)),
+                ('is_image', models.BooleanField(default=False)),
+                ('date_created', models.DateTimeField(blank=True, null=True)),
+                ('note', models.TextField(blank=True, default='')),
+                ('blob_digest', models.CharField(blank=True, default='', max_length=64)),
+                ('ticket', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attachments', to='halo.ticket')),
+            ],
+            options={
+                'verbose_name_plural': 'Attachments',
+            },
+        ),
+        migrations.CreateModel(
+            name='AttachmentTracker',
+            fields=[
+            ],
+            options={
+                'db_table': 'halo_attachment',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('halo.attachment',),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('halo', '0034_attachment_attachmenttracker'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Asset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inventory_number', models.CharField(blank=True, default='', max_length=255)),
+                ('key_field', models.CharField(blank=True, default='', max_length=255)),
+                ('key_field2', models.CharField(blank=True, default='', max_length=255)),
+                ('key_field3', models.CharField(blank=True, default='', max_length=255)),
+                ('asset_type_name', models.CharField(blank=True, default='', max_length=255)),
+                ('username', models.CharField(blank=True, default='', max_length=255)),
+                ('inactive', models.BooleanField(default=False)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('client', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='halo.client')),
+                ('site', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='halo.site')),
+            ],
+            options={
+                'verbose_name_plural': 'Assets',
+            },
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='assets_synced',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='TicketAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inventory_number', models.CharField(blank=True, default='', max_length=255)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='halo.asset')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='halo.ticket')),
+            ],
+            options={
+                'unique_together': {('ticket', 'asset')},
+            },
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='tickets',
+            field=models.ManyToManyField(related_name='assets', through='halo.TicketAsset', to='halo.ticket'),
+        ),
+        migrations.CreateModel(
+            name='AssetTracker',
+            fields=[
+            ],
+            options={
+                'db_table': 'halo_asset',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('halo.asset',),
+        ),
+    ]
@@ -22,6 +22,8 @@ from djpsa.halo.records.outcome.model import Outcome, OutcomeTracker
 from djpsa.halo.records.chargerate.model import ChargeRate, ChargeRateTracker
 from djpsa.halo.records.fieldinfo.model import UDFDefinition, UDFDefinitionTracker
 from djpsa.halo.records.cannedtext.model import CannedText, CannedTextTracker
+from djpsa.halo.records.attachment.model import Attachment, AttachmentTracker
+from djpsa.halo.records.asset.model import Asset, AssetTracker, TicketAsset
 
 
 class FieldInfoReference(TimeStampedModel):
@@ -2,3 +2,7 @@ from djpsa.halo.callbacks import HaloCallbacksHandler
 
 
 callback_handler = HaloCallbacksHandler
+# Views that handle queued callbacks, by entity type.
+callback_views = {
+    'ticket': 'djpsa.halo.views.TicketCallBackView',
+}
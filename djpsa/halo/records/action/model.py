@@ -1,5 +1,5 @@
 from django.db import models
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class Action(models.Model):
@@ -80,7 +80,7 @@ class Action(models.Model):
 
 
 class ActionTracker(Action):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
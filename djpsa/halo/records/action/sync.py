@@ -1,7 +1,22 @@
+import logging
+from datetime import timedelta
+
+from django.utils import timezone
+
 from djpsa.halo import models
 from djpsa.halo.records import api
 from djpsa.halo import sync
 from djpsa.halo.records.halouser.model import HaloUser
+from djpsa.sync.mapping import APIField
+
+# Number of a ticket's newest actions fetched by sync_latest when the
+# new action's ID isn't known.
+LATEST_ACTION_COUNT = 5
+# When none of the newest actions start at the arrival date, sync_latest
+# syncs the ticket's actions starting up to this long before it.
+LATEST_ACTION_MARGIN = timedelta(minutes=5)
+
+logger = logging.getLogger(__name__)
 
 
 class ActionSynchronizer(sync.ResponseKeyMixin,
@@ -25,6 +40,29 @@ class ActionSynchronizer(sync.ResponseKeyMixin,
         'charge_rate_id': (models.ChargeRate, 'chargerate'),
     }
 
+    # Keys left out are read from Action.API_FIELDS.
+    field_mapping = {
+        'id': 'ticket_action_id',
+        'action_arrival_date': APIField(parser=sync.empty_date_parser),
+        'action_completion_date': APIField(parser=sync.empty_date_parser),
+        'action_date_created':
+            APIField('actiondatecreated', parser=sync.empty_date_parser),
+        'time_taken': APIField(),
+        'time_taken_adjusted': APIField(),
+        'time_taken_days': APIField(),
+        'non_billable_time': APIField(),
+        'travel_time': APIField(),
+        'note': APIField(),
+        'action_charge_amount': APIField(),
+        'action_charge_hours': APIField(),
+        'action_non_charge_amount': APIField(),
+        'action_non_charge_hours': APIField(),
+        'attachment_count': APIField(),
+        'act_is_billable': APIField(default=False),
+        'hidden_from_user': APIField(default=False),
+        'important': APIField(default=False),
+    }
+
     def _get_real_action_id(self, action_record):
         """
         Extract the real action ID from the concatenated ID.
@@ -43,23 +81,13 @@ class ActionSynchronizer(sync.ResponseKeyMixin,
 
         return action_record.id
 
-    def update(self, record, data, *args, **kwargs):
+    def _get_remote_id(self, record):
         """
-        Override update to use the real action ID
-        instead of the concatenated ID.
+        Update using the real action ID instead of the concatenated ID.
         """
-        real_action_id = self._get_real_action_id(record)
-
-        data = self._convert_fields(data)
-        body = self._convert_fields_to_api_format(data)
-
-        body.update({'id': real_action_id})
-        response = self.client.update(real_action_id, body)
+        return self._get_real_action_id(record)
 
-        instance, _ = self.update_or_create_instance(response)
-        return instance
-
-    def update_or_create_instance(self, json_data):
+    def _prepare_api_instance(self, json_data):
         # So far, action is the only model that has to be treated in this way,
         #  so rather than updating the lookup_key pattern to be more generic,
         #  we'll just add this special case here. As I think it would just add
@@ -70,40 +98,83 @@ class ActionSynchronizer(sync.ResponseKeyMixin,
         # with the action ID
         json_data[self.lookup_key] = \
             int(f"{json_data.get('ticket_id')}{json_data.get('id')}")
+        return json_data
+
+    def update_or_create_instance(self, json_data):
+        return super().update_or_create_instance(
+            self._prepare_api_instance(json_data))
 
-        return super().update_or_create_instance(json_data)
-
-    def _assign_field_data(self, instance, json_data):
-        instance.id = json_data.get(self.lookup_key)
-        instance.action_arrival_date = \
-            sync.empty_date_parser(json_data.get('actionarrivaldate'))
-        instance.action_completion_date = \
-            sync.empty_date_parser(json_data.get('actioncompletiondate'))
-        instance.action_date_created = \
-            sync.empty_date_parser(json_data.get('actiondatecreated'))
-        instance.time_taken = json_data.get('timetaken')
-        instance.time_taken_adjusted = json_data.get('timetakenadjusted')
-        instance.time_taken_days = json_data.get('timetakendays')
-        instance.non_billable_time = json_data.get('nonbilltime')
-        instance.travel_time = json_data.get('traveltime')
-        instance.note = json_data.get('note')
-        instance.action_charge_amount = json_data.get('actionchargeamount')
-        instance.action_charge_hours = json_data.get('actionchargehours')
-        instance.action_non_charge_amount = \
-            json_data.get('actionnonchargeamount')
-        instance.action_non_charge_hours = \
-            json_data.get('actionnonchargehours')
-        instance.attachment_count = json_data.get('attachment_count')
-        instance.act_is_billable = json_data.get('actisbillable', False)
-        instance.hidden_from_user = json_data.get('hiddenfromuser', False)
-        instance.important = json_data.get('important', False)
-
-        self.set_relations(instance, json_data)
-
-    def create(self, data, *args, **kwargs):
+    def sync_latest(self, ticket_id, action_id=None,
+                    count=LATEST_ACTION_COUNT, arrival_date=None):
+        """
+        Upsert a ticket's newest actions with a single request, or just the
+        given action if its ID is known. Unlike a related sync, nothing else
+        is fetched or pruned.
+
+        Pass arrival_date to keep only the newest actions starting then,
+        i.e. a time entry just logged. A naive arrival_date is taken to be
+        UTC. If none of the newest actions start then, i.e. more were added
+        since, the ticket's actions starting up to LATEST_ACTION_MARGIN
+        before it are synced instead.
+
+        Returns the synced instances.
+        """
+        if action_id:
+            response = self.client.fetch_resource(
+                endpoint_url=self.client._format_endpoint(action_id),
+                params={'ticket_id': ticket_id},
+            )
+            records = [response] if response else []
+        else:
+            response = self.client.fetch_resource(params={
+                'ticket_id': ticket_id,
+                'count': count,
+                # Newest first, action IDs increase within a ticket.
+                'order': 'id',
+                'orderdesc': True,
+            })
+            records = self._unpack_records(response)
+            if arrival_date is not None:
+                if timezone.is_naive(arrival_date):
+                    arrival_date = timezone.make_aware(
+                        arrival_date, timezone.utc)
+                records = [
+                    record for record in records
+                    if self._starts_at(record, arrival_date)
+                ] or self._fetch_since(ticket_id, arrival_date)
+
+        instances = []
+        for record in records:
+            instance, _ = self.update_or_create_instance(record)
+            instances.append(instance)
+        return instances
+
+    def _fetch_since(self, ticket_id, arrival_date):
+        since = arrival_date - LATEST_ACTION_MARGIN
+        response = self.client.fetch_resource(params={'ticket_id': ticket_id})
+        records = []
+        for record in self._unpack_records(response):
+            started = sync.empty_date_parser(record.get('actionarrivaldate'))
+            if started is not None and started >= since:
+                records.append(record)
+        if not any(self._starts_at(r, arrival_date) for r in records):
+            logger.warning(
+                'No action on ticket {} starts at {}, synced the {} '
+                'starting since {}.'.format(
+                    ticket_id, arrival_date, len(records), since))
+        return records
+
+    @staticmethod
+    def _starts_at(record, arrival_date):
+        started = sync.empty_date_parser(record.get('actionarrivaldate'))
+        # Halo may drop the fraction of a second.
+        return started is not None and \
+            abs((started - arrival_date).total_seconds()) < 1
+
+    def _get_create_body(self, data):
         # Halo impersonation is a bit weird, we need to get the agent's
         # username from the user record related to the agent. Also, the
         # username field is called "name".
         data['agent'] = HaloUser.objects.get(agent=data['agent']).name
 
-        return super().create(data, *args, **kwargs)
+        return super()._get_create_body(data)
@@ -1,5 +1,5 @@
 from django.db import models
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class Agent(models.Model):
@@ -25,7 +25,7 @@ class Agent(models.Model):
 
 
 class AgentTracker(Agent):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
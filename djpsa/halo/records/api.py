@@ -21,3 +21,4 @@ from djpsa.halo.records.timesheetevent.api import TimesheetEventAPI
 from djpsa.halo.records.fieldinfo.api import FieldInfoAPI
 from djpsa.halo.records.cannedtext.api import CannedTextAPI
 from djpsa.halo.records.asset.api import AssetAPI
+from djpsa.halo.records.attachment.api import AttachmentAPI
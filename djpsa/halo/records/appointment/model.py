@@ -1,5 +1,5 @@
 from django.db import models
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class Appointment(models.Model):
@@ -53,7 +53,7 @@ class Appointment(models.Model):
 
 
 class AppointmentTracker(Appointment):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
@@ -1,10 +1,9 @@
 from typing import Any, List
-from django.utils import timezone
-from dateutil.parser import parse
 
 from djpsa.halo import models
 from djpsa.halo.records import api
 from djpsa.halo import sync
+from djpsa.sync.mapping import APIField
 
 
 class AppointmentSynchronizer(sync.CreateMixin,
@@ -24,6 +23,20 @@ class AppointmentSynchronizer(sync.CreateMixin,
         'ticket_id': (models.Ticket, 'ticket'),
     }
 
+    # Keys left out are read from Appointment.API_FIELDS.
+    field_mapping = {
+        'id': APIField(),
+        'subject': APIField(),
+        'start_date': APIField(parser=sync.parse_utc_datetime),
+        'end_date': APIField(parser=sync.parse_utc_datetime),
+        'appointment_type': APIField(),
+        'is_private': APIField(),
+        'is_task': APIField(default=False),
+        'complete_status': APIField(),
+        'colour': APIField(),
+        'online_meeting_url': APIField(),
+    }
+
     def __init__(
             self,
             full: bool = False,
@@ -36,10 +49,14 @@ class AppointmentSynchronizer(sync.CreateMixin,
             'hidecompleted': True,
         })
 
-    def update(self, record, data, *args, **kwargs):
+    def update(self, record, data, force=False, *args, **kwargs):
+        if not force:
+            (record, data), = self._get_changed_data([(record, data)])
+            if not data:
+                return record
+
         previous_pk = record.pk
-        data = self._convert_fields(data)
-        body = self._convert_fields_to_api_format(data)
+        body = self._get_update_body(record, data)
 
         response = self.client.update(record.id, body)
         new_pk = response.get(self.lookup_key)
@@ -49,26 +66,17 @@ class AppointmentSynchronizer(sync.CreateMixin,
         instance, _ = self.update_or_create_instance(response)
         return instance
 
-    def _assign_field_data(self, instance, json_data):
-        instance.id = json_data.get('id')
-        instance.subject = json_data.get('subject')
-        start_date = json_data.get('start_date')
-        instance.start_date = timezone.make_aware(
-            parse(start_date), timezone.utc
-        ) if start_date else None
-
-        end_date = json_data.get('end_date')
-        instance.end_date = timezone.make_aware(
-            parse(end_date), timezone.utc
-        ) if end_date else None
-        instance.appointment_type = json_data.get('appointment_type_name')
-        instance.is_private = json_data.get('is_private')
-        instance.is_task = json_data.get('is_task', False)
-        instance.complete_status = json_data.get('complete_status')
-        instance.colour = json_data.get('colour')
-        instance.online_meeting_url = json_data.get('online_meeting_url')
+    def update_each(self, changes, force=False, *args, **kwargs):
+        results = super().update_each(changes, force, *args, **kwargs)
 
-        self.set_relations(instance, json_data)
+        # Halo can give an updated appointment a new ID.
+        replaced_pks = [
+            record.pk for record, instance in results
+            if instance is not None and instance.pk != record.pk
+        ]
+        if replaced_pks:
+            self.model_class.objects.filter(pk__in=replaced_pks).delete()
+        return results
 
     def delete_entry(self, appointment_id: int):
         self.delete(appointment_id)
@@ -9,8 +9,4 @@ class AssetAPI(HaloAPIClient):
         if include_details:
             params['includedetails'] = 'true'
 
-        return self.request(
-            'GET',
-            endpoint_url=self._format_endpoint(record_id),
-            params=params,
-        )
+        return self.get_record(record_id, params=params)
@@ -0,0 +1,53 @@
+from django.db import models
+from djpsa.sync.tracker import DigestFieldTracker
+
+
+class Asset(models.Model):
+    inventory_number = models.CharField(
+        max_length=255, blank=True, default='')
+    key_field = models.CharField(max_length=255, blank=True, default='')
+    key_field2 = models.CharField(max_length=255, blank=True, default='')
+    key_field3 = models.CharField(max_length=255, blank=True, default='')
+    asset_type_name = models.CharField(
+        max_length=255, blank=True, default='')
+    username = models.CharField(max_length=255, blank=True, default='')
+    inactive = models.BooleanField(default=False)
+    client = models.ForeignKey(
+        'Client', blank=True, null=True, on_delete=models.CASCADE)
+    site = models.ForeignKey(
+        'Site', blank=True, null=True, on_delete=models.CASCADE)
+
+    # The asset as returned by Halo, for consumers of the fields not
+    # stored above.
+    data = models.JSONField(default=dict, blank=True)
+
+    tickets = models.ManyToManyField(
+        'Ticket', through='TicketAsset', related_name='assets')
+
+    class Meta:
+        verbose_name_plural = 'Assets'
+
+    def __str__(self):
+        return self.key_field or self.inventory_number or \
+            f'Asset {self.pk}'
+
+
+class AssetTracker(Asset):
+    tracker = DigestFieldTracker()
+
+    class Meta:
+        proxy = True
+        db_table = 'halo_asset'
+
+
+class TicketAsset(models.Model):
+    ticket = models.ForeignKey('Ticket', on_delete=models.CASCADE)
+    asset = models.ForeignKey('Asset', on_delete=models.CASCADE)
+    inventory_number = models.CharField(
+        max_length=255, blank=True, default='')
+
+    class Meta:
+        unique_together = ('ticket', 'asset')
+
+    def __str__(self):
+        return f'Ticket {self.ticket_id} asset {self.asset_id}'
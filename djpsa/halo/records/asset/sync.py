@@ -1,17 +1,65 @@
+import copy
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, List
 
-from djpsa.halo.records.asset.api import AssetAPI
+from django.db import transaction
+from django.db.models import Q
 
+from djpsa.api.cache import TTLCache, SingleFlight
+from djpsa.halo import models
+from djpsa.halo.records import api
+from djpsa.halo import sync
 
-class AssetSynchronizer:
-    client_class = AssetAPI
+logger = logging.getLogger(__name__)
+
+# Asset details shared by every synchronizer in the process, so pickers
+# opened in quick succession, or at once, fetch each asset only once. Keyed
+# by (resource_server, asset_id), every caller gets its own copy.
+_detail_cache = TTLCache()
+_detail_flight = SingleFlight(copy_result=copy.deepcopy)
+
+
+class AssetSynchronizer(sync.ResponseKeyMixin,
+                        sync.HaloSynchronizer,
+                        ):
+    """
+    Sync assets into the Asset model, and the assets of tickets into
+    TicketAsset from the 'assets' of ticket records.
+
+    Halo can't list assets changed since a given time, so every sync pages
+    through all of them, but only changed assets are written.
+    """
+    response_key = 'assets'
+    model_class = models.AssetTracker
+    client_class = api.AssetAPI
+
+    related_meta = {
+        'client_id': (models.Client, 'client'),
+        'site_id': (models.Site, 'site'),
+    }
 
     def __init__(self,
                  full: bool = False,
                  conditions: List = None,
                  *args: Any,
                  **kwargs: Any):
-        self.client = self.client_class(conditions or [])
+        super().__init__(full, conditions, *args, **kwargs)
+        self.client.add_condition({
+            'includechildren': True,
+        })
+
+    def _assign_field_data(self, instance, json_data):
+        instance.id = json_data.get('id')
+        instance.inventory_number = json_data.get('inventory_number') or ''
+        instance.key_field = json_data.get('key_field') or ''
+        instance.key_field2 = json_data.get('key_field2') or ''
+        instance.key_field3 = json_data.get('key_field3') or ''
+        instance.asset_type_name = json_data.get('assettype_name') or ''
+        instance.username = json_data.get('username') or ''
+        instance.inactive = bool(json_data.get('inactive'))
+        instance.data = json_data
+        self.set_relations(instance, json_data)
 
     def fetch_by_id(self, asset_id, include_details=True):
         return self.client.get(
@@ -19,6 +67,55 @@ class AssetSynchronizer:
             include_details=include_details,
         )
 
+    def _detail_key(self, asset_id):
+        return self.client.resource_server, asset_id
+
+    def _load_details(self, asset_id):
+        key = self._detail_key(asset_id)
+        detail = _detail_cache.get(key)
+        if detail is None:
+            detail = self.fetch_by_id(asset_id, include_details=True)
+            _detail_cache.set(key, detail,
+                              self.sync_settings['asset_detail_cache_ttl'])
+        return copy.deepcopy(detail)
+
+    def fetch_details(self, asset_ids):
+        """
+        Return a dict of asset ID to the asset's details from Halo. Assets
+        not cached are fetched asset_detail_workers at a time, sharing any
+        fetch already in flight for the same asset. Assets that fail to
+        fetch are left out.
+        """
+        details = {}
+        missing = []
+        for asset_id in dict.fromkeys(asset_ids):
+            detail = _detail_cache.get(self._detail_key(asset_id))
+            if detail is None:
+                missing.append(asset_id)
+            else:
+                details[asset_id] = copy.deepcopy(detail)
+
+        if not missing:
+            return details
+
+        workers = min(len(missing), self.sync_settings['asset_detail_workers'])
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                asset_id: executor.submit(
+                    _detail_flight.do, self._detail_key(asset_id),
+                    self._load_details, asset_id)
+                for asset_id in missing
+            }
+
+        for asset_id, future in futures.items():
+            try:
+                details[asset_id] = future.result()
+            except Exception as e:
+                # Only this asset is left out, whatever went wrong.
+                logger.warning('Failed to fetch details of asset {}: '
+                               '{}'.format(asset_id, e))
+        return details
+
     def fetch_assets(
             self,
             client_id=None,
@@ -42,3 +139,86 @@ class AssetSynchronizer:
 
         response = self.client.fetch_resource(params=params)
         return response.get('assets', [])
+
+    def get_stored_assets(self, client_id=None, username=None, search=None,
+                          page=1, page_size=50):
+        """
+        Return a page of stored assets as Halo records, like
+        fetch_assets, but from the database.
+        """
+        assets = self.model_class.objects.all()
+        if client_id:
+            assets = assets.filter(client_id=client_id)
+        if username:
+            assets = assets.filter(username=username)
+        if search:
+            assets = assets.filter(
+                Q(inventory_number__icontains=search) |
+                Q(key_field__icontains=search) |
+                Q(key_field2__icontains=search) |
+                Q(key_field3__icontains=search)
+            )
+        start = (page - 1) * page_size
+        return list(
+            assets.order_by('pk')
+            .values_list('data', flat=True)[start:start + page_size]
+        )
+
+    def set_ticket_assets(self, ticket_id, assets):
+        """
+        Store the ticket's assets from the 'assets' of a ticket record.
+        Assets not stored yet are created from the summary in the ticket,
+        the next asset sync fills in the rest.
+        """
+        by_id = {
+            asset['id']: asset for asset in assets if asset.get('id')
+        }
+        known_ids = set(
+            self.model_class.objects.filter(pk__in=by_id)
+            .values_list('pk', flat=True)
+        )
+
+        # The ticket may not be stored, i.e. when it fails validation.
+        ticket_stored = models.Ticket.objects.filter(pk=ticket_id).exists()
+
+        with transaction.atomic():
+            new_assets = []
+            for asset_id, asset in by_id.items():
+                if asset_id in known_ids:
+                    continue
+                instance = self.model_class()
+                self._assign_field_data(instance, asset)
+                new_assets.append(instance)
+            self.model_class.objects.bulk_create(
+                new_assets, ignore_conflicts=True)
+            if not ticket_stored:
+                return
+
+            links = models.TicketAsset.objects.filter(ticket_id=ticket_id)
+            existing = dict(links.values_list('asset_id', 'inventory_number'))
+            links.exclude(asset_id__in=by_id).delete()
+
+            new_links = []
+            for asset_id, asset in by_id.items():
+                inventory_number = asset.get('inventory_number') or ''
+                if asset_id not in existing:
+                    new_links.append(models.TicketAsset(
+                        ticket_id=ticket_id,
+                        asset_id=asset_id,
+                        inventory_number=inventory_number,
+                    ))
+                elif existing[asset_id] != inventory_number:
+                    links.filter(asset_id=asset_id).update(
+                        inventory_number=inventory_number)
+            models.TicketAsset.objects.bulk_create(
+                new_links, ignore_conflicts=True)
+
+            models.Ticket.objects.filter(pk=ticket_id) \
+                .update(assets_synced=True)
+
+    def get_stored_assets_by_id(self, asset_ids):
+        """Return a dict of asset ID to stored Halo record."""
+        return dict(
+            self.model_class.objects.filter(pk__in=asset_ids)
+            .values_list('pk', 'data')
+        )
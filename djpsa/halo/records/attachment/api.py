@@ -1,11 +1,80 @@
 import base64
+import io
+import json
+import logging
 import os
+import uuid
 
 import requests
 
+from djpsa.api import exceptions as exc
 from djpsa.halo.api import HaloAPIClient
 
+logger = logging.getLogger(__name__)
+
 FILE_UMASK = 0o022
+# Bytes read and written at a time, so memory use stays flat no matter the
+# size of the attachment. A multiple of 3, so base64 chunks need no padding.
+STREAM_CHUNK_SIZE = 3 * 64 * 1024
+PARTIAL_SUFFIX = '.part'
+
+
+class Base64JSONBody:
+    """
+    A request body for uploading a file as a base64 data URI inside a JSON
+    document, encoded a chunk at a time as it is sent.
+
+    The body can be iterated more than once, i.e. when the request is
+    retried after a token refresh, as long as the file is seekable.
+    """
+
+    def __init__(self, document, field, content_type, fileobj):
+        self.fileobj = fileobj
+        self.start = fileobj.tell() if fileobj.seekable() else None
+        # Render the document around a placeholder, then stream the file
+        # where the placeholder was.
+        placeholder = uuid.uuid4().hex
+        document[field] = placeholder
+        rendered = json.dumps([document])
+        head, tail = rendered.split(placeholder, 1)
+        self.head = (
+            head + 'data:{};base64,'.format(json.dumps(content_type)[1:-1])
+        ).encode('utf-8')
+        self.tail = tail.encode('utf-8')
+
+    def _file_size(self):
+        if self.start is None:
+            return None
+        current = self.fileobj.tell()
+        end = self.fileobj.seek(0, io.SEEK_END)
+        self.fileobj.seek(current)
+        return end - self.start
+
+    def __len__(self):
+        size = self._file_size()
+        if size is None:
+            # Unknown, requests falls back to a chunked upload.
+            return 0
+        encoded = (size + 2) // 3 * 4
+        return len(self.head) + encoded + len(self.tail)
+
+    def __iter__(self):
+        if self.start is not None:
+            self.fileobj.seek(self.start)
+        yield self.head
+        while True:
+            chunk = self.fileobj.read(STREAM_CHUNK_SIZE)
+            # Reads can come up short, carry the remainder over so only the
+            # last chunk is padded.
+            while chunk and len(chunk) % 3:
+                more = self.fileobj.read(3 - len(chunk) % 3)
+                if not more:
+                    break
+                chunk += more
+            if not chunk:
+                break
+            yield base64.b64encode(chunk)
+        yield self.tail
 
 
 class AttachmentAPI(HaloAPIClient):
@@ -16,39 +85,119 @@ class AttachmentAPI(HaloAPIClient):
 
     def upload(self, ticket_id, filename, content_type, file_content):
         """
-        Upload an attachment to a ticket.
+        Upload an attachment to a ticket. The content is base64 encoded
+        as it is sent, rather than all at once in memory.
 
         Args:
             ticket_id: The ticket ID to attach to
             filename: The filename
             content_type: The MIME type (e.g. 'text/plain', 'image/png')
-            file_content: The file content as bytes
+            file_content: The file content as bytes, or a file object
+                opened in binary mode
 
         Returns:
             The API response
         """
-        base64_content = base64.b64encode(file_content).decode('utf-8')
-        data_uri = f'data:{content_type};base64,{base64_content}'
+        if isinstance(file_content, (bytes, bytearray, memoryview)):
+            file_content = io.BytesIO(file_content)
 
-        return self.request('POST', body=[{
+        body = Base64JSONBody({
             'ticket_id': ticket_id,
             'filename': filename,
-            'data_base64': data_uri,
-        }])
+        }, 'data_base64', content_type, file_content)
 
-    def download_from_url(self, url, attachment_id, path):
+        return self.request(
+            'POST',
+            data=body,
+            headers={'Content-Type': 'application/json'},
+        )
+
+    def iter_content(self, attachment_id):
         """
-        Download attachment from CDN URL and save to disk.
+        Stream an attachment's content from the API. Yield it in chunks.
+
+        The response is read from the session directly, not through
+        request(), which decodes a JSON body, or one without a Content-Type,
+        and so would read the whole attachment into memory.
         """
-        response = requests.get(url)
-        response.raise_for_status()
+        try:
+            response = self._request(
+                'GET',
+                self._format_endpoint(attachment_id),
+                headers=self._get_headers(),
+                params=self._format_params(),
+                stream=True,
+            )
+        except requests.RequestException as e:
+            raise exc.APIError('{}'.format(e))
 
+        try:
+            if response.status_code == 404:
+                msg = 'Resource not found: {}'.format(response.url)
+                logger.warning(msg)
+                raise exc.RecordNotFoundError(msg)
+            elif not 200 <= response.status_code < 300:
+                error_message = self._prepare_error_response(response)
+                self._log_failed(response, error_message)
+                raise exc.APIError(error_message)
+
+            yield from response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+        finally:
+            response.close()
+
+    def download_from_url(self, url, attachment_id, path):
+        """
+        Download attachment from CDN URL and save to disk, a chunk at a
+        time.
+
+        The file is written to a .part file first and renamed once complete.
+        If a .part file is left over from an interrupted download, the rest
+        of the file is requested from where it stopped, if the server
+        supports range requests. Interrupted transfers are resumed up to
+        max_attempts times.
+        """
         saved_filename = str(attachment_id)
         file_path = os.path.join(path, saved_filename)
+        partial_path = file_path + PARTIAL_SUFFIX
+        max_attempts = self.request_settings['max_attempts']
 
-        previous_umask = os.umask(FILE_UMASK)
-        with open(file_path, 'wb') as f:
-            f.write(response.content)
-        os.umask(previous_umask)
+        for attempt in range(1, max_attempts + 1):
+            try:
+                self._download_to(url, partial_path)
+                break
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == max_attempts:
+                    raise
+                logger.info(
+                    'Download of attachment {} interrupted, resuming: '
+                    '{}'.format(attachment_id, e))
 
+        os.replace(partial_path, file_path)
         return saved_filename
+
+    def _download_to(self, url, partial_path):
+        offset = os.path.getsize(partial_path) \
+            if os.path.exists(partial_path) else 0
+        headers = {'Range': 'bytes={}-'.format(offset)} if offset else {}
+        http = self.session or requests
+
+        with http.get(url, headers=headers, stream=True,
+                      timeout=self.request_settings['timeout']) as response:
+            if offset and response.status_code == 416:
+                # Nothing left past the offset, the file is complete.
+                return
+            response.raise_for_status()
+
+            # Without a 206 the server ignored the range and sent the whole
+            # file, so start again.
+            mode = 'ab' if offset and response.status_code == 206 else 'wb'
+
+            previous_umask = os.umask(FILE_UMASK)
+            try:
+                with open(partial_path, mode) as f:
+                    for chunk in response.iter_content(
+                            chunk_size=STREAM_CHUNK_SIZE):
+                        f.write(chunk)
+            finally:
+                os.umask(previous_umask)
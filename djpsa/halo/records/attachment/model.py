@@ -0,0 +1,36 @@
+from django.db import models
+from djpsa.sync.tracker import DigestFieldTracker
+
+
+class Attachment(models.Model):
+    filename = models.CharField(max_length=255, blank=True, default='')
+    file_size = models.BigIntegerField(blank=True, null=True)
+    is_image = models.BooleanField(default=False)
+    date_created = models.DateTimeField(blank=True, null=True)
+    note = models.TextField(blank=True, default='')
+
+    ticket = models.ForeignKey(
+        'Ticket',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='attachments'
+    )
+
+    # SHA-256 of the content, once it has been downloaded to the blob
+    # store. Not from Halo.
+    blob_digest = models.CharField(max_length=64, blank=True, default='')
+
+    class Meta:
+        verbose_name_plural = 'Attachments'
+
+    def __str__(self):
+        return self.filename or f'Attachment {self.pk}'
+
+
+class AttachmentTracker(Attachment):
+    tracker = DigestFieldTracker()
+
+    class Meta:
+        proxy = True
+        db_table = 'halo_attachment'
@@ -0,0 +1,72 @@
+from django.http import FileResponse
+
+from djpsa.halo import models
+from djpsa.halo.records import api
+from djpsa.halo import sync
+from djpsa.sync.blobstore import get_blob_store
+
+
+class AttachmentSynchronizer(sync.ResponseKeyMixin,
+                             sync.HaloChildFetchRecordsMixin,
+                             sync.HaloSynchronizer,
+                             ):
+    """
+    Sync the attachment listings of tickets. The content is only downloaded
+    when first opened, into the shared blob store, and read from disk after
+    that.
+    """
+    model_class = models.AttachmentTracker
+    client_class = api.AttachmentAPI
+    response_key = 'attachments'
+    parent_field = 'ticket_id'
+    parent_model_class = models.Ticket
+    # Adding an attachment updates the ticket.
+    parent_changed_field = 'modified'
+
+    related_meta = {
+        'ticket_id': (models.Ticket, 'ticket'),
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.blob_store = get_blob_store()
+
+    def _assign_field_data(self, instance, json_data):
+        instance.id = json_data.get('id')
+        instance.filename = json_data.get('filename') or ''
+        instance.file_size = json_data.get('filesize')
+        instance.is_image = bool(json_data.get('isimage'))
+        instance.date_created = \
+            sync.empty_date_parser(json_data.get('datecreated'))
+        instance.note = json_data.get('note') or ''
+        self.set_relations(instance, json_data)
+
+    def open_blob(self, attachment):
+        """
+        Open the attachment's content for reading, downloading it first if
+        it isn't in the blob store.
+        """
+        if attachment.blob_digest:
+            try:
+                return self.blob_store.open(attachment.blob_digest)
+            except FileNotFoundError:
+                # Evicted, download it again.
+                pass
+
+        digest, _ = self.blob_store.write(
+            self.client.iter_content(attachment.id))
+        attachment.blob_digest = digest
+        self.model_class.objects.filter(pk=attachment.pk) \
+            .update(blob_digest=digest)
+        return self.blob_store.open(digest)
+
+    def file_response(self, attachment, as_attachment=False):
+        """
+        Return a FileResponse for the attachment's content. The server can
+        send the file straight from disk, i.e. with sendfile.
+        """
+        return FileResponse(
+            self.open_blob(attachment),
+            as_attachment=as_attachment,
+            filename=attachment.filename or str(attachment.pk),
+        )
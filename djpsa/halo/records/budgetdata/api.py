@@ -6,5 +6,4 @@ class BudgetDataAPI(api.TicketAPI):
     # budgets off of a ticket
 
     def get(self, record_id):
-        return self.request(
-            'GET', endpoint_url=self._format_endpoint(record_id))
+        return self.get_record(record_id)
@@ -1,5 +1,5 @@
 from django.db import models
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 # This is not a real record in Halo, but created for the purpose
 # of easily storing and processing budget data. Uses the Ticket
@@ -43,7 +43,7 @@ class BudgetData(models.Model):
 
 
 class BudgetDataTracker(BudgetData):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
@@ -17,6 +17,23 @@ class BudgetDataSynchronizer(sync.HaloSynchronizer):
         'budgettype_id': (models.BudgetType, 'budget_type'),
     }
 
+    field_mapping = {
+        'id': 'id',
+        'hours': 'hours',
+        'rate': 'rate',
+        'money': 'money',
+        'estimated_hours': 'estimated_hours',
+        'estimated_money': 'estimated_money',
+        'actual_hours': 'actual_hours',
+        'actual_money': 'actual_money',
+        'scheduled_hours': 'scheduled_hours',
+        'scheduled_value': 'scheduled_value',
+        'toschedule_hours': 'toschedule_hours',
+        'toschedule_value': 'toschedule_value',
+        'remaining_hours': 'remaining_hours',
+        'remaining_value': 'remaining_value',
+    }
+
     def fetch_records(self, results, params=None):
         batch = 1
         for ticket in models.Ticket.objects.all().values_list(
@@ -41,21 +58,3 @@ class BudgetDataSynchronizer(sync.HaloSynchronizer):
             .values_list('id', flat=True)
 
         return object_ids
-
-    def _assign_field_data(self, instance, json_data):
-        instance.id = json_data.get('id')
-        instance.hours = json_data.get('hours')
-        instance.rate = json_data.get('rate')
-        instance.money = json_data.get('money')
-        instance.estimated_hours = json_data.get('estimated_hours')
-        instance.estimated_money = json_data.get('estimated_money')
-        instance.actual_hours = json_data.get('actual_hours')
-        instance.actual_money = json_data.get('actual_money')
-        instance.scheduled_hours = json_data.get('scheduled_hours')
-        instance.scheduled_value = json_data.get('scheduled_value')
-        instance.toschedule_hours = json_data.get('toschedule_hours')
-        instance.toschedule_value = json_data.get('toschedule_value')
-        instance.remaining_hours = json_data.get('remaining_hours')
-        instance.remaining_value = json_data.get('remaining_value')
-
-        self.set_relations(instance, json_data)
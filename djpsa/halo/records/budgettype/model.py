@@ -1,5 +1,5 @@
 from django.db import models
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class BudgetType(models.Model):
@@ -15,7 +15,7 @@ class BudgetType(models.Model):
 
 
 class BudgetTypeTracker(BudgetType):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
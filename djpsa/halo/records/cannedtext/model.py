@@ -1,5 +1,5 @@
 from django.db import models
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class CannedText(models.Model):
@@ -27,7 +27,7 @@ class CannedText(models.Model):
 
 
 class CannedTextTracker(CannedText):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
@@ -1,5 +1,5 @@
 from django.db import models
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class ChargeRate(models.Model):
@@ -13,7 +13,7 @@ class ChargeRate(models.Model):
 
 
 class ChargeRateTracker(ChargeRate):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
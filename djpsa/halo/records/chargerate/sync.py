@@ -7,6 +7,7 @@ class ChargeRateSynchronizer(sync.HaloSynchronizer):
     model_class = models.ChargeRateTracker
     client_class = api.ChargeRateAPI
 
-    def _assign_field_data(self, instance, json_data):
-        instance.id = json_data.get('id')
-        instance.name = json_data.get('name')
+    field_mapping = {
+        'id': 'id',
+        'name': 'name',
+    }
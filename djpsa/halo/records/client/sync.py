@@ -14,6 +14,13 @@ class ClientSynchronizer(sync.ResponseKeyMixin, sync.HaloSynchronizer):
         'main_site_id': (models.Site, 'site'),
     }
 
+    field_mapping = {
+        'id': 'id',
+        'name': 'name',
+        'inactive': 'inactive',
+        'phone_number': 'main_phonenumber',
+    }
+
     def __init__(self,
                  full: bool = False,
                  conditions: List = None,
@@ -24,12 +31,3 @@ class ClientSynchronizer(sync.ResponseKeyMixin, sync.HaloSynchronizer):
         self.client.add_condition({
             'includeactive': True,
         })
-
-    def _assign_field_data(self, instance, json_data):
-
-        instance.id = json_data.get('id')
-        instance.name = json_data.get('name')
-        instance.inactive = json_data.get('inactive')
-        instance.phone_number = json_data.get('main_phonenumber')
-
-        self.set_relations(instance, json_data)
@@ -1,5 +1,5 @@
 from django.db import models
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class HaloUser(models.Model):
@@ -40,7 +40,7 @@ class HaloUser(models.Model):
 
 
 class HaloUserTracker(HaloUser):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
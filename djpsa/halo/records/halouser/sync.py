@@ -1,8 +1,10 @@
+import operator
 from typing import Any, List
 
 from djpsa.halo import models
 from djpsa.halo.records import api
 from djpsa.halo import sync
+from djpsa.sync.mapping import APIField
 
 
 class HaloUserSynchronizer(sync.ResponseKeyMixin, sync.HaloSynchronizer):
@@ -15,6 +17,30 @@ class HaloUserSynchronizer(sync.ResponseKeyMixin, sync.HaloSynchronizer):
         'linked_agent_id': (models.Agent, 'agent'),
     }
 
+    field_mapping = {
+        'id': 'id',
+        'name': 'name',
+        'first_name': 'firstname',
+        'surname': 'surname',
+        'initials': 'initials',
+        'email': 'emailaddress',
+        'colour': 'colour',
+        'active': APIField('inactive', parser=operator.not_, default=True),
+        'login': 'login',
+        'use': 'use',
+        'never_send_emails': APIField('neversendemails', default=False),
+        'phone_number': 'phonenumber',
+        'mobile_number': 'mobilenumber',
+        'mobile_number_2': 'mobilenumber2',
+        'home_number': 'homenumber',
+        'tel_pref': 'telpref',
+        'is_service_account': APIField('isserviceaccount', default=False),
+        'is_important_contact':
+            APIField('isimportantcontact', default=False),
+        'is_important_contact_2':
+            APIField('isimportantcontact2', default=False),
+    }
+
     def __init__(self,
                  full: bool = False,
                  conditions: List = None,
@@ -27,27 +53,7 @@ class HaloUserSynchronizer(sync.ResponseKeyMixin, sync.HaloSynchronizer):
         })
 
     def _assign_field_data(self, instance, json_data):
-        instance.id = json_data.get('id')
-        instance.name = json_data.get('name')
-        instance.first_name = json_data.get('firstname')
-        instance.surname = json_data.get('surname')
-        instance.initials = json_data.get('initials')
-        instance.email = json_data.get('emailaddress')
-        instance.colour = json_data.get('colour')
-        instance.active = not json_data.get('inactive', True)
-        instance.login = json_data.get('login')
-        instance.use = json_data.get('use')
-        instance.never_send_emails = json_data.get('neversendemails', False)
-        instance.phone_number = json_data.get('phonenumber')
-        instance.mobile_number = json_data.get('mobilenumber')
-        instance.mobile_number_2 = json_data.get('mobilenumber2')
-        instance.home_number = json_data.get('homenumber')
-        instance.tel_pref = json_data.get('telpref')
-        instance.is_service_account = json_data.get('isserviceaccount', False)
-        instance.is_important_contact = \
-            json_data.get('isimportantcontact', False)
-        instance.is_important_contact_2 = \
-            json_data.get('isimportantcontact2', False)
+        self._map_fields(instance, json_data)
 
         if json_data.get('linked_agent_id') == 0:
             json_data['linked_agent_id'] = None
@@ -1,5 +1,5 @@
 from django.db import models
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class Outcome(models.Model):
@@ -19,7 +19,7 @@ class Outcome(models.Model):
 
 
 class OutcomeTracker(Outcome):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
@@ -1,5 +1,5 @@
 from django.db import models
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class Priority(models.Model):
@@ -16,7 +16,7 @@ class Priority(models.Model):
 
 
 class PriorityTracker(Priority):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
@@ -9,9 +9,9 @@ class PrioritySynchronizer(sync.HaloSynchronizer):
     lookup_key = 'priorityid'
     client_class = api.PriorityAPI
 
-    def _assign_field_data(self, instance, json_data):
-
-        instance.id = json_data.get('priorityid')
-        instance.name = json_data.get('name')
-        instance.colour = json_data.get('colour')
-        instance.is_hidden = json_data.get('ishidden')
+    field_mapping = {
+        'id': 'priorityid',
+        'name': 'name',
+        'colour': 'colour',
+        'is_hidden': 'ishidden',
+    }
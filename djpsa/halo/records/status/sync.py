@@ -7,6 +7,12 @@ class StatusSynchronizer(sync.HaloSynchronizer):
     model_class = models.StatusTracker
     client_class = api.StatusAPI
 
+    field_mapping = {
+        'id': 'id',
+        'name': 'name',
+        'colour': 'colour',
+    }
+
     def _try_validate(self, api_instance):
         status_type = api_instance.get('type')
 
@@ -14,9 +20,3 @@ class StatusSynchronizer(sync.HaloSynchronizer):
         # are not for ticket. It is worth noting the API has a parameter
         # to filter by type, but it does not work.
         return status_type == 0
-
-    def _assign_field_data(self, instance, json_data):
-
-        instance.id = json_data.get('id')
-        instance.name = json_data.get('name')
-        instance.colour = json_data.get('colour')
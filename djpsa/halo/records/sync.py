@@ -22,6 +22,8 @@ from djpsa.halo.records.chargerate.sync import ChargeRateSynchronizer
 from djpsa.halo.records.timesheetevent.sync import TimeSheetEventSynchronizer
 from djpsa.halo.records.fieldinfo.sync import FieldInfoSynchronizer
 from djpsa.halo.records.cannedtext.sync import CannedTextSynchronizer
+from djpsa.halo.records.attachment.sync import AttachmentSynchronizer
+from djpsa.halo.records.asset.sync import AssetSynchronizer
 
 from djpsa.sync.grades import SyncGrades
 
@@ -54,6 +56,10 @@ class HaloSyncGrades(SyncGrades):
             FieldInfoSynchronizer,
             CannedTextSynchronizer,
         ]
+        self.grades['slow'].synchronizers = [
+            AssetSynchronizer,
+            AttachmentSynchronizer,
+        ]
 
 
 sync_command_list = [
@@ -75,4 +81,6 @@ sync_command_list = [
         ('budget_data', (BudgetDataSynchronizer, _('BudgetData'))),
         ('field_info', (FieldInfoSynchronizer, _('FieldInfo'))),
         ('canned_text', (CannedTextSynchronizer, _('CannedText'))),
+        ('attachment', (AttachmentSynchronizer, _('Attachment'))),
+        ('asset', (AssetSynchronizer, _('Asset'))),
     ]
@@ -3,7 +3,7 @@ from enum import Enum
 from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django_extensions.db.models import TimeStampedModel
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class ItilRequestType(Enum):
@@ -137,6 +137,9 @@ class Ticket(TimeStampedModel):
 
     use = models.CharField(max_length=255, blank=True, null=True)
     udf_data = models.JSONField(default=dict, blank=True)
+    # Set once the ticket's assets have been stored in TicketAsset, so an
+    # empty set of assets can be told apart from an unknown one.
+    assets_synced = models.BooleanField(default=False)
 
     API_FIELDS = {
         "id": "id",
@@ -219,7 +222,7 @@ class Ticket(TimeStampedModel):
 
 
 class TicketTracker(Ticket):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
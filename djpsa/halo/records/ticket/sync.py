@@ -11,8 +11,9 @@ from djpsa.halo.records.action.sync import ActionSynchronizer
 from djpsa.halo.records.appointment.sync import AppointmentSynchronizer
 from djpsa.halo.records.agent.api import UNASSIGNED_AGENT_ID
 from djpsa.halo.records.client.api import UNASSIGNED_CLIENT_ID
-from djpsa.api.exceptions import APIError
 from djpsa.halo.utils import parse_udf
+from djpsa.sync.lookup import lookups
+from djpsa.sync.mapping import APIField
 from djpsa.halo.records.ticket.model import ItilRequestType
 from djpsa.utils import get_djpsa_settings
 
@@ -27,6 +28,9 @@ class TicketSynchronizer(sync.ResponseKeyMixin,
     model_class = models.TicketTracker
     client_class = api.TicketAPI
     last_updated_field = 'lastupdatefromdate'
+    # Halo API has different keys for last update depending on if it's
+    # a GET or POST request. This API is going to be the death of me.
+    last_update_keys = ('lastupdate', 'last_update')
 
     related_meta = {
         'client_id': (models.Client, 'client'),
@@ -40,6 +44,64 @@ class TicketSynchronizer(sync.ResponseKeyMixin,
         'parent_id': (models.Ticket, 'project'),
     }
 
+    # Halo API has different keys for some fields depending on if it's
+    # a GET or POST request, those list both keys. Keys left out are read
+    # from Ticket.API_FIELDS.
+    field_mapping = {
+        'id': APIField(),
+        'summary': APIField(),
+        'details': APIField(),
+        'user_email': APIField(keep_existing=True),
+        'reported_by': APIField(keep_existing=True),
+        'end_user_status': APIField(),
+        'category_1': APIField(('category1', 'category_1')),
+        'category_2': APIField(('category2', 'category_2')),
+        'category_3': APIField(('category3', 'category_3')),
+        'category_4': APIField(('category4', 'category_4')),
+        'inactive': APIField(default=False),
+        'sla_response_state':
+            APIField('sla_response_state', keep_existing=True),
+        'sla_hold_time': APIField('sla_hold_time', keep_existing=True),
+        'impact': APIField(),
+        'flagged': APIField(default=False),
+        'on_hold': APIField(default=False),
+        'project_time_actual':
+            APIField('projecttimeactual', keep_existing=True),
+        'project_money_actual':
+            APIField('projectmoneyactual', keep_existing=True),
+        'cost': APIField(),
+        'estimate': APIField(),
+        'estimated_days': APIField(),
+        'exclude_from_slas': APIField('excludefromslas', default=False),
+        'reviewed': APIField('reviewed', default=False),
+        'read': APIField(default=False),
+        'use': APIField(keep_existing=True),
+        'email_to_list': APIField(keep_existing=True),
+        'urgency': APIField(keep_existing=True),
+        'service_status_note': APIField(),
+        'ticket_tags': APIField(keep_existing=True),
+        'appointment_type': APIField(),
+        'impact_level': APIField(),
+        'itil_request_type': APIField(),
+        'date_occurred': APIField(
+            'dateoccurred', parser=sync.empty_date_parser, skip_empty=True),
+        'respond_by_date': APIField(
+            'respondbydate', parser=sync.empty_date_parser, skip_empty=True),
+        'fix_by_date':
+            APIField(parser=sync.empty_date_parser, skip_empty=True),
+        'date_assigned': APIField(
+            'dateassigned', parser=sync.empty_date_parser, skip_empty=True),
+        'response_date': APIField(
+            'responsedate', parser=sync.empty_date_parser, skip_empty=True),
+        'deadline_date':
+            APIField(parser=sync.empty_date_parser, skip_empty=True),
+        'date_closed':
+            APIField(parser=sync.empty_date_parser, skip_empty=True),
+        'last_incoming_email_date': APIField(
+            'lastincomingemaildate', parser=sync.empty_date_parser,
+            skip_empty=True),
+    }
+
     def __init__(self,
                  full: bool = False,
                  conditions: List = None,
@@ -50,6 +112,7 @@ class TicketSynchronizer(sync.ResponseKeyMixin,
         # Set during the closed-project-tasks pass in _post_sync_operations
         # so _try_validate keeps a project's closed tasks regardless of age.
         self._syncing_all_closed_tasks = False
+        self._asset_synchronizer = None
 
         self.client.add_condition({
             'open_only': True,
@@ -66,9 +129,7 @@ class TicketSynchronizer(sync.ResponseKeyMixin,
             })
 
     def _assign_field_data(self, instance, json_data):
-        instance.id = json_data.get('id')
-        instance.summary = json_data.get('summary')
-        instance.details = json_data.get('details')
+        self._map_fields(instance, json_data)
 
         try:
             instance.last_action_date = timezone.make_aware(
@@ -76,86 +137,9 @@ class TicketSynchronizer(sync.ResponseKeyMixin,
         except ValueError:
             instance.last_action_date = parse(json_data.get('lastactiondate'))
 
-        # Halo API has different keys for last update depending on if it's
-        # a GET or POST request. This API is going to be the death of me.
-        last_update = \
-            json_data.get('lastupdate') or json_data.get('last_update')
-
+        last_update = self.get_payload_last_update(json_data)
         if last_update:
-            try:
-                instance.last_update = timezone.make_aware(
-                    parse(last_update), timezone.utc)
-            except ValueError:
-                instance.last_update = parse(last_update)
-
-        instance.user_email = json_data.get('useremail', instance.user_email)
-        instance.reported_by = \
-            json_data.get('reportedby', instance.reported_by)
-        instance.end_user_status = json_data.get('enduserstatus')
-        instance.category_1 = \
-            json_data.get('category1') or json_data.get('category_1')
-        instance.category_2 = \
-            json_data.get('category2') or json_data.get('category_2')
-        instance.category_3 = \
-            json_data.get('category3') or json_data.get('category_3')
-        instance.category_4 = \
-            json_data.get('category4') or json_data.get('category_4')
-        instance.inactive = json_data.get('inactive', False)
-        instance.sla_response_state = json_data.get(
-            'sla_response_state', instance.sla_response_state)
-        instance.sla_hold_time = json_data.get('sla_hold_time',
-                                               instance.sla_hold_time)
-        instance.impact = json_data.get('impact')
-        instance.flagged = json_data.get('flagged', False)
-        instance.on_hold = json_data.get('onhold', False)
-        instance.project_time_actual = \
-            json_data.get('projecttimeactual', instance.project_time_actual)
-        instance.project_money_actual = \
-            json_data.get('projectmoneyactual', instance.project_money_actual)
-        instance.cost = json_data.get('cost')
-        instance.estimate = json_data.get('estimate')
-        instance.estimated_days = json_data.get('estimateddays')
-        instance.exclude_from_slas = json_data.get('excludefromslas', False)
-        instance.reviewed = json_data.get('reviewed', False)
-        instance.read = json_data.get('read', False)
-        instance.use = json_data.get('use', instance.use)
-        instance.email_to_list = \
-            json_data.get('emailtolist', instance.email_to_list)
-        instance.urgency = json_data.get('urgency', instance.urgency)
-        instance.service_status_note = json_data.get('servicestatusnote')
-        instance.ticket_tags = \
-            json_data.get('tickettags', instance.ticket_tags)
-        instance.appointment_type = json_data.get('appointment_type')
-        instance.impact_level = json_data.get('impactlevel')
-        instance.itil_request_type = json_data.get('itil_requesttype_id')
-
-        date_occurred = json_data.get('dateoccurred')
-        if date_occurred:
-            instance.date_occurred = sync.empty_date_parser(date_occurred)
-
-        respond_by_date = json_data.get('respondbydate')
-        if respond_by_date:
-            instance.respond_by_date = sync.empty_date_parser(respond_by_date)
-
-        fix_by_date = json_data.get('fixbydate')
-        if fix_by_date:
-            instance.fix_by_date = sync.empty_date_parser(fix_by_date)
-
-        date_assigned = json_data.get('dateassigned')
-        if date_assigned:
-            instance.date_assigned = sync.empty_date_parser(date_assigned)
-
-        response_date = json_data.get('responsedate')
-        if response_date:
-            instance.response_date = sync.empty_date_parser(response_date)
-
-        deadline_date = json_data.get('deadlinedate')
-        if deadline_date:
-            instance.deadline_date = sync.empty_date_parser(deadline_date)
-
-        date_closed = json_data.get('dateclosed')
-        if date_closed:
-            instance.date_closed = sync.empty_date_parser(date_closed)
+            instance.last_update = last_update
 
         start_date = json_data.get('startdate')
         if start_date:
@@ -169,14 +153,9 @@ class TicketSynchronizer(sync.ResponseKeyMixin,
             if parsed_target_date:
                 instance.target_date = parsed_target_date
 
-        last_incoming_email_date = json_data.get('lastincomingemaildate')
-        if last_incoming_email_date:
-            instance.last_incoming_email_date = \
-                sync.empty_date_parser(last_incoming_email_date)
-
         team_name = json_data.get('team')
 
-        instance.team = models.Team.objects.filter(name=team_name).first()
+        instance.team = lookups.get(models.Team).get_by_name(team_name)
 
         custom_fields = json_data.get('customfields', [])
         instance.udf_data = parse_udf(custom_fields)
@@ -187,6 +166,12 @@ class TicketSynchronizer(sync.ResponseKeyMixin,
         if instance.client_id == UNASSIGNED_CLIENT_ID:
             instance.client = None
 
+    def _parse_last_update(self, value):
+        try:
+            return timezone.make_aware(parse(value), timezone.utc)
+        except ValueError:
+            return parse(value)
+
     def _post_sync_operations(self, results):
         if self.full:
             # Perform second sync for tickets that were closed
@@ -318,124 +303,126 @@ class TicketSynchronizer(sync.ResponseKeyMixin,
 
         return data
 
-    def fetch_ticket_assets(self, ticket_id):
-        response = self.client.request(
-            'GET',
-            endpoint_url=self.client._format_endpoint(ticket_id),
-        )
+    @property
+    def asset_synchronizer(self):
+        if self._asset_synchronizer is None:
+            self._asset_synchronizer = AssetSynchronizer()
+        return self._asset_synchronizer
+
+    def update_or_create_instance(self, api_instance):
+        instance, result = super().update_or_create_instance(api_instance)
+        self._set_ticket_assets(api_instance)
+        return instance, result
+
+    def bulk_update_or_create_instances(self, api_instances):
+        api_instances = list(api_instances)
+        results = super().bulk_update_or_create_instances(api_instances)
+        saved_ids = {instance.pk for instance, _ in results}
+        for api_instance in api_instances:
+            if api_instance[self.lookup_key] in saved_ids:
+                self._set_ticket_assets(api_instance)
+        return results
 
+    def _set_ticket_assets(self, api_instance):
+        # Only single ticket records, such as callbacks, have the assets.
+        assets = api_instance.get('assets')
+        if assets is not None:
+            self.asset_synchronizer.set_ticket_assets(
+                api_instance[self.lookup_key], assets)
+
+    def _get_ticket_asset_refs(self, ticket_id, fresh=False):
+        """
+        Return the ticket's assets as dicts of id and inventory_number. They
+        are read from the database once stored from a ticket record,
+        otherwise, or if fresh is set, fetched from Halo and stored. Return
+        None if the ticket can't be fetched.
+        """
+        if not fresh and models.Ticket.objects.filter(
+                pk=ticket_id, assets_synced=True).exists():
+            return [
+                {'id': asset_id, 'inventory_number': inventory_number}
+                for asset_id, inventory_number in
+                models.TicketAsset.objects.filter(ticket_id=ticket_id)
+                .order_by('pk')
+                .values_list('asset_id', 'inventory_number')
+            ]
+
+        response = self.client.get_record(ticket_id, cached=not fresh)
         if not isinstance(response, dict):
-            return []
+            return None
 
-        detailed_assets = []
-        asset_synchronizer = AssetSynchronizer()
-        for asset in response.get('assets', []):
-            asset_id = asset.get('id')
+        self._set_ticket_assets(response)
+        return [
+            {
+                'id': item.get('id'),
+                'inventory_number': item.get('inventory_number', ''),
+            }
+            for item in response.get('assets', [])
+            if item.get('id')
+        ]
 
-            try:
-                asset_response = asset_synchronizer.fetch_by_id(
-                    asset_id=asset_id,
-                    include_details=True,
-                )
-            except APIError:
-                detailed_assets.append(asset)
-                continue
+    def _with_details(self, assets):
+        details = self.asset_synchronizer.fetch_details(
+            [asset['id'] for asset in assets if asset.get('id')])
+        return [details.get(asset.get('id'), asset) for asset in assets]
 
-            detailed_assets.append(asset_response)
+    def fetch_ticket_assets(self, ticket_id, include_details=True):
+        refs = self._get_ticket_asset_refs(ticket_id)
+        if not refs:
+            return []
 
-        return detailed_assets
+        stored = self.asset_synchronizer.get_stored_assets_by_id(
+            [ref['id'] for ref in refs])
+        assets = [stored.get(ref['id'], ref) for ref in refs]
+        if include_details:
+            assets = self._with_details(assets)
+        return assets
 
     def fetch_ticket_asset_ids(self, ticket_id):
-        response = self.client.request(
-            'GET',
-            endpoint_url=self.client._format_endpoint(ticket_id),
-        )
-        if not isinstance(response, dict):
-            return set()
-
         return {
-            asset.get('id')
-            for asset in response.get('assets', [])
-            if asset.get('id')
+            ref['id'] for ref in self._get_ticket_asset_refs(ticket_id) or []
         }
 
     def fetch_available_assets(self, ticket, username=None, search=None,
-                               page=1, page_size=50):
-        asset_synchronizer = AssetSynchronizer()
-        assets = asset_synchronizer.fetch_assets(
+                               page=1, page_size=50, include_details=True):
+        assets = self.asset_synchronizer.get_stored_assets(
             client_id=ticket.client_id,
             username=username,
             search=search,
             page=page,
             page_size=page_size,
         )
+        if include_details:
+            assets = self._with_details(assets)
+        return assets
 
-        detailed_assets = []
-        for asset in assets:
-            asset_id = asset.get('id')
-            if not asset_id:
-                detailed_assets.append(asset)
-                continue
-            try:
-                detailed_assets.append(
-                    asset_synchronizer.fetch_by_id(
-                        asset_id=asset_id,
-                        include_details=True,
-                    )
-                )
-            except APIError:
-                detailed_assets.append(asset)
-        return detailed_assets
-
-    def attach_ticket_asset(self, ticket_id, asset_id, inventory_number=''):
-        response = self.client.request(
-            'GET',
-            endpoint_url=self.client._format_endpoint(ticket_id),
+    def _update_ticket_assets(self, ticket_id, assets):
+        self.client.update(
+            record_id=ticket_id,
+            data={'assets': assets},
         )
+        self.asset_synchronizer.set_ticket_assets(ticket_id, assets)
 
-        existing_assets = response.get('assets', [])
-
-        by_id = {}
-        for item in existing_assets:
-            item_id = item.get('id')
-            if not item_id:
-                continue
-
-            by_id[item_id] = {
-                'id': item_id,
-                'inventory_number': item.get('inventory_number', ''),
-            }
-
-        if asset_id not in by_id:
-            by_id[asset_id] = {
-                'id': asset_id,
-                'inventory_number': inventory_number,
-            }
-        else:
+    # Attaching and detaching send the whole list back, so they start from
+    # Halo's current list rather than the stored one, which only changes
+    # when a single ticket record arrives.
+    def attach_ticket_asset(self, ticket_id, asset_id, inventory_number=''):
+        existing_assets = self._get_ticket_asset_refs(ticket_id, fresh=True)
+        if existing_assets is None or \
+                any(item['id'] == asset_id for item in existing_assets):
             return
 
-        self.client.update(
-            record_id=ticket_id,
-            data={'assets': list(by_id.values())},
-        )
+        existing_assets.append({
+            'id': asset_id,
+            'inventory_number': inventory_number,
+        })
+        self._update_ticket_assets(ticket_id, existing_assets)
 
     def detach_ticket_asset(self, ticket_id, asset_id):
-        response = self.client.request(
-            'GET',
-            endpoint_url=self.client._format_endpoint(ticket_id),
-        )
-
-        existing_assets = response.get('assets', [])
-        filtered_assets = [
-            {
-                'id': item.get('id'),
-                'inventory_number': item.get('inventory_number', ''),
-            }
-            for item in existing_assets
-            if item.get('id') and item.get('id') != asset_id
-        ]
+        existing_assets = self._get_ticket_asset_refs(ticket_id, fresh=True)
+        if existing_assets is None:
+            return
 
-        self.client.update(
-            record_id=ticket_id,
-            data={'assets': filtered_assets},
-        )
+        self._update_ticket_assets(ticket_id, [
+            item for item in existing_assets if item['id'] != asset_id
+        ])
@@ -1,5 +1,5 @@
 from django.db import models
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class TicketType(models.Model):
@@ -17,7 +17,7 @@ class TicketType(models.Model):
 
 
 class TicketTypeTracker(TicketType):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
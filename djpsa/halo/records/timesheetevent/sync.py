@@ -1,5 +1,6 @@
 from djpsa.halo.records import api
 from djpsa.halo import sync, models
+from djpsa.halo.records.action.sync import ActionSynchronizer
 from djpsa.halo.records.ticket.sync import TicketSynchronizer
 
 
@@ -21,8 +22,18 @@ class TimeSheetEventSynchronizer(
         'note'
     ]
 
-    def create(self, data, *args, **kwargs):
+    def create(self, data, *args, refresh_related=False, **kwargs):
         """
+        Log time, and return a list of the ticket's newly synced actions.
+        This used to return None, callers checking the result for None
+        should check for an empty list instead.
+
+        Only the new action is synced, from one request for the ticket's
+        newest actions, keeping those starting at the time entry's
+        start_date, see ActionSynchronizer.sync_latest. Pass
+        refresh_related to sync all the ticket's actions and appointments
+        instead, and return all its actions.
+
         Example data format:
         {
           "end_date": "2025-02-25T18:26:00.000Z",
@@ -37,6 +48,7 @@ class TimeSheetEventSynchronizer(
             if field not in data:
                 raise ValueError(f"Missing required field: {field}")
 
+        start_date = data['start_date']
         # Convert datetimes to string format.
         data['start_date'] = data['start_date'].isoformat()
         data['end_date'] = data['end_date'].isoformat()
@@ -52,8 +64,12 @@ class TimeSheetEventSynchronizer(
 
         self.client.create(data)
 
-        ticket = models.Ticket.objects.get(id=data['ticket_id'])
+        if refresh_related:
+            ticket = models.Ticket.objects.get(id=data['ticket_id'])
+            TicketSynchronizer().sync_related(ticket)
+            return list(ticket.ticket_actions.all())
 
-        # Sync related to pull down the newly created action
-        sync = TicketSynchronizer()
-        sync.sync_related(ticket)
+        # Pull down just the newly created action. The response is the
+        # timesheet event, which doesn't say which action it created.
+        return ActionSynchronizer().sync_latest(
+            data['ticket_id'], arrival_date=start_date)
@@ -1,11 +1,15 @@
 import logging
+from concurrent.futures import Future
 from datetime import date, datetime, time
 
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
 from django.utils import timezone
 from dateutil.parser import parse
 from djpsa.sync.sync import Synchronizer
-from django.db.models.fields import DateTimeField
-from django.db.models.fields.related import ForeignKey
+from djpsa.sync.writebehind import get_write_behind_queue
+from djpsa.sync.mapping import compile_outbound_converters, DATETIME, \
+    FOREIGN_KEY, PASSTHROUGH
 
 # README #
 #
@@ -26,6 +30,9 @@ from django.db.models.fields.related import ForeignKey
 
 logger = logging.getLogger(__name__)
 
+# Outbound field converters, compiled once per model class.
+_outbound_converters = {}
+
 
 def empty_date_parser(date_time):
     # Halo API returns a date of 1/1/1900 or earlier as an empty date.
@@ -39,6 +46,13 @@ def empty_date_parser(date_time):
         return date_time if date_time.year > 1980 else None
 
 
+def parse_utc_datetime(date_time):
+    # Parse a datetime string from the API as UTC, None if empty.
+    if not date_time:
+        return None
+    return timezone.make_aware(parse(date_time), timezone.utc)
+
+
 def parse_date_from_api(date_time_str):
     # Halo returns date fields as datetime strings (e.g."2026-02-10T00:00:00")
     if not date_time_str:
@@ -93,14 +107,19 @@ class ApiConvertMixin:
     client = None
     model_class = None
 
+    def _get_outbound_converters(self):
+        converters = _outbound_converters.get(self.model_class)
+        if converters is None:
+            converters = compile_outbound_converters(self.model_class)
+            _outbound_converters[self.model_class] = converters
+        return converters
+
     def _convert_fields_to_api_format(self, data):
         """
         Converts the model field names to the API field names.
         """
-        api_data = {}
-        for key, value in data.items():
-            api_data[self.model_class.API_FIELDS[key]] = value
-        return api_data
+        api_fields = self.model_class.API_FIELDS
+        return {api_fields[key]: value for key, value in data.items()}
 
     def _convert_fields(self, data):
         """
@@ -109,14 +128,21 @@ class ApiConvertMixin:
         * Team just wants a name, not the ID.
         * Foreign keys to the ID of the related object.
         """
+        converters = self._get_outbound_converters()
         for key, value in data.items():
-            field_class = self.model_class._meta.get_field(key).__class__
-            if field_class == DateTimeField:
+            try:
+                _, kind = converters[key]
+            except KeyError:
+                # Raises FieldDoesNotExist for unknown fields.
+                self.model_class._meta.get_field(key)
+                kind = PASSTHROUGH
+
+            if kind == DATETIME:
                 data[key] = value.isoformat() if value else None
             elif key == 'team':
                 # Team requires the name of the team, not the ID. :rageguy:
                 data[key] = value.name if value else None
-            elif field_class == ForeignKey:
+            elif kind == FOREIGN_KEY:
                 try:
                     data[key] = value.id if value else None
                 except AttributeError:
@@ -127,28 +153,236 @@ class ApiConvertMixin:
         return data
 
 
-class CreateMixin(ApiConvertMixin):
+class BatchWriteMixin:
 
-    def create(self, data, *args, **kwargs):
+    def _match_records(self, bodies, records):
+        """
+        Return the record Halo returned for each body, or None if it didn't
+        return one. Records are matched by ID, then if Halo returned one
+        record per body, the rest are matched in order, i.e. a created
+        record or an appointment given a new ID.
+        """
+        by_id = {
+            record.get('id'): record for record in records
+            if record.get('id') is not None
+        }
+        matched = [
+            by_id.pop(body['id'], None) if body.get('id') is not None
+            else None
+            for body in bodies
+        ]
+        if len(records) == len(bodies):
+            matched_ids = {id(record) for record in matched if record}
+            left_over = iter([
+                record for record in records
+                if id(record) not in matched_ids
+            ])
+            matched = [
+                record if record is not None else next(left_over)
+                for record in matched
+            ]
+        return matched
+
+    def _send_many(self, bodies, send):
+        """
+        Send the bodies in chunks of batch_write_size records per request.
+        Return the record matched to each body, and all the records
+        returned.
+        """
+        size = self.sync_settings['batch_write_size']
+        matched = []
+        records = []
+        for start in range(0, len(bodies), size):
+            chunk = bodies[start:start + size]
+            response = send(chunk)
+            if not isinstance(response, list):
+                response = [response] if response else []
+            matched.extend(self._match_records(chunk, response))
+            records.extend(response)
+        return matched, records
+
+    def _write_many(self, bodies, send):
+        """
+        Send the bodies in chunks of batch_write_size records per request,
+        then upsert all the returned records in bulk.
+        """
+        _, records = self._send_many(bodies, send)
+        results = self.bulk_update_or_create_instances(records)
+        return [instance for instance, _ in results]
+
+    def _write_each(self, bodies, send):
+        """
+        Like _write_many, but return the instance for each body, or None if
+        Halo didn't return its record or the record couldn't be saved.
+        """
+        matched, records = self._send_many(bodies, send)
+        results = self.bulk_update_or_create_instances(records)
+        by_pk = {instance.pk: instance for instance, _ in results}
+        return [
+            by_pk.get(self._prepare_api_instance(record)[self.lookup_key])
+            if record is not None else None
+            for record in matched
+        ]
+
+
+class CreateMixin(BatchWriteMixin, ApiConvertMixin):
+
+    def _get_create_body(self, data):
         data = self._convert_fields(data)
-        body = self._convert_fields_to_api_format(data)
+        return self._convert_fields_to_api_format(data)
+
+    def create(self, data, *args, **kwargs):
+        body = self._get_create_body(data)
         response = self.client.create(body)
 
         instance, _ = self.update_or_create_instance(response)
         return instance
 
+    def create_many(self, data_list, *args, **kwargs):
+        """
+        Create the records with as few requests as possible, and return the
+        created instances.
+        """
+        bodies = [self._get_create_body(data) for data in data_list]
+        return self._write_many(bodies, self.client.create)
+
 
-class UpdateMixin(ApiConvertMixin):
+class UpdateMixin(BatchWriteMixin, ApiConvertMixin):
 
-    def update(self, record, data, *args, **kwargs):
+    def _get_changed_data(self, changes):
+        """
+        Given a list of (record, data), drop the values in each data dict
+        that match the record's stored row, with one query for all of them.
+        Return a list of (record, changed data).
+        """
+        columns = {}
+        for _, data in changes:
+            for key in data:
+                try:
+                    field = self.model_class._meta.get_field(key)
+                except FieldDoesNotExist:
+                    continue
+                if field.concrete and not field.many_to_many:
+                    columns[key] = field.attname
+
+        stored_rows = {
+            row['pk']: row for row in self.model_class.objects.filter(
+                pk__in=[record.pk for record, _ in changes]
+            ).values('pk', *set(columns.values()))
+        }
+
+        result = []
+        for record, data in changes:
+            stored = stored_rows.get(record.pk)
+            if stored is None:
+                result.append((record, data))
+                continue
+            changed = {}
+            for key, value in data.items():
+                if isinstance(value, models.Model):
+                    value = value.pk
+                if key not in columns or stored[columns[key]] != value:
+                    changed[key] = data[key]
+            result.append((record, changed))
+        return result
+
+    def _get_remote_id(self, record):
+        """Return the ID Halo knows the record by."""
+        return record.id
+
+    def _get_update_body(self, record, data):
         data = self._convert_fields(data)
         body = self._convert_fields_to_api_format(data)
+        body['id'] = self._get_remote_id(record)
+        return body
+
+    def update(self, record, data, force=False, *args, **kwargs):
+        """
+        Send the values in data that differ from the stored record, or all
+        of them if force is set. If nothing differs no request is made, and
+        the record is returned as is.
+        """
+        if not force:
+            (record, data), = self._get_changed_data([(record, data)])
+            if not data:
+                logger.debug('No changes to send for {}'.format(record))
+                return record
 
-        response = self.client.update(record.id, body)
+        body = self._get_update_body(record, data)
+
+        response = self.client.update(self._get_remote_id(record), body)
 
         instance, _ = self.update_or_create_instance(response)
         return instance
 
+    def update_many(self, changes, force=False, *args, **kwargs):
+        """
+        Apply a list of (record, data) changes with as few requests as
+        possible, and return the updated instances. Like update, only
+        changed values are sent, and unchanged records are returned as is.
+        """
+        return [
+            instance for _, instance in
+            self.update_each(changes, force, *args, **kwargs)
+            if instance is not None
+        ]
+
+    def update_later(self, record, data):
+        """
+        Queue the update on this class' write-behind queue if the
+        write_behind setting is on, otherwise send it now. Return a Future
+        for the updated instance.
+
+        The queue sends updates from its own thread and DB connection, so
+        inside a transaction the update is only queued once it commits. If
+        the transaction rolls back, the update is dropped and the Future
+        never completes.
+        """
+        future = Future()
+        if self.sync_settings['write_behind']:
+            queue = get_write_behind_queue(type(self))
+
+            def enqueue():
+                queued = queue.update(record, data)
+                queued.add_done_callback(
+                    lambda done: _copy_outcome(done, future))
+
+            transaction.on_commit(enqueue)
+            return future
+
+        try:
+            future.set_result(self.update(record, data))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def update_each(self, changes, force=False, *args, **kwargs):
+        """
+        Like update_many, but return a list of (record, instance) in the
+        order of the changes. The instance is None if Halo didn't return
+        the record or it couldn't be saved.
+        """
+        if not force:
+            changes = self._get_changed_data(changes)
+
+        to_send = [(record, data) for record, data in changes if data]
+        bodies = [self._get_update_body(record, data)
+                  for record, data in to_send]
+        instances = iter(
+            self._write_each(bodies, self.client.update_many)
+            if bodies else [])
+        return [
+            (record, next(instances) if data else record)
+            for record, data in changes
+        ]
+
+
+def _copy_outcome(source, target):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
 
 class DeleteMixin:
     client = None
@@ -168,6 +402,10 @@ class HaloSynchronizer(Synchronizer):
 class HaloChildFetchRecordsMixin:
     parent_model_class = None
     parent_field = None
+    # Field of the parent model set when it changes. When set, a partial
+    # sync only fetches for the parents changed since the last successful
+    # sync, rather than one request per stored parent.
+    parent_changed_field = None
 
     def __init__(self, parent_object_id=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -192,13 +430,20 @@ class HaloChildFetchRecordsMixin:
 
     @property
     def parent_object_ids(self):
-        object_ids = self.parent_model_class.objects.all() \
-            .values_list('id', flat=True)
-
         if self.parent_object_id:
-            object_ids = [self.parent_object_id]
-
-        return object_ids
+            return [self.parent_object_id]
+
+        parents = self.parent_model_class.objects.all()
+        if self.parent_changed_field and not self.full:
+            last_sync_job = self.get_sync_job_qset() \
+                .filter(success=True).last()
+            if last_sync_job:
+                parents = parents.filter(**{
+                    '{}__gte'.format(self.parent_changed_field):
+                        last_sync_job.start_time,
+                })
+
+        return parents.values_list('id', flat=True)
 
     def format_parent_params(self, object_id):
         return {
@@ -1,5 +1,14 @@
+import json
+import threading
+import time
 import unittest
 from unittest.mock import patch, MagicMock
+
+from django.core.cache import cache
+
+from djpsa.api import circuit
+from djpsa.api.exceptions import APIError, CircuitOpenError
+from djpsa.halo import api
 from djpsa.halo.api import HaloAPIClient
 
 
@@ -48,3 +57,289 @@ class TestHaloAPIClient(unittest.TestCase):
             headers={'Authorization': 'Bearer new_token'},
             params=None
         )
+
+
+def json_response(data):
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {'Content-Type': 'application/json'}
+    response.json.return_value = data
+    return response
+
+
+class TicketClient(HaloAPIClient):
+    endpoint = 'Tickets'
+
+
+def coalescing_client(across_processes=False):
+    client = TicketClient()
+    client.request_settings['coalesce_requests'] = True
+    client.request_settings['coalesce_requests_redis'] = across_processes
+    return client
+
+
+@patch('djpsa.halo.api.HaloAPITokenFetcher.get_token',
+       return_value='test_token')
+class TestRequestCoalescing(unittest.TestCase):
+
+    @patch('djpsa.halo.api.requests.request')
+    def test_concurrent_identical_gets_share_request(self, mock_request, _):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_request(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return json_response({'id': 1, 'assets': []})
+
+        mock_request.side_effect = slow_request
+        results = []
+
+        def get():
+            results.append(
+                coalescing_client().request('GET', params={'id': 1}))
+
+        leader = threading.Thread(target=get)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=get)
+        follower.start()
+        # Let the follower join the flight before it lands.
+        follower.join(0.1)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(results, [{'id': 1, 'assets': []}] * 2)
+        # Each caller gets its own copy.
+        self.assertIsNot(results[0], results[1])
+
+    @patch('djpsa.halo.api.requests.request')
+    def test_different_params_and_writes_not_coalesced(
+            self, mock_request, _):
+        mock_request.return_value = json_response({})
+        client = coalescing_client()
+
+        client.request('GET', params={'id': 1})
+        client.request('GET', params={'id': 2})
+        client.request('POST', body=[{'id': 1}])
+
+        self.assertEqual(mock_request.call_count, 3)
+
+    @patch('djpsa.halo.api.get_redis_client')
+    @patch('djpsa.halo.api.requests.request')
+    def test_waits_for_other_process(self, mock_request, get_redis, _):
+        redis = get_redis.return_value
+        redis.set.return_value = False
+        # The flight ID, no result yet, the lock still held, the result.
+        redis.get.side_effect = [b'abc', None, b'abc', json.dumps({'id': 1})]
+        client = coalescing_client(across_processes=True)
+
+        self.assertEqual(client.request('GET', params={'id': 1}), {'id': 1})
+        mock_request.assert_not_called()
+        self.assertTrue(redis.get.call_args[0][0].endswith(':abc'))
+
+    @patch('djpsa.halo.api.get_redis_client')
+    @patch('djpsa.halo.api.requests.request')
+    def test_finished_request_not_shared(self, mock_request, get_redis, _):
+        redis = get_redis.return_value
+        redis.set.return_value = False
+        # The other process finished before we could join it.
+        redis.get.return_value = None
+        mock_request.return_value = json_response({'id': 2})
+        client = coalescing_client(across_processes=True)
+
+        self.assertEqual(client.request('GET', params={'id': 1}), {'id': 2})
+        mock_request.assert_called_once()
+
+    @patch('djpsa.halo.api.get_redis_client')
+    @patch('djpsa.halo.api.requests.request')
+    def test_shares_result_with_other_processes(
+            self, mock_request, get_redis, _):
+        redis = get_redis.return_value
+        redis.set.return_value = True
+        mock_request.return_value = json_response({'id': 1})
+        client = coalescing_client(across_processes=True)
+
+        self.assertEqual(client.request('GET', params={'id': 1}), {'id': 1})
+
+        lock_key, flight_id = redis.set.call_args_list[0][0]
+        result_key, result = redis.set.call_args_list[-1][0]
+        self.assertEqual(result_key, '{}:{}'.format(lock_key, flight_id))
+        self.assertEqual(json.loads(result), {'id': 1})
+        redis.delete.assert_called_once()
+
+
+@patch('djpsa.halo.api.HaloAPITokenFetcher.get_token',
+       return_value='test_token')
+@patch('djpsa.halo.api.requests.request')
+class TestRecordCache(unittest.TestCase):
+
+    def setUp(self):
+        cache.clear()
+        api.get_record_cache().clear()
+
+    def client(self, ttls=None):
+        client = TicketClient()
+        client.request_settings['record_cache_ttls'] = \
+            {'Tickets': 30} if ttls is None else ttls
+        return client
+
+    def test_get_record_cached(self, mock_request, _):
+        mock_request.return_value = json_response({'id': 1, 'summary': 'A'})
+        client = self.client()
+
+        first = client.get_record(1)
+        first['summary'] = 'Changed by caller'
+
+        self.assertEqual(client.get_record(1), {'id': 1, 'summary': 'A'})
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(mock_request.call_args[0][1],
+                         client._format_endpoint(1))
+
+    def test_endpoint_without_ttl_not_cached(self, mock_request, _):
+        mock_request.return_value = json_response({'id': 1})
+        client = self.client(ttls={'Asset': 30})
+
+        client.get_record(1)
+        client.get_record(1)
+
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_writes_and_callbacks_invalidate(self, mock_request, _):
+        mock_request.return_value = json_response({'id': 1})
+        client = self.client()
+
+        client.get_record(1)
+        client.update(1, {'summary': 'B'})
+        client.get_record(1)
+        TicketClient.invalidate_record(
+            1, client.resource_server, client.request_settings)
+        client.get_record(1)
+        client.get_record(1)
+
+        gets = [c for c in mock_request.call_args_list if c[0][0] == 'GET']
+        self.assertEqual(len(gets), 3)
+
+    def test_no_invalidation_without_ttl(self, mock_request, _):
+        mock_request.return_value = json_response({'id': 1})
+        client = self.client(ttls={'Asset': 30})
+
+        with patch('djpsa.halo.api.cache') as mock_cache:
+            client.update(1, {'summary': 'B'})
+            TicketClient.invalidate_record(1)
+
+        self.assertEqual(mock_cache.mock_calls, [])
+
+    def test_versions_kept_per_resource_server(self, mock_request, _):
+        mock_request.return_value = json_response({'id': 1})
+        client = self.client()
+        client.get_record(1)
+
+        TicketClient.invalidate_record(
+            1, 'https://other.example.com/', client.request_settings)
+        client.get_record(1)
+
+        self.assertEqual(mock_request.call_count, 1)
+
+
+@patch('djpsa.halo.api.HaloAPITokenFetcher.get_token',
+       return_value='test_token')
+@patch('djpsa.halo.api.requests.request')
+class TestAdaptiveConcurrency(unittest.TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    @patch('djpsa.halo.api.get_limiter')
+    def test_throttled_response_reported_as_overloaded(
+            self, get_limiter, mock_request, _):
+        mock_request.return_value = MagicMock(status_code=429)
+        client = TicketClient()
+        client.request_settings['adaptive_concurrency'] = True
+
+        client._request('GET', 'http://example.com')
+
+        limiter = get_limiter.return_value
+        get_limiter.assert_called_once_with(
+            client.resource_server, client.request_settings)
+        limiter.acquire.assert_called_once_with()
+        args, kwargs = limiter.release.call_args
+        self.assertEqual(args[0], limiter.acquire.return_value)
+        self.assertTrue(args[2])
+        self.assertEqual(kwargs['key'], ('GET', 'Tickets', None))
+
+    @patch('djpsa.halo.api.get_limiter')
+    def test_streamed_latency_not_reported(
+            self, get_limiter, mock_request, _):
+        mock_request.return_value = MagicMock(status_code=200)
+        client = TicketClient()
+        client.request_settings['adaptive_concurrency'] = True
+
+        client._request('GET', 'http://example.com', stream=True)
+
+        args, _ = get_limiter.return_value.release.call_args
+        self.assertIsNone(args[1])
+
+    @patch('djpsa.halo.api.get_limiter')
+    def test_disabled_by_default(self, get_limiter, mock_request, _):
+        mock_request.return_value = MagicMock(status_code=200)
+
+        TicketClient()._request('GET', 'http://example.com')
+
+        get_limiter.assert_not_called()
+
+
+@patch('djpsa.halo.api.HaloAPITokenFetcher.get_token',
+       return_value='test_token')
+@patch('djpsa.halo.api.requests.request')
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        cache.clear()
+        circuit._breakers.clear()
+        self.addCleanup(circuit._breakers.clear)
+
+    @patch('djpsa.api.client.RETRY_WAIT_EXPONENTIAL_MULTAPPLIER', 0)
+    def test_fails_fast_once_open(self, mock_request, _):
+        mock_request.return_value = MagicMock(
+            status_code=500, content=b'{}', url='http://example.com')
+        client = TicketClient()
+        client.request_settings.update({
+            'circuit_breaker': True,
+            'circuit_failure_threshold': 2,
+        })
+
+        with self.assertRaises(CircuitOpenError):
+            client.fetch_resource()
+
+        # Two failed attempts opened the circuit, the third failed fast.
+        self.assertEqual(mock_request.call_count, 2)
+        with self.assertRaises(CircuitOpenError):
+            client.fetch_resource()
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch('djpsa.halo.api.get_limiter')
+    def test_probe_released_when_no_slot_frees_up(
+            self, get_limiter, mock_request, _):
+        get_limiter.return_value.acquire.side_effect = APIError('Timed out')
+        client = TicketClient()
+        client.request_settings.update({
+            'circuit_breaker': True,
+            'adaptive_concurrency': True,
+        })
+        breaker = circuit.get_breaker(
+            client.resource_server, client.request_settings)
+        # Half open.
+        breaker._opened_at = time.monotonic() - breaker.reset_timeout
+
+        with self.assertRaises(APIError):
+            client._request('GET', 'http://example.com')
+
+        mock_request.assert_not_called()
+        get_limiter.return_value.release.assert_not_called()
+        self.assertEqual(breaker.state, circuit.OPEN)
+        # The next probe is let through once the timeout passes again.
+        breaker._opened_at -= breaker.reset_timeout
+        breaker.allow()
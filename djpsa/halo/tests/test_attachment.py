@@ -0,0 +1,172 @@
+import base64
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from djpsa.api.exceptions import RecordNotFoundError
+from djpsa.halo.records.attachment import api as attachment_api
+from djpsa.halo.records.attachment.api import AttachmentAPI, Base64JSONBody
+
+
+def mock_download(status_code, chunks):
+    response = MagicMock()
+    response.status_code = status_code
+    response.__enter__.return_value = response
+    response.iter_content.return_value = iter(chunks)
+    return response
+
+
+class TestBase64JSONBody(unittest.TestCase):
+
+    def test_body_matches_data_uri(self):
+        content = os.urandom(1000)
+        body = Base64JSONBody({'ticket_id': 1, 'filename': 'a "b".pdf'},
+                              'data_base64', 'application/pdf',
+                              io.BytesIO(content))
+
+        with patch.object(attachment_api, 'STREAM_CHUNK_SIZE', 30):
+            sent = b''.join(body)
+            # Iterating again sends the same body.
+            self.assertEqual(b''.join(body), sent)
+
+        self.assertEqual(json.loads(sent), [{
+            'ticket_id': 1,
+            'filename': 'a "b".pdf',
+            'data_base64': 'data:application/pdf;base64,{}'.format(
+                base64.b64encode(content).decode()),
+        }])
+        self.assertEqual(len(body), len(sent))
+
+    def test_unseekable_file_has_unknown_length(self):
+        fileobj = MagicMock()
+        fileobj.seekable.return_value = False
+        fileobj.read.side_effect = [b'ab', b'c', b'']
+        body = Base64JSONBody({}, 'data', 'text/plain', fileobj)
+
+        self.assertEqual(len(body), 0)
+        self.assertEqual(json.loads(b''.join(body)),
+                         [{'data': 'data:text/plain;base64,YWJj'}])
+
+
+@patch('djpsa.halo.api.HaloAPITokenFetcher.get_token',
+       return_value='test_token')
+class TestAttachmentAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.path, '5')
+
+    def tearDown(self):
+        for name in os.listdir(self.path):
+            os.remove(os.path.join(self.path, name))
+        os.rmdir(self.path)
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    @patch('djpsa.halo.api.requests.request')
+    def test_upload_streams_body(self, mock_request, _):
+        mock_request.return_value = MagicMock(status_code=200)
+
+        AttachmentAPI().upload(1, 'a.txt', 'text/plain', b'hello')
+
+        kwargs = mock_request.call_args[1]
+        self.assertEqual(kwargs['headers']['Content-Type'],
+                         'application/json')
+        self.assertIsInstance(kwargs['data'], Base64JSONBody)
+        self.assertEqual(json.loads(b''.join(kwargs['data'])), [{
+            'ticket_id': 1,
+            'filename': 'a.txt',
+            'data_base64': 'data:text/plain;base64,aGVsbG8=',
+        }])
+
+    @patch('djpsa.halo.api.requests.request')
+    def test_iter_content_json(self, mock_request, _):
+        response = mock_download(200, [b'{"a": ', b'1}'])
+        response.headers = {'Content-Type': 'application/json'}
+        mock_request.return_value = response
+
+        chunks = list(AttachmentAPI().iter_content(5))
+
+        self.assertEqual(chunks, [b'{"a": ', b'1}'])
+        self.assertTrue(mock_request.call_args[1]['stream'])
+        response.iter_content.assert_called_once_with(
+            chunk_size=attachment_api.STREAM_CHUNK_SIZE)
+        response.json.assert_not_called()
+        response.close.assert_called_once()
+
+    @patch('djpsa.halo.api.requests.request')
+    def test_iter_content_without_content_type(self, mock_request, _):
+        response = mock_download(200, [b'abc', b'def'])
+        response.headers = {}
+        mock_request.return_value = response
+
+        self.assertEqual(b''.join(AttachmentAPI().iter_content(5)),
+                         b'abcdef')
+        response.json.assert_not_called()
+
+    @patch('djpsa.halo.api.requests.request')
+    def test_iter_content_not_found(self, mock_request, _):
+        mock_request.return_value = mock_download(404, [])
+
+        with self.assertRaises(RecordNotFoundError):
+            list(AttachmentAPI().iter_content(5))
+        mock_request.return_value.close.assert_called_once()
+
+    @patch('djpsa.halo.records.attachment.api.requests.get')
+    def test_download(self, mock_get, _):
+        mock_get.return_value = mock_download(200, [b'abc', b'def'])
+
+        saved = AttachmentAPI().download_from_url('http://cdn/5', 5,
+                                                  self.path)
+
+        self.assertEqual(saved, '5')
+        self.assertEqual(self.read(self.file_path), b'abcdef')
+        self.assertFalse(os.path.exists(self.file_path + '.part'))
+        self.assertTrue(mock_get.call_args[1]['stream'])
+        self.assertEqual(mock_get.call_args[1]['headers'], {})
+
+    @patch('djpsa.halo.records.attachment.api.requests.get')
+    def test_download_resumes_partial_file(self, mock_get, _):
+        with open(self.file_path + '.part', 'wb') as f:
+            f.write(b'abc')
+        mock_get.return_value = mock_download(206, [b'def'])
+
+        AttachmentAPI().download_from_url('http://cdn/5', 5, self.path)
+
+        self.assertEqual(mock_get.call_args[1]['headers'],
+                         {'Range': 'bytes=3-'})
+        self.assertEqual(self.read(self.file_path), b'abcdef')
+
+    @patch('djpsa.halo.records.attachment.api.requests.get')
+    def test_download_restarts_if_range_ignored(self, mock_get, _):
+        with open(self.file_path + '.part', 'wb') as f:
+            f.write(b'xyz')
+        mock_get.return_value = mock_download(200, [b'abcdef'])
+
+        AttachmentAPI().download_from_url('http://cdn/5', 5, self.path)
+
+        self.assertEqual(self.read(self.file_path), b'abcdef')
+
+    @patch('djpsa.halo.records.attachment.api.requests.get')
+    def test_download_resumes_after_interruption(self, mock_get, _):
+        def interrupted():
+            yield b'abc'
+            raise requests.exceptions.ChunkedEncodingError('reset')
+
+        mock_get.side_effect = [
+            mock_download(200, interrupted()),
+            mock_download(206, [b'def']),
+        ]
+
+        AttachmentAPI().download_from_url('http://cdn/5', 5, self.path)
+
+        self.assertEqual(mock_get.call_args[1]['headers'],
+                         {'Range': 'bytes=3-'})
+        self.assertEqual(self.read(self.file_path), b'abcdef')
@@ -1,5 +1,11 @@
+import hashlib
+import shutil
+import tempfile
+from concurrent.futures import Future
 from unittest import TestCase, mock
 from unittest.mock import MagicMock, patch
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 from dateutil.parser import parse
 from djpsa.halo.sync import empty_date_parser, ResponseKeyMixin
@@ -7,6 +13,19 @@ from djpsa.halo import models
 from djpsa.halo.records.ticket.sync import TicketSynchronizer
 from djpsa.halo.records.ticket.model import ItilRequestType
 from djpsa.halo.records.agent.sync import AgentSynchronizer
+from djpsa.halo.records.team.sync import TeamSynchronizer
+from djpsa.halo.records.action.sync import ActionSynchronizer
+from djpsa.halo.records.timesheetevent.sync import \
+    TimeSheetEventSynchronizer
+from djpsa.halo.records.attachment.sync import AttachmentSynchronizer
+from djpsa.halo.records.appointment.sync import AppointmentSynchronizer
+from djpsa.halo.records.asset import sync as asset_sync
+from djpsa.halo.records.asset.sync import AssetSynchronizer
+from djpsa.sync.blobstore import BlobStore
+from djpsa.sync.models import SyncJob
+from djpsa.sync.queries import QueryCounter
+from djpsa.sync.sync import CREATED, UPDATED, SKIPPED
+from djpsa.api.exceptions import APIError
 
 
 class TestEmptyDateParser(TestCase):
@@ -154,3 +173,624 @@ class TestAgentSynchronizer(TestCase):
             'id': 7, 'name': 'No Cost',
         })
         self.assertIsNone(instance.cost_price)
+
+
+class TestBulkUpdateOrCreate(TestCase):
+
+    def setUp(self):
+        models.Team.objects.create(id=1, name='Support', ticket_count=1)
+        models.Team.objects.create(id=2, name='Projects', ticket_count=2)
+        with patch.object(TeamSynchronizer, 'client_class', MagicMock()):
+            self.synchronizer = TeamSynchronizer()
+
+    def tearDown(self):
+        models.Team.objects.all().delete()
+
+    def test_bulk_upsert(self):
+        results = self.synchronizer.bulk_update_or_create_instances([
+            {'id': 1, 'name': 'Support', 'ticket_count': 5},
+            {'id': 2, 'name': 'Projects', 'ticket_count': 2},
+            {'id': 3, 'name': 'Sales', 'ticket_count': 0},
+            # A later payload for the same record wins.
+            {'id': 1, 'name': 'Service Desk', 'ticket_count': 6},
+        ])
+
+        self.assertEqual(
+            [(instance.id, result) for instance, result in results],
+            [(1, UPDATED), (2, SKIPPED), (3, CREATED)])
+        self.assertEqual(
+            list(models.Team.objects.order_by('id').values_list(
+                'name', 'ticket_count')),
+            [('Service Desk', 6), ('Projects', 2), ('Sales', 0)])
+
+    def test_invalid_records_skipped(self):
+        self.synchronizer._try_validate = \
+            lambda record: record['name'] != 'Sales'
+
+        results = self.synchronizer.bulk_update_or_create_instances([
+            {'id': 1, 'name': 'Support', 'ticket_count': 5},
+            {'id': 3, 'name': 'Sales', 'ticket_count': 0},
+        ])
+
+        self.assertEqual([instance.id for instance, _ in results], [1])
+        self.assertFalse(models.Team.objects.filter(id=3).exists())
+
+
+class TestTicketStaleness(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        status = models.Status.objects.create(id=1, name='New')
+        models.Ticket.objects.create(
+            id=1, summary='Printer on fire', status=status,
+            last_update=timezone.make_aware(
+                parse('2024-05-01T10:00:00'), timezone.utc))
+        with patch.object(TicketSynchronizer, 'client_class', MagicMock()):
+            self.synchronizer = TicketSynchronizer()
+
+    def tearDown(self):
+        models.Ticket.objects.all().delete()
+        models.Status.objects.all().delete()
+
+    def test_older_than_remembered_is_stale(self):
+        self.synchronizer.remember_payload(
+            {'id': 1, 'summary': 'A', 'lastupdate': '2024-05-01T10:00:00'})
+
+        with QueryCounter() as counter:
+            self.assertTrue(self.synchronizer.is_stale(
+                {'id': 1, 'summary': 'B', 'lastupdate': '2024-05-01T09:00'}))
+            # Same time, but changed, i.e. a child record was added.
+            self.assertFalse(self.synchronizer.is_stale(
+                {'id': 1, 'summary': 'B', 'last_update': '2024-05-01T10:00'}))
+            self.assertFalse(self.synchronizer.is_stale(
+                {'id': 1, 'summary': 'B', 'lastupdate': '2024-05-01T10:01'}))
+        self.assertEqual(counter.count, 0)
+
+    def test_unremembered_record_is_not_stale(self):
+        # Even though the stored row is newer.
+        self.assertFalse(self.synchronizer.is_stale(
+            {'id': 1, 'lastupdate': '2024-05-01T09:00:00'}))
+        self.assertFalse(self.synchronizer.is_stale({'id': 2}))
+
+    def test_bulk_update_sets_modified(self):
+        modified = models.Ticket.objects.get(id=1).modified
+
+        results = self.synchronizer.bulk_update_or_create_instances([
+            {'id': 1, 'summary': 'Printer still on fire', 'status_id': 1,
+             'itil_requesttype_id': 1,
+             'lastactiondate': '2024-05-01T10:00:00'}])
+
+        self.assertEqual(results[0][1], UPDATED)
+        self.assertGreater(models.Ticket.objects.get(id=1).modified, modified)
+
+    def test_remembered_payload_is_stale(self):
+        record = {'id': 2, 'summary': 'New ticket'}
+        self.assertFalse(self.synchronizer.is_stale(record))
+
+        self.synchronizer.remember_payload(record)
+
+        self.assertTrue(self.synchronizer.is_stale(dict(record)))
+        self.assertFalse(self.synchronizer.is_stale(
+            {'id': 2, 'summary': 'Changed'}))
+
+
+class TestTimeSheetEventCreate(TestCase):
+
+    def setUp(self):
+        with patch.object(TimeSheetEventSynchronizer, 'client_class',
+                          MagicMock()):
+            self.synchronizer = TimeSheetEventSynchronizer()
+        self.data = {
+            'start_date': timezone.now(),
+            'end_date': timezone.now(),
+            'ticket_id': 2267,
+            'agent_id': '3',
+            'charge_rate': '1',
+            'note': 'Logged time',
+        }
+
+    @patch.object(TicketSynchronizer, 'sync_related')
+    @patch.object(ActionSynchronizer, 'sync_latest')
+    def test_syncs_only_new_action(self, sync_latest, sync_related):
+        self.synchronizer.client.create.return_value = {'id': 5}
+        start_date = self.data['start_date']
+
+        self.synchronizer.create(self.data)
+
+        sync_latest.assert_called_once_with(2267, arrival_date=start_date)
+        sync_related.assert_not_called()
+
+
+class TestActionSyncLatest(TestCase):
+
+    def setUp(self):
+        with patch.object(ActionSynchronizer, 'client_class', MagicMock()):
+            self.synchronizer = ActionSynchronizer()
+        self.synchronizer.update_or_create_instance = MagicMock(
+            side_effect=lambda record: (record['id'], None))
+
+    def test_fetches_given_action(self):
+        client = self.synchronizer.client
+        client._format_endpoint.return_value = 'Actions/12'
+        client.fetch_resource.return_value = {'id': 12, 'ticket_id': 7}
+
+        self.assertEqual(self.synchronizer.sync_latest(7, action_id=12), [12])
+        client.fetch_resource.assert_called_once_with(
+            endpoint_url='Actions/12', params={'ticket_id': 7})
+
+    def test_fetches_newest_actions(self):
+        client = self.synchronizer.client
+        client.fetch_resource.return_value = {
+            'actions': [{'id': 3}, {'id': 2}]}
+
+        self.assertEqual(self.synchronizer.sync_latest(7), [3, 2])
+        client.fetch_resource.assert_called_once_with(params={
+            'ticket_id': 7, 'count': 5, 'order': 'id', 'orderdesc': True})
+
+    def test_newest_actions_filtered_by_arrival_date(self):
+        client = self.synchronizer.client
+        client.fetch_resource.return_value = {'actions': [
+            {'id': 3, 'actionarrivaldate': '2025-02-25T18:10:00'},
+            {'id': 2, 'actionarrivaldate': '2025-02-25T17:00:00'},
+        ]}
+        arrival_date = parse('2025-02-25T18:10:00.250Z')
+
+        self.assertEqual(
+            self.synchronizer.sync_latest(7, arrival_date=arrival_date),
+            [3])
+
+    def test_naive_arrival_date_is_utc(self):
+        self.synchronizer.client.fetch_resource.return_value = {'actions': [
+            {'id': 3, 'actionarrivaldate': '2025-02-25T18:10:00'},
+        ]}
+
+        self.assertEqual(self.synchronizer.sync_latest(
+            7, arrival_date=parse('2025-02-25T18:10:00')), [3])
+
+    def test_falls_back_to_actions_since_arrival_date(self):
+        client = self.synchronizer.client
+        client.fetch_resource.side_effect = [
+            {'actions': [
+                {'id': 9, 'actionarrivaldate': '2025-02-25T18:30:00'},
+            ]},
+            {'actions': [
+                {'id': 9, 'actionarrivaldate': '2025-02-25T18:30:00'},
+                {'id': 3, 'actionarrivaldate': '2025-02-25T18:10:00'},
+                {'id': 2, 'actionarrivaldate': '2025-02-25T17:00:00'},
+            ]},
+        ]
+        arrival_date = parse('2025-02-25T18:10:00Z')
+
+        self.assertEqual(
+            self.synchronizer.sync_latest(7, arrival_date=arrival_date),
+            [9, 3])
+        client.fetch_resource.assert_called_with(params={'ticket_id': 7})
+
+    def test_warns_when_no_action_found(self):
+        self.synchronizer.client.fetch_resource.return_value = {
+            'actions': []}
+
+        with self.assertLogs('djpsa.halo.records.action.sync', 'WARNING'):
+            self.assertEqual(self.synchronizer.sync_latest(
+                7, arrival_date=parse('2025-02-25T18:10:00Z')), [])
+
+
+class TestBatchWrites(TestCase):
+
+    def setUp(self):
+        with patch.object(TicketSynchronizer, 'client_class', MagicMock()), \
+                patch(
+                    'djpsa.halo.records.ticket.sync.models.FieldInfoReference'
+                ) as field_info:
+            field_info.objects.values_list.return_value = []
+            self.synchronizer = TicketSynchronizer()
+        self.synchronizer.sync_settings['batch_write_size'] = 2
+        self.synchronizer.bulk_update_or_create_instances = MagicMock(
+            side_effect=lambda records: [
+                (MagicMock(pk=record['id']), None) for record in records])
+
+    def test_create_many_chunks_requests(self):
+        client = self.synchronizer.client
+        client.create.side_effect = [
+            [{'id': 1}, {'id': 2}],
+            {'id': 3},
+        ]
+
+        instances = self.synchronizer.create_many(
+            [{'summary': 'One'}, {'summary': 'Two'}, {'summary': 'Three'}])
+
+        self.assertEqual([i.pk for i in instances], [1, 2, 3])
+        self.assertEqual(client.create.call_args_list, [
+            mock.call([{'summary': 'One'}, {'summary': 'Two'}]),
+            mock.call([{'summary': 'Three'}]),
+        ])
+        self.synchronizer.bulk_update_or_create_instances \
+            .assert_called_once_with([{'id': 1}, {'id': 2}, {'id': 3}])
+
+    def test_update_many_sends_ids(self):
+        client = self.synchronizer.client
+        client.update_many.return_value = [{'id': 4}, {'id': 5}]
+        changes = [
+            (MagicMock(id=4), {'summary': 'Four'}),
+            (MagicMock(id=5), {'on_hold': True}),
+        ]
+
+        instances = self.synchronizer.update_many(changes, force=True)
+
+        self.assertEqual([i.pk for i in instances], [4, 5])
+        client.update_many.assert_called_once_with([
+            {'summary': 'Four', 'id': 4},
+            {'onhold': True, 'id': 5},
+        ])
+
+    def test_update_each_matches_records_by_id(self):
+        client = self.synchronizer.client
+        # Out of order, and one record missing.
+        client.update_many.return_value = [{'id': 6}, {'id': 4}]
+        self.synchronizer.sync_settings['batch_write_size'] = 3
+        four, five, six = MagicMock(id=4), MagicMock(id=5), MagicMock(id=6)
+
+        results = self.synchronizer.update_each([
+            (four, {'summary': 'Four'}),
+            (five, {'summary': 'Five'}),
+            (six, {'summary': 'Six'}),
+        ], force=True)
+
+        self.assertEqual(
+            [(record, instance and instance.pk)
+             for record, instance in results],
+            [(four, 4), (five, None), (six, 6)])
+
+    def test_update_later_sends_now_by_default(self):
+        record = MagicMock(id=4)
+        self.synchronizer.update = MagicMock(return_value='instance')
+
+        future = self.synchronizer.update_later(record, {'summary': 'Four'})
+
+        self.assertEqual(future.result(timeout=1), 'instance')
+        self.synchronizer.update.assert_called_once_with(
+            record, {'summary': 'Four'})
+
+    @patch('djpsa.halo.sync.get_write_behind_queue')
+    def test_update_later_queues_with_write_behind(self, get_queue):
+        self.synchronizer.sync_settings['write_behind'] = True
+        record = MagicMock(id=4)
+
+        queued = Future()
+        get_queue.return_value.update.return_value = queued
+
+        future = self.synchronizer.update_later(record, {'summary': 'Four'})
+
+        get_queue.assert_called_once_with(TicketSynchronizer)
+        get_queue.return_value.update.assert_called_once_with(
+            record, {'summary': 'Four'})
+        queued.set_result('instance')
+        self.assertEqual(future.result(timeout=1), 'instance')
+
+    @patch('djpsa.halo.sync.get_write_behind_queue')
+    def test_update_later_queues_once_committed(self, get_queue):
+        self.synchronizer.sync_settings['write_behind'] = True
+        update = get_queue.return_value.update
+        update.return_value = Future()
+
+        with transaction.atomic():
+            self.synchronizer.update_later(MagicMock(id=4), {'summary': 'A'})
+            update.assert_not_called()
+        update.assert_called_once()
+
+        update.reset_mock()
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                self.synchronizer.update_later(
+                    MagicMock(id=4), {'summary': 'B'})
+                raise ValueError('rolled back')
+        update.assert_not_called()
+
+
+class TestAppointmentUpdateMany(TestCase):
+
+    def setUp(self):
+        models.Appointment.objects.create(id=1, subject='One')
+        models.Appointment.objects.create(id=2, subject='Two')
+        with patch.object(AppointmentSynchronizer, 'client_class',
+                          MagicMock()):
+            self.synchronizer = AppointmentSynchronizer()
+        self.client = self.synchronizer.client
+
+    def tearDown(self):
+        models.Appointment.objects.all().delete()
+
+    def changes(self):
+        return [
+            (models.AppointmentTracker.objects.get(id=pk), {'subject': 'New'})
+            for pk in (1, 2)
+        ]
+
+    def test_replaced_appointment_deleted(self):
+        self.client.update_many.return_value = [
+            {'id': 1, 'subject': 'New', 'is_private': False},
+            {'id': 3, 'subject': 'New', 'is_private': False},
+        ]
+
+        self.synchronizer.update_many(self.changes())
+
+        self.assertEqual(
+            sorted(models.Appointment.objects.values_list('id', flat=True)),
+            [1, 3])
+
+    def test_missing_appointment_kept(self):
+        self.client.update_many.return_value = [
+            {'id': 2, 'subject': 'New', 'is_private': False}]
+
+        instances = self.synchronizer.update_many(self.changes())
+
+        self.assertEqual([instance.pk for instance in instances], [2])
+        self.assertTrue(models.Appointment.objects.filter(id=1).exists())
+
+
+class TestMinimalDiffUpdates(TestCase):
+
+    def setUp(self):
+        self.status = models.Status.objects.create(id=1, name='New')
+        models.Status.objects.create(id=2, name='Closed')
+        self.ticket = models.TicketTracker.objects.create(
+            id=1, summary='Printer on fire', status=self.status)
+        with patch.object(TicketSynchronizer, 'client_class', MagicMock()), \
+                patch(
+                    'djpsa.halo.records.ticket.sync.models.FieldInfoReference'
+                ) as field_info:
+            field_info.objects.values_list.return_value = []
+            self.synchronizer = TicketSynchronizer()
+        self.synchronizer.update_or_create_instance = MagicMock(
+            return_value=(self.ticket, None))
+
+    def tearDown(self):
+        models.Ticket.objects.all().delete()
+        models.Status.objects.all().delete()
+
+    def test_sends_only_changed_fields(self):
+        # Changed in memory only, so still different from the stored row.
+        self.ticket.summary = 'Printer still on fire'
+        self.synchronizer.update(self.ticket, {
+            'summary': 'Printer still on fire',
+            'status': models.Status.objects.get(id=2),
+            'on_hold': False,
+        })
+
+        self.synchronizer.client.update.assert_called_once_with(
+            1, {'summary': 'Printer still on fire', 'status_id': 2, 'id': 1})
+
+    def test_no_request_without_changes(self):
+        result = self.synchronizer.update(self.ticket, {
+            'summary': 'Printer on fire', 'status': self.status})
+
+        self.assertIs(result, self.ticket)
+        self.synchronizer.client.update.assert_not_called()
+
+    def test_force_sends_everything(self):
+        self.synchronizer.update(
+            self.ticket, {'summary': 'Printer on fire'}, force=True)
+
+        self.synchronizer.client.update.assert_called_once_with(
+            1, {'summary': 'Printer on fire', 'id': 1})
+
+
+class TestAttachmentSynchronizer(TestCase):
+
+    def setUp(self):
+        status = models.Status.objects.create(id=1, name='New')
+        models.Ticket.objects.create(id=1, summary='Scanner', status=status)
+        with patch.object(AttachmentSynchronizer, 'client_class',
+                          MagicMock()):
+            self.synchronizer = AttachmentSynchronizer(full=True)
+        self.root = tempfile.mkdtemp()
+        self.synchronizer.blob_store = BlobStore(self.root, max_size=1024)
+        self.client = self.synchronizer.client
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        SyncJob.objects.all().delete()
+        models.Attachment.objects.all().delete()
+        models.Ticket.objects.all().delete()
+        models.Status.objects.all().delete()
+
+    def test_sync_ticket_attachments(self):
+        self.client.fetch_resource.return_value = {'attachments': [{
+            'id': 10,
+            'filename': 'scan.pdf',
+            'filesize': 3,
+            'isimage': False,
+            'datecreated': '2024-05-01T10:00:00',
+            'ticket_id': 1,
+        }]}
+
+        self.synchronizer.sync()
+
+        attachment = models.Attachment.objects.get(id=10)
+        self.assertEqual(attachment.filename, 'scan.pdf')
+        self.assertEqual(attachment.ticket_id, 1)
+        self.client.fetch_resource.assert_called_once_with(
+            params={'ticket_id': 1})
+
+    def test_partial_sync_fetches_changed_tickets(self):
+        last_sync = timezone.now()
+        SyncJob.objects.create(
+            entity_name='Attachment', start_time=last_sync, success=True)
+        models.Ticket.objects.filter(id=1).update(
+            modified=last_sync - timezone.timedelta(hours=1))
+        models.Ticket.objects.create(
+            id=2, summary='Copier', status_id=1)
+        self.synchronizer.full = False
+
+        self.assertEqual(list(self.synchronizer.parent_object_ids), [2])
+
+        self.synchronizer.full = True
+        self.assertEqual(
+            sorted(self.synchronizer.parent_object_ids), [1, 2])
+
+    def test_blob_downloaded_once(self):
+        attachment = models.Attachment.objects.create(
+            id=10, filename='scan.pdf', ticket_id=1)
+        self.client.iter_content.return_value = iter([b'%PDF', b'-1.4'])
+
+        with self.synchronizer.open_blob(attachment) as f:
+            self.assertEqual(f.read(), b'%PDF-1.4')
+        attachment = models.Attachment.objects.get(id=10)
+        with self.synchronizer.open_blob(attachment) as f:
+            self.assertEqual(f.read(), b'%PDF-1.4')
+
+        self.client.iter_content.assert_called_once_with(10)
+        self.assertEqual(attachment.blob_digest,
+                         hashlib.sha256(b'%PDF-1.4').hexdigest())
+
+    def test_evicted_blob_downloaded_again(self):
+        attachment = models.Attachment.objects.create(
+            id=10, filename='scan.pdf', ticket_id=1, blob_digest='0' * 64)
+        self.client.iter_content.return_value = iter([b'%PDF'])
+
+        response = self.synchronizer.file_response(
+            attachment, as_attachment=True)
+
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF')
+        self.assertIn('scan.pdf', response['Content-Disposition'])
+        self.client.iter_content.assert_called_once_with(10)
+
+
+class TestTicketAssets(TestCase):
+
+    def setUp(self):
+        status = models.Status.objects.create(id=1, name='New')
+        models.Client.objects.create(id=3, name='Acme')
+        models.Ticket.objects.create(id=1, summary='Laptop', status=status)
+        with patch.object(TicketSynchronizer, 'client_class', MagicMock()), \
+                patch.object(AssetSynchronizer, 'client_class', MagicMock()):
+            self.synchronizer = TicketSynchronizer()
+            self.synchronizer.asset_synchronizer
+        self.client = self.synchronizer.client
+        asset_sync._detail_cache.clear()
+
+    def tearDown(self):
+        models.TicketAsset.objects.all().delete()
+        models.Asset.objects.all().delete()
+        models.Ticket.objects.all().delete()
+        models.Client.objects.all().delete()
+        models.Status.objects.all().delete()
+
+    def test_sync_assets(self):
+        assets_sync = self.synchronizer.asset_synchronizer
+        assets_sync.client.get_page.return_value = {'assets': [
+            {'id': 7, 'inventory_number': 'LT-7', 'key_field': 'Laptop',
+             'client_id': 3},
+            {'id': 8, 'inventory_number': 'PR-8', 'key_field': 'Printer',
+             'client_id': 3},
+        ]}
+
+        assets_sync.sync()
+
+        asset = models.Asset.objects.get(id=7)
+        self.assertEqual(asset.client_id, 3)
+        self.assertEqual(asset.data['inventory_number'], 'LT-7')
+        self.assertEqual(
+            assets_sync.get_stored_assets(client_id=3, search='print'),
+            [models.Asset.objects.get(id=8).data])
+
+    def test_ticket_record_assets_are_read_from_db(self):
+        self.synchronizer._set_ticket_assets({'id': 1, 'assets': [
+            {'id': 7, 'inventory_number': 'LT-7'},
+        ]})
+
+        self.assertEqual(self.synchronizer.fetch_ticket_asset_ids(1), {7})
+        self.assertEqual(
+            self.synchronizer.fetch_ticket_assets(1, include_details=False),
+            [{'id': 7, 'inventory_number': 'LT-7'}])
+        self.client.get_record.assert_not_called()
+
+    def test_unknown_ticket_assets_fetched_once(self):
+        self.client.get_record.return_value = {'id': 1, 'assets': [
+            {'id': 7, 'inventory_number': 'LT-7'},
+        ]}
+
+        self.assertEqual(self.synchronizer.fetch_ticket_asset_ids(1), {7})
+        self.assertEqual(self.synchronizer.fetch_ticket_asset_ids(1), {7})
+
+        self.assertEqual(self.client.get_record.call_count, 1)
+        self.assertTrue(models.Ticket.objects.get(id=1).assets_synced)
+
+    def test_attach_and_detach_start_from_halo(self):
+        self.synchronizer._set_ticket_assets({'id': 1, 'assets': [
+            {'id': 7, 'inventory_number': 'LT-7'},
+        ]})
+        # Asset 9 was linked in Halo since the links were stored.
+        self.client.get_record.return_value = {'id': 1, 'assets': [
+            {'id': 7, 'inventory_number': 'LT-7'},
+            {'id': 9, 'inventory_number': 'MN-9'},
+        ]}
+
+        self.synchronizer.attach_ticket_asset(1, 8, 'PR-8')
+
+        self.client.get_record.assert_called_once_with(1, cached=False)
+        self.client.update.assert_called_once_with(record_id=1, data={
+            'assets': [
+                {'id': 7, 'inventory_number': 'LT-7'},
+                {'id': 9, 'inventory_number': 'MN-9'},
+                {'id': 8, 'inventory_number': 'PR-8'},
+            ]})
+        self.assertEqual(
+            self.synchronizer.fetch_ticket_asset_ids(1), {7, 8, 9})
+
+        self.client.update.reset_mock()
+        self.synchronizer.detach_ticket_asset(1, 7)
+
+        self.client.update.assert_called_once_with(record_id=1, data={
+            'assets': [{'id': 9, 'inventory_number': 'MN-9'}]})
+        self.assertEqual(self.synchronizer.fetch_ticket_asset_ids(1), {9})
+
+    def test_available_assets_details_fetched_once(self):
+        models.Asset.objects.create(id=7, client_id=3, data={'id': 7})
+        models.Asset.objects.create(id=8, client_id=3, data={'id': 8})
+        ticket = models.Ticket.objects.get(id=1)
+        ticket.client_id = 3
+        asset_client = self.synchronizer.asset_synchronizer.client
+        asset_client.get.side_effect = lambda record_id, include_details: {
+            'id': record_id, 'fields': [{'name': 'Serial'}]}
+
+        first = self.synchronizer.fetch_available_assets(ticket)
+        second = self.synchronizer.fetch_available_assets(ticket)
+
+        self.assertEqual(first, second)
+        self.assertEqual([asset['id'] for asset in first], [7, 8])
+        self.assertIn('fields', first[0])
+        self.assertEqual(asset_client.get.call_count, 2)
+
+    def test_failed_details_fall_back_to_stored_asset(self):
+        models.Asset.objects.create(id=7, client_id=3, data={'id': 7})
+        ticket = models.Ticket.objects.get(id=1)
+        ticket.client_id = 3
+        asset_client = self.synchronizer.asset_synchronizer.client
+        asset_client.get.side_effect = APIError('timeout')
+
+        self.assertEqual(self.synchronizer.fetch_available_assets(ticket),
+                         [{'id': 7}])
+
+    def test_asset_details_cached_per_instance_and_copied(self):
+        assets_sync = self.synchronizer.asset_synchronizer
+        assets_sync.client.resource_server = 'https://a.halopsa.com/api/'
+        assets_sync.client.get.side_effect = \
+            lambda record_id, include_details: {'id': record_id, 'tags': []}
+
+        assets_sync.fetch_details([7])[7]['tags'].append('changed')
+        self.assertEqual(assets_sync.fetch_details([7]),
+                         {7: {'id': 7, 'tags': []}})
+        self.assertEqual(assets_sync.client.get.call_count, 1)
+
+        # Another Halo instance has its own asset 7.
+        assets_sync.client.resource_server = 'https://b.halopsa.com/api/'
+        assets_sync.fetch_details([7])
+        self.assertEqual(assets_sync.client.get.call_count, 2)
+
+    def test_unexpected_detail_errors_leave_asset_out(self):
+        assets_sync = self.synchronizer.asset_synchronizer
+        assets_sync.client.get.side_effect = ValueError('bad JSON')
+
+        with self.assertLogs('djpsa.halo.records.asset.sync', 'WARNING'):
+            self.assertEqual(assets_sync.fetch_details([7]), {})
@@ -10,6 +10,8 @@ from django.http import HttpResponse
 from django.conf import settings
 
 from djpsa.halo.records.ticket.sync import TicketSynchronizer
+from djpsa.sync import callback_queue
+from djpsa.utils import get_djpsa_settings
 
 logger = logging.getLogger(__name__)
 
@@ -46,10 +48,29 @@ class CallBackView(views.CsrfExemptMixin,
             logger.error('Error decoding JSON for callback: %s', e)
             return HttpResponse(status=400)
 
-        self.handle(data)
+        record_id = self.get_record_id(data)
+        if record_id is not None and self.sync_class:
+            # Any cached copy of the record is out of date now.
+            self.sync_class.client_class.invalidate_record(record_id)
+
+        djpsa_settings = get_djpsa_settings()
+        if djpsa_settings['queue_callbacks']:
+            # Respond straight away, process_callbacks does the syncing.
+            callback_queue.enqueue(
+                self.entity_type,
+                data,
+                record_id=record_id,
+                debounce=djpsa_settings['callback_debounce_seconds'],
+            )
+        else:
+            self.handle(data)
 
         return HttpResponse(status=200)
 
+    def get_record_id(self, data):
+        record = data.get(self.entity_type)
+        return record.get('id') if isinstance(record, dict) else None
+
     def handle(self, data):
         """
         Do the interesting stuff here, so that it can be overridden in
@@ -61,12 +82,50 @@ class CallBackView(views.CsrfExemptMixin,
             self.callback_handler(data)
         else:
             sync = self.sync_class()
+            record = data.get(self.entity_type)
+            if self.is_stale(sync, record):
+                return
 
-            instance, _ = sync.update_or_create_instance(
-                data.get(self.entity_type))
+            instance, _ = sync.update_or_create_instance(record)
 
             # Sync related records, actions, appointments, etc.
             sync.sync_related(instance)
+            sync.remember_payload(record)
+
+    def is_stale(self, sync, record):
+        """
+        Return True if the callback is a redelivery, or arrived out of order,
+        so there is nothing to do.
+        """
+        if not sync.sync_settings['skip_stale_callbacks'] or \
+                not sync.is_stale(record):
+            return False
+        logger.info('Skipping stale {} callback for {}'.format(
+            self.entity_type, record.get(sync.lookup_key)))
+        return True
+
+    def handle_batch(self, payloads):
+        """
+        Handle several queued callbacks, at most one per record: upsert the
+        records in bulk, then sync the related records of each.
+        """
+        if self.callback_handler:
+            for data in payloads:
+                self.callback_handler(data)
+            return
+
+        sync = self.sync_class()
+        records = [
+            record for record in
+            (data.get(self.entity_type) for data in payloads)
+            if not self.is_stale(sync, record)
+        ]
+        results = sync.bulk_update_or_create_instances(records)
+
+        for instance, _ in results:
+            sync.sync_related(instance)
+        for record in records:
+            sync.remember_payload(record)
 
     @classmethod
     def register_callback_handler(cls, callback_handler):
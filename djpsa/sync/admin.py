@@ -13,7 +13,7 @@ class SyncJobAdmin(admin.ModelAdmin):
     list_display = (
         'id', 'start_time', 'end_time', 'duration_or_zero', 'entity_name',
         'synchronizer_class', 'success', 'added', 'updated', 'skipped',
-        'deleted', 'sync_type',
+        'deleted', 'sync_type', 'queries', 'queries_per_record',
     )
     list_filter = ('sync_type', 'success', 'entity_name', 'synchronizer_class')
 
@@ -40,8 +40,41 @@ class SyncJobAdmin(admin.ModelAdmin):
     duration_or_zero.short_description = 'Duration'
 
 
+@admin.register(models.SyncLease)
+class SyncLeaseAdmin(admin.ModelAdmin):
+    actions = None
+    list_display = ('name', 'owner', 'acquired', 'expires')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(models.CallbackEvent)
+class CallbackEventAdmin(admin.ModelAdmin):
+    actions = None
+    list_display = (
+        'id', 'entity_type', 'received', 'available_at', 'attempts',
+        'last_error',
+    )
+    list_filter = ('entity_type',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(UDFDefinition)
 class UDFDefinitionAdmin(admin.ModelAdmin):
     list_display = ('name', 'display', 'record_type', 'udf_type', 'data_type')
     search_fields = ['name', 'display']
     list_filter = ('record_type', 'data_type')
+
+
+@admin.register(models.SyncTuning)
+class SyncTuningAdmin(admin.ModelAdmin):
+    list_display = ('entity_name', 'page_size', 'updated')
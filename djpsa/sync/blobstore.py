@@ -0,0 +1,186 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from djpsa.utils import get_djpsa_settings
+
+logger = logging.getLogger(__name__)
+
+FILE_UMASK = 0o022
+TMP_DIR = 'tmp'
+TMP_SUFFIX = '.tmp'
+# Seconds after which a temporary file is taken to be left over from a
+# write that died, and removed.
+TMP_MAX_AGE = 60 * 60
+# Seconds between recounting the store's size, as other processes write to
+# it too.
+RESCAN_INTERVAL = 5 * 60
+
+
+class BlobStore:
+    """
+    Files on local disk, named by the SHA-256 of their content, so the same
+    content is only ever stored once.
+
+    The store is kept under max_size bytes by removing the least recently
+    used blobs. Its size is counted once and then tracked as blobs are
+    written, so the tree is only walked when it's over max_size, or every
+    RESCAN_INTERVAL seconds. Reading a blob through open() marks it used.
+    Removing a blob that is open elsewhere is safe, the reader keeps its
+    copy until it closes the file.
+    """
+
+    def __init__(self, root=None, max_size=None):
+        djpsa_settings = get_djpsa_settings()
+        self.root = root or djpsa_settings['blob_store_dir'] or \
+            os.path.join(tempfile.gettempdir(), 'djpsa_blobs')
+        self.max_size = max_size or djpsa_settings['blob_store_max_bytes']
+        self._evict_lock = threading.Lock()
+        # Tracked size in bytes, None until counted.
+        self._size = None
+        self._counted_at = 0
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest):
+        return bool(digest) and os.path.exists(self.path(digest))
+
+    def touch(self, digest):
+        """Mark the blob as used. Return False if it isn't stored."""
+        try:
+            os.utime(self.path(digest))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def open(self, digest):
+        """
+        Open the blob for reading. Raises FileNotFoundError if it isn't
+        stored, i.e. it was evicted.
+        """
+        f = open(self.path(digest), 'rb')
+        self.touch(digest)
+        return f
+
+    def write(self, chunks):
+        """
+        Store the content from an iterable of bytes, without holding more
+        than a chunk in memory. Return its (digest, size).
+        """
+        tmp_dir = os.path.join(self.root, TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        sha = hashlib.sha256()
+        size = 0
+        previous_umask = os.umask(FILE_UMASK)
+        try:
+            with tempfile.NamedTemporaryFile(
+                    dir=tmp_dir, suffix=TMP_SUFFIX, delete=False) as f:
+                tmp_path = f.name
+                try:
+                    for chunk in chunks:
+                        sha.update(chunk)
+                        size += len(chunk)
+                        f.write(chunk)
+                except BaseException:
+                    f.close()
+                    os.remove(tmp_path)
+                    raise
+        finally:
+            os.umask(previous_umask)
+
+        digest = sha.hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            # Already stored, keep the existing copy.
+            os.remove(tmp_path)
+            self.touch(digest)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            with self._evict_lock:
+                if self._size is not None:
+                    self._size += size
+
+        if self._size is None or self._size > self.max_size or \
+                time.monotonic() - self._counted_at > RESCAN_INTERVAL:
+            self.evict(keep=digest)
+        return digest, size
+
+    def _blobs(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if os.path.basename(dirpath) == TMP_DIR:
+                self._remove_stale_tmp(dirpath, filenames)
+                continue
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield filename, stat.st_mtime, stat.st_size
+
+    def _remove_stale_tmp(self, dirpath, filenames):
+        cutoff = time.time() - TMP_MAX_AGE
+        for filename in filenames:
+            if not filename.endswith(TMP_SUFFIX):
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def size(self):
+        """Return the total size of the stored blobs in bytes."""
+        return sum(size for _, _, size in self._blobs())
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used blobs until the store fits in
+        max_size, except the keep digest, and temporary files left over
+        from failed writes. Return the number of blobs removed.
+        """
+        with self._evict_lock:
+            blobs = sorted(self._blobs(), key=lambda blob: blob[1])
+            total = sum(size for _, _, size in blobs)
+            removed = 0
+            for digest, _, size in blobs:
+                if total <= self.max_size:
+                    break
+                if digest == keep:
+                    continue
+                try:
+                    os.remove(self.path(digest))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            self._size = total
+            self._counted_at = time.monotonic()
+
+        if removed:
+            logger.debug('Evicted {} blobs from {}.'.format(
+                removed, self.root))
+        return removed
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_blob_store():
+    """Return this process' shared store for the blob_store_dir setting."""
+    djpsa_settings = get_djpsa_settings()
+    key = (djpsa_settings['blob_store_dir'],
+           djpsa_settings['blob_store_max_bytes'])
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = BlobStore(*key)
+        return store
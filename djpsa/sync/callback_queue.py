@@ -0,0 +1,169 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from djpsa.sync.models import CallbackEvent
+
+logger = logging.getLogger(__name__)
+
+# Seconds a worker has to process a claimed event before other workers may
+# claim it again.
+CLAIM_TIMEOUT = 300
+# Seconds before the first retry of a failed event, doubled for each
+# further attempt up to MAX_RETRY_DELAY.
+RETRY_DELAY = 60
+MAX_RETRY_DELAY = 3600
+
+
+def enqueue(entity_type, payload, record_id=None, debounce=0):
+    """
+    Store a received callback for the process_callbacks command.
+
+    The event isn't processed for debounce seconds, so that further events
+    for the same record in the meantime are coalesced with it.
+    """
+    now = timezone.now()
+    return CallbackEvent.objects.create(
+        entity_type=entity_type,
+        record_id='' if record_id is None else str(record_id),
+        payload=payload,
+        received=now,
+        available_at=now + timedelta(seconds=debounce),
+    )
+
+
+def claim(owner, max_attempts, batch_size=100, claim_timeout=CLAIM_TIMEOUT):
+    """
+    Claim up to batch_size events that are due, oldest first. Claimed events
+    are hidden from other workers until claim_timeout has passed, so events
+    claimed by a worker that died are picked up again.
+    """
+    now = timezone.now()
+    due = CallbackEvent.objects.filter(
+        available_at__lte=now, attempts__lt=max_attempts)
+    ids = list(due.order_by('id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    # The update only matches events still due, so when workers race for
+    # the same events each one gets the ones it actually updated.
+    until = now + timedelta(seconds=claim_timeout)
+    due.filter(id__in=ids).update(claimed_by=owner, available_at=until)
+    claimed = list(CallbackEvent.objects.filter(
+        id__in=ids, claimed_by=owner, available_at__gt=now))
+
+    # Also claim later events for the same records that are still in their
+    # debounce window, as they supersede the due ones.
+    records = defaultdict(set)
+    for event in claimed:
+        if event.record_id:
+            records[event.entity_type].add(event.record_id)
+    for entity_type, record_ids in records.items():
+        pending = CallbackEvent.objects.filter(
+            entity_type=entity_type, record_id__in=record_ids,
+            claimed_by='', attempts__lt=max_attempts,
+        ).exclude(id__in=ids)
+        pending_ids = list(pending.values_list('id', flat=True))
+        if pending_ids:
+            pending.filter(id__in=pending_ids).update(
+                claimed_by=owner, available_at=until)
+            claimed.extend(CallbackEvent.objects.filter(
+                id__in=pending_ids, claimed_by=owner, available_at__gt=now))
+
+    return sorted(claimed, key=lambda event: event.id)
+
+
+def coalesce(events):
+    """
+    Keep the latest event for each record, deleting the ones it supersedes.
+    Return the remaining events in order, and the number deleted.
+    """
+    latest = {}
+    for event in events:
+        key = (event.entity_type, event.record_id or 'event:{}'.format(
+            event.id))
+        if key not in latest or event.id > latest[key].id:
+            latest[key] = event
+
+    kept = sorted(latest.values(), key=lambda event: event.id)
+    kept_ids = {event.id for event in kept}
+    superseded = [event.id for event in events if event.id not in kept_ids]
+    if superseded:
+        CallbackEvent.objects.filter(id__in=superseded).delete()
+    return kept, len(superseded)
+
+
+def complete(event):
+    event.delete()
+
+
+def fail(event, error):
+    """Record the failure and make the event available for a retry later."""
+    event.attempts += 1
+    event.last_error = str(error)
+    event.claimed_by = ''
+    delay = min(RETRY_DELAY * 2 ** (event.attempts - 1), MAX_RETRY_DELAY)
+    event.available_at = timezone.now() + timedelta(seconds=delay)
+    event.save(update_fields=[
+        'attempts', 'last_error', 'claimed_by', 'available_at'])
+
+
+def process(event, handlers):
+    """
+    Pass the event's payload to the handler for its entity type. Return True
+    if it was handled.
+    """
+    handler = handlers.get(event.entity_type)
+    try:
+        if handler is None:
+            raise ValueError(
+                'No handler for {} callbacks.'.format(event.entity_type))
+        handler(event.payload)
+    except Exception as e:
+        logger.exception('Failed to process {} callback {}: {}'.format(
+            event.entity_type, event.id, e))
+        fail(event, e)
+        return False
+
+    complete(event)
+    return True
+
+
+def process_batch(events, handlers, batch_handlers):
+    """
+    Coalesce the events, then pass the payloads for each entity type to its
+    batch handler at once. Events without a batch handler, or from a batch
+    that failed, are processed one at a time.
+
+    Return the number of events handled, coalesced and failed.
+    """
+    events, coalesced = coalesce(events)
+    by_type = defaultdict(list)
+    for event in events:
+        by_type[event.entity_type].append(event)
+
+    handled = failed = 0
+    for entity_type, type_events in by_type.items():
+        batch_handler = batch_handlers.get(entity_type)
+        if batch_handler and len(type_events) > 1:
+            try:
+                batch_handler([event.payload for event in type_events])
+            except Exception as e:
+                logger.warning(
+                    'Batch of {} {} callbacks failed, processing them one '
+                    'at a time: {}'.format(len(type_events), entity_type, e))
+            else:
+                CallbackEvent.objects.filter(
+                    id__in=[event.id for event in type_events]).delete()
+                handled += len(type_events)
+                continue
+
+        for event in type_events:
+            if process(event, handlers):
+                handled += 1
+            else:
+                failed += 1
+
+    return handled, coalesced, failed
@@ -1,12 +1,55 @@
+import re
+
+SCHEDULE_UNITS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 60 * 60,
+    'day': 24 * 60 * 60,
+    'week': 7 * 24 * 60 * 60,
+}
+SCHEDULE_WORDS = {
+    'hourly': SCHEDULE_UNITS['hour'],
+    'daily': SCHEDULE_UNITS['day'],
+    'weekly': SCHEDULE_UNITS['week'],
+}
+SCHEDULE_RE = re.compile(
+    r'every\s+(?:(\d+)\s*)?(second|minute|hour|day|week)s?\b',
+    re.IGNORECASE
+)
+
+
+def parse_schedule(schedule):
+    """
+    Return the interval in seconds described by a schedule such as
+    "Every 5 minutes.", "Every hour" or "Daily", or None if it can't be
+    parsed.
+    """
+    if not schedule:
+        return None
+    match = SCHEDULE_RE.search(schedule)
+    if match:
+        count = int(match.group(1) or 1)
+        return count * SCHEDULE_UNITS[match.group(2).lower()]
+    return SCHEDULE_WORDS.get(schedule.strip(' .').lower())
+
+
 class SyncGrade:
     description = ""
     synchronizers = []
     # For app to describe the frequency of use. (ie "Every 5 minutes.")
+    # The sync daemon runs the grade at this interval.
     schedule = ""
 
-    def __init__(self, description=None, synchronizers=None):
+    def __init__(self, description=None, synchronizers=None, schedule=None):
         self.description = description
         self.synchronizers = synchronizers if synchronizers is not None else []
+        if schedule is not None:
+            self.schedule = schedule
+
+    @property
+    def interval(self):
+        """The schedule in seconds, or None if it has no usable schedule."""
+        return parse_schedule(self.schedule)
 
 
 class SyncGrades:
@@ -23,7 +66,8 @@ class SyncGrades:
                 """Resources that are useful to keep up-to-date at high
                    frequency and can be retrieved by limiting to those which
                    have changed recently.""",
-                []
+                [],
+                'Every 5 minutes.'
             ),
             # Synchronizers for resources that change throughout a typical
             # day. For example, tickets, service calls, notes, etc.
@@ -31,27 +75,31 @@ class SyncGrades:
             # sync.
             'operational': SyncGrade(
                 """Resources that change throughout a day.""",
-                []
+                [],
+                'Every hour.'
             ),
             # Synchronizers for resources that change infrequently- such as
             # on a weekly or monthly basis. For example, ticket types,
             # statuses, priorities, etc.
             'configuration': SyncGrade(
                 """Resources that change infrequently.""",
-                []
+                [],
+                'Every day.'
             ),
             # Synchronizers for resources that can potentially take a very long
             # time to sync. For example, notes, time entries, etc.
             'slow': SyncGrade(
                 """Resources that can take a long time to retrieve.""",
-                []
+                [],
+                'Every day.'
             ),
             # Synchronizers for resources that can take an unbelievable
             # amount of time to sync, so much it makes you cry.
             'ludicrous_slow': SyncGrade(
                 """Resources that can take an unbelievable amount of time
                    to retrieve.""",
-                []
+                [],
+                'Every week.'
             ),
         }
 
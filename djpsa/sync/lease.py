@@ -0,0 +1,236 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction, connections
+from django.utils import timezone
+
+from djpsa.sync.models import SyncLease
+from djpsa.utils import get_djpsa_settings, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+REDIS = 'redis'
+DB = 'db'
+
+# Follow-up runs requested from the lease holder. A full request replaces a
+# partial one, never the other way around.
+FULL = 'full'
+PARTIAL = 'partial'
+
+# Record a follow-up request only while the lease is held, in one step, so
+# a request can't be left behind by a holder that released in between.
+# KEYS: lease, follow-up. ARGV: FULL or PARTIAL.
+REQUEST_FOLLOW_UP_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 0 then
+    return 0
+end
+if ARGV[1] == 'full' then
+    redis.call('set', KEYS[2], ARGV[1])
+else
+    redis.call('set', KEYS[2], ARGV[1], 'NX')
+end
+return 1
+"""
+
+
+def default_owner():
+    """Identify this process, for the lease holder shown in the admin."""
+    return '{}:{}:{}'.format(
+        socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+
+
+class Lease:
+    """
+    A named lock held for ttl seconds at a time, which the holder must
+    renew before it expires. If the holder dies, the lease expires and
+    another process can take it over.
+    """
+
+    def __init__(self, name, ttl, owner=None):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or default_owner()
+        self.lost = False
+
+    def acquire(self):
+        """Take the lease, or renew it if already held. Return True if held."""
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def renew(self):
+        """Extend the lease. Return False if it is no longer held."""
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def release(self):
+        """
+        Release the lease. Return any follow-up requested and not yet
+        popped, which the caller is now responsible for.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def request_follow_up(self, full=False):
+        """
+        Ask the current holder to run again when it finishes. Return False if
+        nobody holds the lease, in which case the caller should try to take
+        it instead.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def pop_follow_up(self):
+        """Return and clear the pending request, FULL, PARTIAL or None."""
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    @contextmanager
+    def keep_alive(self, interval=None):
+        """
+        Renew the lease from a background thread until the block exits.
+        Sets lost if a renewal fails.
+        """
+        interval = interval or self.ttl / 3
+        stop = threading.Event()
+
+        def renew_loop():
+            try:
+                while not stop.wait(interval):
+                    if not self.renew():
+                        logger.warning(
+                            'Lost lease {} held by {}.'.format(
+                                self.name, self.owner))
+                        self.lost = True
+                        return
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(
+            target=renew_loop, name='lease-{}'.format(self.name),
+            daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+
+
+class RedisLease(Lease):
+
+    def __init__(self, name, ttl, owner=None):
+        super().__init__(name, ttl, owner)
+        # Not thread local, so keep_alive can renew from its own thread.
+        self._lock = get_redis_client().lock(
+            name, timeout=ttl, thread_local=False)
+
+    def acquire(self):
+        if self._lock.owned():
+            return self.renew()
+        self.lost = False
+        return bool(self._lock.acquire(blocking=False, token=self.owner))
+
+    def renew(self):
+        try:
+            return bool(self._lock.extend(self.ttl, replace_ttl=True))
+        except Exception as e:
+            logger.debug('Failed to renew lease {}: {}'.format(self.name, e))
+            return False
+
+    def release(self):
+        try:
+            self._lock.release()
+        except Exception:
+            # Expired or taken over, either way not ours to release.
+            pass
+        # Requests made before the release saw the lease held and rely on
+        # us, later ones take the lease themselves.
+        return self.pop_follow_up()
+
+    @property
+    def follow_up_key(self):
+        return '{}:follow_up'.format(self.name)
+
+    def request_follow_up(self, full=False):
+        return bool(get_redis_client().eval(
+            REQUEST_FOLLOW_UP_SCRIPT, 2, self.name, self.follow_up_key,
+            FULL if full else PARTIAL))
+
+    def pop_follow_up(self):
+        pipe = get_redis_client().pipeline(transaction=True)
+        pipe.get(self.follow_up_key)
+        pipe.delete(self.follow_up_key)
+        value, _ = pipe.execute()
+        return value.decode() if value else None
+
+
+class DBLease(Lease):
+    """A lease stored in the SyncLease table, for use without Redis."""
+
+    def _expires(self):
+        return timezone.now() + timedelta(seconds=self.ttl)
+
+    def acquire(self):
+        if self.renew():
+            return True
+
+        now = timezone.now()
+        taken = SyncLease.objects.filter(
+            name=self.name, expires__lt=now,
+        ).update(owner=self.owner, expires=self._expires(), acquired=now)
+        if taken:
+            self.lost = False
+            return True
+
+        try:
+            with transaction.atomic():
+                SyncLease.objects.create(
+                    name=self.name, owner=self.owner,
+                    expires=self._expires(), acquired=now)
+        except IntegrityError:
+            # Someone else holds it.
+            return False
+        self.lost = False
+        return True
+
+    def renew(self):
+        return bool(SyncLease.objects.filter(
+            name=self.name, owner=self.owner
+        ).update(expires=self._expires()))
+
+    def release(self):
+        leases = SyncLease.objects.filter(name=self.name, owner=self.owner)
+        while True:
+            value = leases.values_list('follow_up', flat=True).first()
+            if value is None:
+                return None
+            # Only delete if nobody requested a follow-up since we read it.
+            if leases.filter(follow_up=value).delete()[0]:
+                return value or None
+
+    def request_follow_up(self, full=False):
+        leases = SyncLease.objects.filter(name=self.name)
+        if full:
+            return bool(leases.update(follow_up=FULL))
+        leases.exclude(follow_up=FULL).update(follow_up=PARTIAL)
+        return leases.exists()
+
+    def pop_follow_up(self):
+        leases = SyncLease.objects.filter(name=self.name, owner=self.owner)
+        while True:
+            value = leases.values_list('follow_up', flat=True).first()
+            if not value:
+                return None
+            # Only clear the value we read, in case it was just upgraded.
+            if leases.filter(follow_up=value).update(follow_up=''):
+                return value
+
+
+def get_lease(name, ttl, owner=None, backend=None):
+    """
+    Return a lease using the lease_backend setting, either 'db' or 'redis'.
+    """
+    backend = backend or get_djpsa_settings().get('lease_backend', DB)
+    if backend == REDIS:
+        return RedisLease(name, ttl, owner)
+    return DBLease(name, ttl, owner)
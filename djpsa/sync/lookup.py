@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+import uuid
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_VERSION_CACHE_NAME = 'djpsa_lookup_version:{}'
+# Seconds between checks of the shared version key. Misses always check
+# the version straight away, so this only bounds how long another process'
+# updates to existing rows, or rows it creates after a miss, can go unseen.
+VERSION_CHECK_INTERVAL = 5
+
+_MISSING = object()
+
+
+class LookupCache:
+    """
+    In-process cache of a small, rarely changing table, indexed by id and
+    by name.
+
+    The rows are loaded once and kept until the table's version, a key in
+    the Django cache, changes. Synchronizers bump the version when they
+    write changes, as does saving or deleting a row of a registered model,
+    so every process reloads on its next check.
+
+    The instances returned are shared by every thread in the process, so
+    they must not be changed. Copy one, or fetch it from the DB, to change
+    it.
+    """
+
+    def __init__(self, model_class, name_field='name'):
+        self.model_class = model_class
+        self.name_field = name_field
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked = 0
+        self._by_id = {}
+        self._by_name = {}
+        # When each key was last missing from the DB.
+        self._misses = {}
+
+    @property
+    def version_cache_name(self):
+        return LOOKUP_VERSION_CACHE_NAME.format(
+            self.model_class._meta.label_lower)
+
+    def _current_version(self):
+        version = cache.get(self.version_cache_name)
+        if version is None:
+            # The key was never set or has been evicted. Either way nobody
+            # can vouch for what is loaded, so start a new version.
+            version = uuid.uuid4().hex
+            cache.add(self.version_cache_name, version, None)
+            version = cache.get(self.version_cache_name, version)
+        return version
+
+    def _load(self, force_check=False):
+        now = time.monotonic()
+        if self._version is not None and not force_check and \
+                now - self._checked < VERSION_CHECK_INTERVAL:
+            return False
+
+        version = self._current_version()
+        self._checked = now
+        if version == self._version:
+            return False
+
+        with self._lock:
+            by_id = {}
+            by_name = {}
+            for instance in self.model_class.objects.order_by('pk'):
+                by_id[instance.pk] = instance
+                by_name.setdefault(
+                    getattr(instance, self.name_field), instance)
+            self._by_id = by_id
+            self._by_name = by_name
+            self._misses = {}
+            self._version = version
+
+        logger.debug('Loaded {} {} lookups'.format(
+            len(by_id), self.model_class.__name__))
+        return True
+
+    def _lookup(self, index_name, key, field_name):
+        self._load()
+        instance = getattr(self, index_name).get(key, _MISSING)
+        if instance is not _MISSING:
+            return instance
+
+        missed = self._misses.get((index_name, key))
+        if missed is not None and \
+                time.monotonic() - missed < VERSION_CHECK_INTERVAL:
+            return None
+
+        if self._load(force_check=True):
+            instance = getattr(self, index_name).get(key, _MISSING)
+            if instance is not _MISSING:
+                return instance
+
+        # Not loaded yet- i.e. created by another process within the check
+        # interval. Fall back to the DB, and remember the answer until the
+        # next reload, or a miss for up to the check interval.
+        instance = self.model_class.objects.filter(
+            **{field_name: key}).order_by('pk').first()
+        if instance is None:
+            self._misses[(index_name, key)] = time.monotonic()
+        else:
+            getattr(self, index_name)[key] = instance
+        return instance
+
+    def get(self, pk):
+        """Return the instance with the given pk, or None."""
+        if pk is None:
+            return None
+        return self._lookup('_by_id', pk, 'pk')
+
+    def get_by_name(self, name):
+        """Return the first instance with the given name, or None."""
+        if name is None:
+            return None
+        return self._lookup('_by_name', name, self.name_field)
+
+    def all(self):
+        self._load()
+        return list(self._by_id.values())
+
+    def invalidate(self):
+        """Start a new version, so every process reloads."""
+        cache.set(self.version_cache_name, uuid.uuid4().hex, None)
+        self._version = None
+
+
+class LookupRegistry:
+
+    def __init__(self):
+        self._caches = {}
+
+    def register(self, model_class, name_field='name'):
+        """
+        Cache the model's rows. Call once the app registry is ready, i.e.
+        from AppConfig.ready, so its proxy models are known.
+        """
+        model_class = model_class._meta.concrete_model
+        self._caches[model_class] = LookupCache(model_class, name_field)
+        # Proxy models, i.e. trackers, send signals as themselves.
+        for model in apps.get_models():
+            if model._meta.concrete_model is not model_class:
+                continue
+            label = model._meta.label_lower
+            post_save.connect(
+                self._changed, sender=model, weak=False,
+                dispatch_uid='djpsa_lookup_save:{}'.format(label))
+            post_delete.connect(
+                self._changed, sender=model, weak=False,
+                dispatch_uid='djpsa_lookup_delete:{}'.format(label))
+
+    def _changed(self, sender, **kwargs):
+        # Writes outside a sync, i.e. callbacks or the admin. Bulk writes
+        # send no signals, Synchronizer.sync invalidates after those.
+        lookup = self.get(sender)
+        if lookup:
+            transaction.on_commit(lookup.invalidate)
+
+    def get(self, model_class):
+        """Return the LookupCache for the model, or None if not cached."""
+        return self._caches.get(model_class._meta.concrete_model)
+
+    def invalidate(self, model_class):
+        lookup = self.get(model_class)
+        if lookup:
+            lookup.invalidate()
+
+
+lookups = LookupRegistry()
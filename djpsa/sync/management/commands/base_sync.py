@@ -2,15 +2,23 @@ from django.core.management.base import BaseCommand, CommandError
 from django.utils.translation import gettext_lazy as _
 
 from djpsa.api import exceptions as exc
+from djpsa.sync.profiling import SyncProfiler
+from djpsa.sync.scheduler import SyncScheduler
+from djpsa.sync.sync import CoalescedCounts
+from djpsa.utils import get_djpsa_settings
 
 OPTION_NAME = 'sync_object'
+DEFAULT_PROFILE_OUTPUT = 'sync_profile'
 
 
 class BaseSyncCommand(BaseCommand):
     help = 'Synchronize'
+    # SyncGrades class, for the --grade option.
+    sync_grades_class = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.profiler = None
 
     def add_arguments(self, parser):
         parser.add_argument(OPTION_NAME, nargs='?', type=str)
@@ -18,12 +26,43 @@ class BaseSyncCommand(BaseCommand):
                             action='store_true',
                             dest='full',
                             default=False)
+        parser.add_argument('--grade',
+                            help='Sync every synchronizer in the given '
+                                 'grade, i.e. operational.')
+        parser.add_argument('--workers',
+                            type=int,
+                            help='Number of synchronizers to run at once. '
+                                 'Synchronizers wait for the ones their '
+                                 'records relate to.')
+        parser.add_argument('--profile',
+                            action='store_true',
+                            default=False,
+                            help='Run each synchronizer under cProfile and '
+                                 'write stats files to --profile-output.')
+        parser.add_argument('--profile-output',
+                            default=DEFAULT_PROFILE_OUTPUT,
+                            help='Directory for profile stats files.')
+        parser.add_argument('--profile-memory',
+                            action='store_true',
+                            default=False,
+                            help='Also report peak memory and top '
+                                 'allocations for each page. Implies '
+                                 '--profile.')
 
     def sync_by_class(self, sync_class, obj_name, full_option=False):
         synchronizer = sync_class(full=full_option)
 
-        created_count, updated_count, skipped_count, deleted_count = \
-            synchronizer.sync()
+        if self.profiler:
+            with self.profiler.profile(synchronizer):
+                counts = synchronizer.sync()
+        else:
+            counts = synchronizer.sync()
+
+        if isinstance(counts, CoalescedCounts):
+            msg = _('{} Sync already running, it will run again when done.')
+            self.stdout.write(msg.format(obj_name))
+            return
+        created_count, updated_count, skipped_count, deleted_count = counts
 
         msg = _('{} Sync Summary - Created: {}, Updated: {}, Skipped: {}')
         fmt_msg = msg.format(obj_name, created_count, updated_count,
@@ -37,12 +76,54 @@ class BaseSyncCommand(BaseCommand):
 
         self.stdout.write(fmt_msg)
 
+    def get_sync_grades(self):
+        """
+        Return the SyncGrades for --grade. Override to pass a filter_cb.
+        """
+        return self.sync_grades_class()
+
+    def get_grade_sync_classes(self, grade_key):
+        if not self.sync_grades_class:
+            raise CommandError(_('This command has no sync grades.'))
+
+        grades = self.get_sync_grades()
+        grade = grades.get_grade(grade_key)
+        if grade is None:
+            msg = _('Invalid grade {}, choose one of the following: \n{}')
+            raise CommandError(
+                msg.format(grade_key, ', '.join(grades.grades.keys())))
+
+        return self.named_sync_classes(grade.synchronizers)
+
+    def named_sync_classes(self, synchronizers):
+        """Pair each synchronizer class with its name from the map."""
+        names = {
+            sync_class: obj_name
+            for sync_class, obj_name in self.synchronizer_map.values()
+        }
+        return [
+            (sync_class, names.get(sync_class, sync_class.__name__))
+            for sync_class in synchronizers
+        ]
+
     def handle(self, *args, **options):
         sync_classes = []
         object_arg = options[OPTION_NAME]
         full_option = options.get('full', False)
+        workers = options.get('workers') or \
+            get_djpsa_settings().get('sync_workers', 1)
 
-        if object_arg:
+        if options.get('profile') or options.get('profile_memory'):
+            self.profiler = SyncProfiler(
+                options['profile_output'],
+                trace_memory=options.get('profile_memory', False),
+            )
+            # tracemalloc is process wide, so profile one at a time.
+            workers = 1
+
+        if options.get('grade'):
+            sync_classes = self.get_grade_sync_classes(options['grade'])
+        elif object_arg:
             object_arg = object_arg
             sync_tuple = self.synchronizer_map.get(object_arg)
 
@@ -57,29 +138,40 @@ class BaseSyncCommand(BaseCommand):
         else:
             sync_classes = self.synchronizer_map.values()
 
-        failed_classes = 0
-        error_messages = ''
+        self.run_synchronizers(sync_classes, full_option, workers)
 
-        for sync_class, obj_name in sync_classes:
+    def run_synchronizers(self, sync_classes, full_option=False, workers=1):
+        """
+        Sync each (sync_class, obj_name), raising CommandError if any fail.
+        """
+        names = dict(sync_classes)
+        failures = []
+        error_messages = []
+
+        def run(sync_class):
+            obj_name = names[sync_class]
             try:
                 self.sync_by_class(sync_class, obj_name,
                                    full_option=full_option)
             except exc.SecurityPermissionsException as e:
                 msg = 'Failed to sync {}: {}'.format(obj_name, e)
                 self.stderr.write(msg)
-                error_messages += '{}\n'.format(msg)
+                error_messages.append(msg)
 
             except exc.APIError as e:
                 msg = 'Failed to sync {}: {}'.format(obj_name, e)
                 self.stderr.write(msg)
-                error_messages += '{}\n'.format(msg)
-                failed_classes += 1
+                error_messages.append(msg)
+                failures.append(sync_class)
+
+        SyncScheduler(names.keys(), workers=workers).run(run)
 
+        failed_classes = len(failures)
         if failed_classes > 0:
             msg = '{} class{} failed to sync.\n'.format(
                 failed_classes,
                 '' if failed_classes == 1 else 'es',
             )
             msg += 'Errors:\n'
-            msg += error_messages
+            msg += ''.join('{}\n'.format(m) for m in error_messages)
             raise CommandError(msg)
@@ -0,0 +1,163 @@
+import logging
+import signal
+import threading
+import time
+
+import requests
+from django.core.management.base import CommandError
+from django.db import close_old_connections
+from django.utils.translation import gettext_lazy as _
+
+from djpsa.api.client import APIClient
+from djpsa.sync.lease import get_lease
+from djpsa.sync.management.commands.base_sync import BaseSyncCommand
+from djpsa.utils import get_djpsa_settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait between attempts to take the lease from another daemon.
+STANDBY_POLL_INTERVAL = 30
+
+
+class BaseSyncDaemonCommand(BaseSyncCommand):
+    """
+    Keep one process running that syncs each grade on the interval from its
+    schedule, so the HTTP session, token and lookup caches stay warm between
+    syncs.
+
+    Only the daemon holding the lease syncs, the others stand by to take
+    over if it stops renewing.
+    """
+    help = 'Run each sync grade on its schedule until stopped.'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stop_event = threading.Event()
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grade',
+                            action='append',
+                            dest='grades',
+                            help='Only run the given grade. May be repeated.')
+        parser.add_argument('--full-grade',
+                            action='append',
+                            dest='full_grades',
+                            help='Run the given grade as a full sync. May be '
+                                 'repeated. Defaults to the '
+                                 'sync_daemon_full_grades setting.')
+        parser.add_argument('--workers',
+                            type=int,
+                            help='Number of synchronizers to run at once.')
+        parser.add_argument('--once',
+                            action='store_true',
+                            default=False,
+                            help='Run every grade once, then exit.')
+
+    def get_schedule(self, grade_keys=None):
+        """
+        Return a dict of grade key to (grade, interval) for the grades with
+        synchronizers and a schedule.
+        """
+        grades = self.get_sync_grades()
+        schedule = {}
+        for grade_key in grade_keys or grades.grades.keys():
+            grade = grades.get_grade(grade_key)
+            if grade is None:
+                msg = _('Invalid grade {}, choose one of the following: \n{}')
+                raise CommandError(
+                    msg.format(grade_key, ', '.join(grades.grades.keys())))
+            if not grade.synchronizers:
+                continue
+            if grade.interval is None:
+                logger.warning(
+                    'Grade {} has no usable schedule ({!r}), '
+                    'skipping.'.format(grade_key, grade.schedule))
+                continue
+            schedule[grade_key] = (grade, grade.interval)
+        return schedule
+
+    def handle(self, *args, **options):
+        if not self.sync_grades_class:
+            raise CommandError(_('This command has no sync grades.'))
+
+        djpsa_settings = get_djpsa_settings()
+        workers = options.get('workers') or \
+            djpsa_settings.get('sync_workers', 1)
+        full_grades = options.get('full_grades') or \
+            djpsa_settings.get('sync_daemon_full_grades', ())
+        schedule = self.get_schedule(options.get('grades'))
+        if not schedule:
+            raise CommandError(_('No grades to run.'))
+
+        lease = get_lease(
+            djpsa_settings.get('sync_daemon_lease_name', 'djpsa_sync_daemon'),
+            djpsa_settings.get('sync_daemon_lease_ttl', 300),
+        )
+        previous_handlers = self._install_signal_handlers()
+
+        # Reuse connections for every request made by this process.
+        APIClient.session = requests.Session()
+        next_runs = {grade_key: 0 for grade_key in schedule}
+
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                if not lease.acquire():
+                    logger.info(
+                        'Lease {} is held by another daemon, standing '
+                        'by.'.format(lease.name))
+                    if options.get('once'):
+                        return
+                    self.stop_event.wait(STANDBY_POLL_INTERVAL)
+                    continue
+
+                with lease.keep_alive():
+                    for grade_key, (grade, interval) in schedule.items():
+                        if self.stop_event.is_set() or lease.lost:
+                            break
+                        if next_runs[grade_key] > time.monotonic():
+                            continue
+                        next_runs[grade_key] = time.monotonic() + interval
+                        self.run_grade(grade_key, grade,
+                                       grade_key in full_grades, workers)
+
+                if options.get('once'):
+                    return
+
+                wait = min(next_runs.values()) - time.monotonic()
+                # Wake up to renew the lease while idle.
+                self.stop_event.wait(
+                    max(0, min(wait, lease.ttl / 3)))
+        finally:
+            lease.release()
+            APIClient.session.close()
+            APIClient.session = None
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    def run_grade(self, grade_key, grade, full_option, workers):
+        self.stdout.write('Running grade {}'.format(grade_key))
+        sync_classes = self.named_sync_classes(grade.synchronizers)
+        try:
+            self.run_synchronizers(sync_classes, full_option, workers)
+        except CommandError as e:
+            # Already written to stderr. Keep the daemon running, the grade
+            # is retried at its next interval.
+            logger.error('Grade {} failed: {}'.format(grade_key, e))
+        except Exception as e:
+            logger.exception('Grade {} failed: {}'.format(grade_key, e))
+
+    def _install_signal_handlers(self):
+        """Stop on SIGTERM or SIGINT. Return the previous handlers."""
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+
+        def stop(signum, frame):
+            logger.info('Received signal {}, stopping after the current '
+                        'grade.'.format(signum))
+            self.stop_event.set()
+
+        return {
+            signum: signal.signal(signum, stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
@@ -0,0 +1,103 @@
+import logging
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from djpsa.sync import callback_queue
+from djpsa.sync.lease import default_owner
+from djpsa.utils import get_djpsa_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 5
+DEFAULT_BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = 'Process queued callbacks until stopped.'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stop_event = threading.Event()
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once',
+                            action='store_true',
+                            default=False,
+                            help='Process the events that are due, then '
+                                 'exit.')
+        parser.add_argument('--batch-size',
+                            type=int,
+                            default=DEFAULT_BATCH_SIZE,
+                            help='Number of events to claim at a time.')
+        parser.add_argument('--poll-interval',
+                            type=float,
+                            default=DEFAULT_POLL_INTERVAL,
+                            help='Seconds to wait when the queue is empty.')
+
+    def get_views(self):
+        """Return a dict of entity type to the view that handles it."""
+        return {
+            entity_type: import_string(view_path)()
+            for entity_type, view_path in
+            getattr(settings.PROVIDER, 'callback_views', {}).items()
+        }
+
+    def handle(self, *args, **options):
+        owner = default_owner()
+        views = self.get_views()
+        handlers = {
+            entity_type: view.handle for entity_type, view in views.items()
+        }
+        batch_handlers = {
+            entity_type: view.handle_batch
+            for entity_type, view in views.items()
+            if hasattr(view, 'handle_batch')
+        }
+        max_attempts = get_djpsa_settings()['callback_max_attempts']
+        previous_handlers = self._install_signal_handlers()
+        processed = coalesced = failed = 0
+
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                events = callback_queue.claim(
+                    owner, max_attempts, batch_size=options['batch_size'])
+                if events:
+                    batch_processed, batch_coalesced, batch_failed = \
+                        callback_queue.process_batch(
+                            events, handlers, batch_handlers)
+                    processed += batch_processed
+                    coalesced += batch_coalesced
+                    failed += batch_failed
+
+                if not events:
+                    if options['once']:
+                        break
+                    self.stop_event.wait(options['poll_interval'])
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        self.stdout.write(
+            'Processed {} callbacks, {} coalesced, {} failed.'.format(
+                processed, coalesced, failed))
+
+    def _install_signal_handlers(self):
+        """Stop on SIGTERM or SIGINT. Return the previous handlers."""
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+
+        def stop(signum, frame):
+            logger.info('Received signal {}, stopping after the current '
+                        'batch.'.format(signum))
+            self.stop_event.set()
+
+        return {
+            signum: signal.signal(signum, stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
@@ -0,0 +1,120 @@
+from django.db.models.fields import DateTimeField
+from django.db.models.fields.related import ForeignKey
+
+# Kinds of outbound conversion, see compile_outbound_converters.
+PASSTHROUGH = 'passthrough'
+DATETIME = 'datetime'
+FOREIGN_KEY = 'foreign_key'
+
+
+class APIField:
+    """
+    Declare how one model field is read from an API record.
+
+    key
+        The key in the API record. A tuple of keys means the first truthy
+        value wins, as in `data.get('a') or data.get('b')`. If omitted, the
+        key is taken from the model's API_FIELDS.
+    parser
+        Callable applied to the value before it is assigned.
+    default
+        Value used when the key is missing from the record.
+    keep_existing
+        Keep the instance's current value when the key is missing.
+    skip_empty
+        Don't assign anything when the value from the record is falsy.
+    """
+
+    def __init__(self, key=None, parser=None, default=None,
+                 keep_existing=False, skip_empty=False):
+        self.key = key
+        self.parser = parser
+        self.default = default
+        self.keep_existing = keep_existing
+        self.skip_empty = skip_empty
+
+
+class FieldMapper:
+    """
+    A field mapping compiled into a flat list of assignment functions, so
+    that no spec needs to be interpreted per record.
+    """
+
+    def __init__(self, model_class, field_mapping):
+        api_fields = getattr(model_class, 'API_FIELDS', {})
+        self.assigners = [
+            self._compile(attr, spec, api_fields)
+            for attr, spec in field_mapping.items()
+        ]
+
+    def assign(self, instance, json_data):
+        for assigner in self.assigners:
+            assigner(instance, json_data)
+
+    @staticmethod
+    def _compile(attr, spec, api_fields):
+        if isinstance(spec, str):
+            spec = APIField(spec)
+
+        key = spec.key or api_fields[attr]
+        parser = spec.parser
+        default = spec.default
+        keep_existing = spec.keep_existing
+        skip_empty = spec.skip_empty
+
+        if isinstance(key, tuple):
+            keys = key
+
+            def get_value(instance, json_data):
+                value = None
+                for k in keys:
+                    value = json_data.get(k)
+                    if value:
+                        break
+                return value
+        elif keep_existing:
+            def get_value(instance, json_data):
+                return json_data.get(key, getattr(instance, attr))
+        else:
+            def get_value(instance, json_data):
+                return json_data.get(key, default)
+
+        if skip_empty:
+            def assigner(instance, json_data):
+                value = get_value(instance, json_data)
+                if value:
+                    setattr(instance, attr,
+                            parser(value) if parser else value)
+        elif parser:
+            def assigner(instance, json_data):
+                setattr(instance, attr, parser(get_value(instance, json_data)))
+        else:
+            def assigner(instance, json_data):
+                setattr(instance, attr, get_value(instance, json_data))
+
+        return assigner
+
+
+def compile_outbound_converters(model_class):
+    """
+    Return a dict of model field name to (API key, conversion kind), for
+    every forward field of the model.
+    """
+    api_fields = getattr(model_class, 'API_FIELDS', {})
+    converters = {}
+    for field in model_class._meta.get_fields():
+        if field.auto_created and not field.concrete:
+            # Reverse relation
+            continue
+
+        # Exact class matches, subclasses such as CreationDateTimeField
+        # are passed through as they are.
+        if field.__class__ == DateTimeField:
+            kind = DATETIME
+        elif field.__class__ == ForeignKey:
+            kind = FOREIGN_KEY
+        else:
+            kind = PASSTHROUGH
+
+        converters[field.name] = (api_fields.get(field.name), kind)
+    return converters
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0002_udfdefinition_udfdefinitiontracker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncjob',
+            name='queries',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='syncjob',
+            name='queries_per_record',
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0003_syncjob_queries_syncjob_queries_per_record'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('owner', models.CharField(max_length=200)),
+                ('acquired', models.DateTimeField()),
+                ('expires', models.DateTimeField()),
+            ],
+        ),
+    ]
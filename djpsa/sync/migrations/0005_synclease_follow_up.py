@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0004_synclease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclease',
+            name='follow_up',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
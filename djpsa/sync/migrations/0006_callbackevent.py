@@ -0,0 +1,29 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0005_synclease_follow_up'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CallbackEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(max_length=100)),
+                ('payload', models.JSONField()),
+                ('received', models.DateTimeField()),
+                ('available_at', models.DateTimeField(db_index=True)),
+                ('claimed_by', models.CharField(blank=True, default='', max_length=200)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+    ]
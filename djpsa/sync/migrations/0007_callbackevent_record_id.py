@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0006_callbackevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callbackevent',
+            name='record_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=100),
+        ),
+    ]
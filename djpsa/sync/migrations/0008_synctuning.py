@@ -0,0 +1,22 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0007_callbackevent_record_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTuning',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_name', models.CharField(max_length=100, unique=True)),
+                ('page_size', models.PositiveIntegerField()),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -14,7 +14,62 @@ class SyncJob(models.Model):
     success = models.BooleanField(null=True)
     message = models.TextField(blank=True, null=True)
     sync_type = models.CharField(max_length=32, default='full')
+    queries = models.PositiveIntegerField(null=True)
+    queries_per_record = models.FloatField(null=True)
 
     def duration(self):
         if self.start_time and self.end_time:
             return self.end_time - self.start_time
+
+
+class SyncLease(models.Model):
+    """
+    A lease held by one process at a time, such as the sync daemon's. The
+    holder renews it before it expires.
+    """
+    name = models.CharField(max_length=200, unique=True)
+    owner = models.CharField(max_length=200)
+    acquired = models.DateTimeField()
+    expires = models.DateTimeField()
+    # A run requested while the lease was held, 'full' or 'partial'.
+    follow_up = models.CharField(max_length=32, blank=True, default='')
+
+    def __str__(self):
+        return self.name
+
+
+class CallbackEvent(models.Model):
+    """
+    A received callback waiting to be processed by the process_callbacks
+    command.
+    """
+    entity_type = models.CharField(max_length=100)
+    # Events for the same record are coalesced, only the latest is handled.
+    record_id = models.CharField(max_length=100, blank=True, default='',
+                                 db_index=True)
+    payload = models.JSONField()
+    received = models.DateTimeField()
+    # Not claimed or retried before this time.
+    available_at = models.DateTimeField(db_index=True)
+    claimed_by = models.CharField(max_length=200, blank=True, default='')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        ordering = ('id',)
+
+    def __str__(self):
+        return '{} {}'.format(self.entity_type, self.id)
+
+
+class SyncTuning(models.Model):
+    """
+    The page size tuned for an entity from its previous syncs, see the
+    adaptive_page_size setting.
+    """
+    entity_name = models.CharField(max_length=100, unique=True)
+    page_size = models.PositiveIntegerField()
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.entity_name
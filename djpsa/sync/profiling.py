@@ -0,0 +1,110 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+STATS_SORT_KEYS = ('cumulative', 'tottime')
+REPORT_LIMIT = 50
+
+
+class SyncProfiler:
+    """
+    Run synchronizers under cProfile, and optionally tracemalloc, writing
+    one set of files per synchronizer class to output_dir:
+
+    * <SynchronizerClass>.prof: raw stats, for pstats or snakeviz.
+    * <SynchronizerClass>.txt: the top functions by cumulative and own time.
+    * <SynchronizerClass>.memory.txt: peak memory and the top allocation
+      sites for each page of records, if trace_memory is set.
+
+    File names don't include timestamps and reports are sorted, so runs
+    from before and after an upgrade can be compared directly.
+    """
+
+    def __init__(self, output_dir, trace_memory=False, top_allocations=10):
+        self.output_dir = output_dir
+        self.trace_memory = trace_memory
+        self.top_allocations = top_allocations
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def _path(self, synchronizer, suffix):
+        return os.path.join(
+            self.output_dir,
+            '{}{}'.format(synchronizer.__class__.__name__, suffix)
+        )
+
+    @contextmanager
+    def profile(self, synchronizer):
+        memory_report = []
+        if self.trace_memory:
+            self._trace_pages(synchronizer, memory_report)
+            tracemalloc.start()
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                memory_report.append(
+                    'Total peak: {:.1f} KiB'.format(peak / 1024))
+                self._write(
+                    self._path(synchronizer, '.memory.txt'),
+                    '\n'.join(memory_report)
+                )
+                del synchronizer.persist_page
+
+            self._write_stats(synchronizer, profiler)
+
+    def _trace_pages(self, synchronizer, memory_report):
+        """
+        Wrap persist_page on the synchronizer instance to record peak
+        memory and the top allocation sites for each page.
+        """
+        persist_page = synchronizer.persist_page
+        page = {'number': 0}
+
+        def traced_persist_page(records, results):
+            page['number'] += 1
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+
+            result = persist_page(records, results)
+
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            memory_report.append(
+                'Page {}: {} records, current {:.1f} KiB, '
+                'peak {:.1f} KiB'.format(
+                    page['number'], len(records),
+                    current / 1024, peak / 1024)
+            )
+            top_stats = after.compare_to(before, 'lineno')
+            for stat in top_stats[:self.top_allocations]:
+                memory_report.append('    {}'.format(stat))
+            return result
+
+        synchronizer.persist_page = traced_persist_page
+
+    def _write_stats(self, synchronizer, profiler):
+        profiler.dump_stats(self._path(synchronizer, '.prof'))
+
+        stream = io.StringIO()
+        for sort_key in STATS_SORT_KEYS:
+            stats = pstats.Stats(profiler, stream=stream)
+            stats.strip_dirs().sort_stats(sort_key).print_stats(REPORT_LIMIT)
+        self._write(self._path(synchronizer, '.txt'), stream.getvalue())
+
+    @staticmethod
+    def _write(path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+        logger.info('Wrote profile report {}'.format(path))
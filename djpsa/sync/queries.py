@@ -0,0 +1,75 @@
+import logging
+
+from django.db import connections, DEFAULT_DB_ALIAS
+
+logger = logging.getLogger(__name__)
+
+WARN = 'warn'
+RAISE = 'raise'
+
+# Transaction control, i.e. the savepoints of each record's atomic block,
+# which aren't queries the synchronizer chose to make.
+TRANSACTION_STATEMENTS = (
+    'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+class QueryBudgetExceeded(Exception):
+    """A synchronizer made more queries per record than its budget allows."""
+    pass
+
+
+class QueryCounter:
+    """
+    Count the queries made on a DB connection while the counter is active.
+
+    Connections are per thread, so only queries made by the current thread
+    are counted. Transaction statements aren't counted.
+
+    >>> with QueryCounter() as counter:
+    ...     list(Ticket.objects.all())
+    >>> counter.count
+    1
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.count = 0
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connections[self.using].execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._wrapper.__exit__(exc_type, exc_val, exc_tb)
+        self._wrapper = None
+
+
+def queries_per_record(query_count, record_count):
+    if not record_count:
+        return None
+    return query_count / record_count
+
+
+def check_query_budget(name, query_count, record_count, budget,
+                       action=WARN):
+    """
+    Warn, or raise QueryBudgetExceeded, if the queries per record is over
+    budget. A budget of None disables the check.
+    """
+    ratio = queries_per_record(query_count, record_count)
+    if budget is None or ratio is None or ratio <= budget:
+        return
+
+    msg = '{} made {} queries for {} records ({:.1f} per record), ' \
+          'over the budget of {} per record.'.format(
+              name, query_count, record_count, ratio, budget)
+    if action == RAISE:
+        raise QueryBudgetExceeded(msg)
+    logger.warning(msg)
@@ -0,0 +1,136 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def _concrete(model_class):
+    return model_class._meta.concrete_model
+
+
+def related_models(sync_class):
+    """
+    Return the set of models the synchronizer class needs to exist before
+    it can link its records to them.
+    """
+    models = {
+        _concrete(model_class)
+        for model_class, _ in (getattr(sync_class, 'related_meta', None)
+                               or {}).values()
+    }
+    parent_model_class = getattr(sync_class, 'parent_model_class', None)
+    if parent_model_class:
+        models.add(_concrete(parent_model_class))
+    return models
+
+
+class SyncScheduler:
+    """
+    Run a set of synchronizer classes on a pool of worker threads, starting
+    each one as soon as the synchronizers for the models it relates to
+    (from related_meta) have finished.
+
+    With one worker, synchronizers run one at a time in dependency order,
+    otherwise in the order given.
+    """
+
+    def __init__(self, synchronizer_classes, workers=1):
+        self.synchronizer_classes = list(synchronizer_classes)
+        self.workers = max(1, workers or 1)
+
+    def dependencies(self):
+        """
+        Return a dict of synchronizer class to the set of classes in this
+        schedule that must finish before it starts.
+        """
+        by_model = {}
+        for sync_class in self.synchronizer_classes:
+            model_class = getattr(sync_class, 'model_class', None)
+            if model_class is not None:
+                by_model.setdefault(_concrete(model_class), set()) \
+                    .add(sync_class)
+
+        dependencies = {}
+        for sync_class in self.synchronizer_classes:
+            needed = set()
+            for model_class in related_models(sync_class):
+                needed |= by_model.get(model_class, set())
+            # A self-reference (i.e. a ticket's parent project) can't be
+            # waited on.
+            needed.discard(sync_class)
+            dependencies[sync_class] = needed
+        return dependencies
+
+    def _next_ready(self, pending, done, dependencies, running):
+        ready = [
+            sync_class for sync_class in pending
+            if dependencies[sync_class] <= done
+        ]
+        if not ready and not running and pending:
+            # Dependency cycle. Break it by starting the first one in the
+            # original order, like a sequential run would have.
+            logger.warning(
+                'Dependency cycle between synchronizers {}, running {} '
+                'first.'.format(
+                    ', '.join(c.__name__ for c in pending),
+                    pending[0].__name__)
+            )
+            ready = pending[:1]
+        return ready
+
+    def run(self, run_cb):
+        """
+        Call run_cb(sync_class) for every synchronizer class.
+
+        With one worker, an exception from run_cb is raised straight away.
+        With more, dependent synchronizers still run and the first exception
+        is raised once everything has finished.
+        """
+        dependencies = self.dependencies()
+        pending = list(self.synchronizer_classes)
+        done = set()
+
+        if self.workers == 1:
+            while pending:
+                sync_class = self._next_ready(
+                    pending, done, dependencies, running=False)[0]
+                pending.remove(sync_class)
+                run_cb(sync_class)
+                done.add(sync_class)
+            return
+
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            running = {}
+            while pending or running:
+                for sync_class in self._next_ready(
+                        pending, done, dependencies, running):
+                    if len(running) >= self.workers:
+                        break
+                    pending.remove(sync_class)
+                    future = executor.submit(
+                        self._run_in_worker, run_cb, sync_class)
+                    running[future] = sync_class
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    sync_class = running.pop(future)
+                    done.add(sync_class)
+                    error = future.exception()
+                    if error:
+                        logger.error('Synchronizer {} failed: {}'.format(
+                            sync_class.__name__, error))
+                        errors.append(error)
+
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def _run_in_worker(run_cb, sync_class):
+        try:
+            run_cb(sync_class)
+        finally:
+            # Each worker thread has its own DB connections.
+            connections.close_all()
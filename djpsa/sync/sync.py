@@ -1,11 +1,21 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from typing import List, Any
 from django.utils import timezone
-from django.db import transaction, IntegrityError
+from django.db import transaction, IntegrityError, connection, connections
 from django.conf import settings
+from django.core.cache import cache
 
 from djpsa.sync.models import SyncJob
+from djpsa.sync.lease import get_lease, FULL
+from djpsa.sync.lookup import lookups
+from djpsa.sync.mapping import FieldMapper
+from djpsa.sync.queries import QueryCounter, check_query_budget, \
+    queries_per_record
+from djpsa.sync.tracker import field_digest
+from djpsa.sync.tuning import PageSizeTuner
 from djpsa.utils import get_djpsa_settings
 
 logger = logging.getLogger(__name__)
@@ -16,6 +26,8 @@ CREATED = 1
 UPDATED = 2
 SKIPPED = 3
 
+PAYLOAD_DIGEST_CACHE_NAME = 'djpsa_payload:{}:{}'
+
 
 def log_sync_job(f):
     def wrapper(*args, **kwargs):
@@ -34,9 +46,11 @@ def log_sync_job(f):
 
         sync_job.save()
 
+        query_counter = QueryCounter()
         try:
-            created_count, updated_count, skipped_count, deleted_count = \
-                f(*args, **kwargs)
+            with query_counter:
+                created_count, updated_count, skipped_count, \
+                    deleted_count = f(*args, **kwargs)
             sync_job.success = True
         except Exception as e:
             sync_job.message = str(e.args[0])
@@ -48,6 +62,11 @@ def log_sync_job(f):
             sync_job.updated = updated_count
             sync_job.skipped = skipped_count
             sync_job.deleted = deleted_count
+            sync_job.queries = query_counter.count
+            sync_job.queries_per_record = queries_per_record(
+                query_counter.count,
+                created_count + updated_count + skipped_count
+            )
             sync_job.save()
 
         return created_count, updated_count, skipped_count, deleted_count
@@ -55,6 +74,95 @@ def log_sync_job(f):
     return wrapper
 
 
+class CoalescedCounts(tuple):
+    """
+    The counts returned by a sync handed off to the run in flight, which
+    does a follow-up run for it. All zero, like a sync that found nothing
+    to do, so check with isinstance to tell them apart.
+    """
+
+    def __new__(cls):
+        return super().__new__(cls, (0, 0, 0, 0))
+
+
+def _take_or_hand_off(lease, full):
+    """
+    Take the lease, or leave a follow-up request with whoever holds it.
+    Return True if the lease was taken.
+    """
+    while True:
+        if lease.acquire():
+            return True
+        if lease.request_follow_up(full):
+            return False
+        # Released between the two calls, try again.
+
+
+def coalesce_sync_runs(f):
+    """
+    Run the sync under a per-entity lease, so only one sync of an entity
+    runs at a time across workers. A sync requested while another is in
+    flight returns CoalescedCounts straight away, and the running one then
+    does a single follow-up run for all such requests- a full one if any of
+    them were full.
+
+    Scoped syncs, with conditions or for a parent record, aren't locked as
+    the follow-up run couldn't repeat them.
+    """
+    def wrapper(*args, **kwargs):
+        sync_instance = args[0]
+        if not sync_instance.sync_locking or sync_instance.is_scoped():
+            return f(*args, **kwargs)
+
+        lease = get_lease(
+            sync_instance.get_sync_lock_name(),
+            sync_instance.sync_settings['sync_lock_ttl'],
+        )
+        if not _take_or_hand_off(lease, sync_instance.full):
+            logger.info(
+                '{} sync already running, requested a follow-up run.'.format(
+                    sync_instance.get_model_name()))
+            return CoalescedCounts()
+
+        held = True
+        try:
+            with lease.keep_alive():
+                counts = f(*args, **kwargs)
+
+            while True:
+                follow_up = lease.pop_follow_up()
+                if not follow_up:
+                    held = False
+                    follow_up = lease.release()
+                    if not follow_up or \
+                            not _take_or_hand_off(lease, follow_up == FULL):
+                        break
+                    held = True
+
+                logger.info('Running follow-up {} sync of {}'.format(
+                    follow_up, sync_instance.get_model_name()))
+                follow_up_instance = sync_instance.__class__(
+                    full=follow_up == FULL)
+                try:
+                    with lease.keep_alive():
+                        f(follow_up_instance)
+                except Exception as e:
+                    # The failure is on the follow-up's SyncJob, this run
+                    # still succeeded.
+                    logger.exception('Follow-up sync of {} failed: {}'.format(
+                        sync_instance.get_model_name(), e))
+                    break
+        finally:
+            if held and lease.release():
+                logger.warning(
+                    'Dropped follow-up sync of {} requested during a '
+                    'failed run.'.format(sync_instance.get_model_name()))
+
+        return counts
+
+    return wrapper
+
+
 class InvalidObjectException(Exception):
     """
     If for any reason an object can't be created (for example, it references
@@ -81,6 +189,16 @@ class Synchronizer:
     client_class = None
     last_updated_field = None
     bulk_prune = True
+    # Dict of model field name to API key or mapping.APIField. When set,
+    # _assign_field_data is handled by a FieldMapper compiled once per class.
+    field_mapping = None
+    related_meta = {}
+    # Maximum average ORM queries per persisted record, checked for each
+    # page. None uses the max_queries_per_record setting.
+    max_queries_per_record = None
+    # API keys of the record's last update time, the first present wins.
+    # Used by is_stale.
+    last_update_keys = ()
 
     def __init__(self,
                  full: bool = False,
@@ -94,12 +212,21 @@ class Synchronizer:
                 settings.DJPSA_CONF_CALLABLE().get('sync', {}))
 
         conditions = conditions or []
+        # Syncs limited by conditions aren't coalesced with other runs.
+        self.scoped = bool(conditions)
+        self.sync_locking = self.sync_settings['sync_locking']
         self.client = self.client_class(conditions)
         self.partial_sync_support = True
         self.batch_size = self.sync_settings['batch_size']
         self.full = full
         self.mass_delete_protection = self.sync_settings.get(
             'mass_delete_protection', True)
+        if self.max_queries_per_record is None:
+            self.max_queries_per_record = \
+                self.sync_settings['max_queries_per_record']
+        self.query_budget_action = self.sync_settings['query_budget_action']
+        # Set for the duration of a sync when adaptive_page_size is on.
+        self.page_size_tuner = None
 
     def get_sync_job_qset(self):
         return SyncJob.objects.filter(
@@ -109,6 +236,15 @@ class Synchronizer:
     def get_model_name(self):
         return self.model_class.__bases__[0].__name__
 
+    def get_sync_lock_name(self):
+        return '{}:{}'.format(
+            self.sync_settings['sync_lock_prefix'], self.get_model_name())
+
+    def is_scoped(self):
+        """Return True if this sync covers only some of the records."""
+        return self.scoped or \
+            getattr(self, 'parent_object_id', None) is not None
+
     def _get_last_sync_job_time(self, sync_job_qset):
         if sync_job_qset.count() > 1 and self.last_updated_field \
                 and not self.full and self.partial_sync_support:
@@ -117,6 +253,7 @@ class Synchronizer:
                     '%Y-%m-%dT%H:%M:%S.%fZ'))
         return None
 
+    @coalesce_sync_runs
     @log_sync_job
     def sync(self):
         if not self.full:
@@ -130,6 +267,16 @@ class Synchronizer:
 
         results = SyncResults()
 
+        if self.sync_settings['adaptive_page_size']:
+            self.page_size_tuner = PageSizeTuner(
+                self.get_model_name(),
+                self.batch_size,
+                self.sync_settings['page_size_bounds'],
+                self.sync_settings['target_page_seconds'],
+                self.sync_settings['max_page_bytes'],
+            )
+            self.batch_size = self.page_size_tuner.load()
+
         # Set of IDs of all records prior to sync,
         # to find stale records for deletion.
         initial_ids = self.instance_ids() if self.full else []
@@ -138,11 +285,21 @@ class Synchronizer:
 
         results = self._post_sync_operations(results)
 
+        if self.page_size_tuner:
+            self.page_size_tuner.save(self.batch_size)
+            self.page_size_tuner = None
+
         if self.full:
             results.deleted_count = self.prune_stale_records(
                 initial_ids, results.synced_ids
             )
 
+        if results.created_count or results.updated_count or \
+                results.deleted_count:
+            # Other processes must reload their cached lookups, if this is
+            # a cached model.
+            lookups.invalidate(self.model_class)
+
         return results.created_count, results.updated_count, \
             results.skipped_count, results.deleted_count
 
@@ -150,11 +307,12 @@ class Synchronizer:
         return results
 
     def instance_ids(self, filter_params=None):
-        ids = self.model_class.objects.all().order_by('id') \
-            .values_list('id', flat=True)
-        if filter_params:
-            ids = ids.filter(**filter_params)
-        return set(ids)
+        # Unordered, so a filter on an indexed parent column is all the DB
+        # has to do.
+        return set(
+            self.model_class.objects.filter(**(filter_params or {}))
+            .order_by().values_list('pk', flat=True)
+        )
 
     def fetch_records(self, results, params=None):
         """
@@ -168,9 +326,16 @@ class Synchronizer:
                 'Fetching {} records, batch {}'.format(
                     self.get_model_name(), page)
             )
+            started = time.monotonic()
             response = self.client.get_page(
                 page=page, batch_size=self.batch_size, params=params)
             records = self._unpack_records(response)
+            if self.page_size_tuner and len(records) >= self.batch_size:
+                # Short pages are mostly request overhead, only full ones
+                # tell how the size affects a page.
+                self.page_size_tuner.observe(
+                    len(records), time.monotonic() - started,
+                    self.client.last_response_bytes)
 
             current_id = records[0]['id'] if records else None
             if last_recorded_id == current_id:
@@ -192,29 +357,47 @@ class Synchronizer:
 
     def persist_page(self, records, results):
         """Persist one page of records to DB."""
-        for record in records:
-            if not self._try_validate(record):
-                # Skip this record, if it doesn't meet some criteria
-                # defined in a child synchronizer. Do not count it
-                # as a skipped record.
-                continue
-
-            try:
-                with transaction.atomic():
-                    instance, result = self.update_or_create_instance(record)
-                if result == CREATED:
-                    results.created_count += 1
-                elif result == UPDATED:
-                    results.updated_count += 1
-                else:
-                    results.skipped_count += 1
-            except (IntegrityError, InvalidObjectException) as e:
-                logger.warning('{}'.format(e))
-
-            results.synced_ids.add(record[self.lookup_key])
+        record_count = 0
+        with QueryCounter() as query_counter:
+            for record in records:
+                if not self._try_validate(record):
+                    # Skip this record, if it doesn't meet some criteria
+                    # defined in a child synchronizer. Do not count it
+                    # as a skipped record.
+                    continue
+
+                record_count += 1
+                self._persist_record(record, results)
+
+        logger.debug(
+            '{}: {} queries for {} records'.format(
+                self.get_model_name(), query_counter.count, record_count)
+        )
+        check_query_budget(
+            self.__class__.__name__,
+            query_counter.count,
+            record_count,
+            self.max_queries_per_record,
+            self.query_budget_action,
+        )
 
         return results
 
+    def _persist_record(self, record, results):
+        try:
+            with transaction.atomic():
+                instance, result = self.update_or_create_instance(record)
+            if result == CREATED:
+                results.created_count += 1
+            elif result == UPDATED:
+                results.updated_count += 1
+            else:
+                results.skipped_count += 1
+        except (IntegrityError, InvalidObjectException) as e:
+            logger.warning('{}'.format(e))
+
+        results.synced_ids.add(record[self.lookup_key])
+
     def update(self, record_id, data, *args, **kwargs):
         raise NotImplementedError(
             f"This synchronizer does not support updates: {self}")
@@ -242,12 +425,31 @@ class Synchronizer:
                 field_name
             )
 
+    @classmethod
+    def get_field_mapper(cls):
+        """Return the field_mapping compiled for this synchronizer class."""
+        mapper = cls.__dict__.get('_field_mapper')
+        if mapper is None:
+            mapper = FieldMapper(cls.model_class, cls.field_mapping)
+            cls._field_mapper = mapper
+        return mapper
+
+    def _map_fields(self, instance, api_instance):
+        self.get_field_mapper().assign(instance, api_instance)
+
     def _assign_field_data(self, instance, api_instance):
         """
-        Assign the field data from the API instance to the model instance,
-        overriding this method in the subclass to handle the specific fields.
+        Assign the field data from the API instance to the model instance.
+
+        Synchronizers that define field_mapping get this for free. Otherwise
+        override this method in the subclass to handle the specific fields.
         """
-        raise NotImplementedError
+        if self.field_mapping is None:
+            raise NotImplementedError
+
+        self._map_fields(instance, api_instance)
+        if self.related_meta:
+            self.set_relations(instance, api_instance)
 
     def _format_job_condition(self, last_sync_time):
         raise NotImplementedError
@@ -293,7 +495,13 @@ class Synchronizer:
         uid = relation_id
 
         try:
-            related_instance = model_class.objects.get(pk=uid)
+            lookup = lookups.get(model_class)
+            if lookup:
+                related_instance = lookup.get(uid)
+                if related_instance is None:
+                    raise model_class.DoesNotExist
+            else:
+                related_instance = model_class.objects.get(pk=uid)
             setattr(instance, model_field, related_instance)
         except model_class.DoesNotExist:
             logger.warning(
@@ -320,6 +528,10 @@ class Synchronizer:
 
         return data
 
+    def _prepare_api_instance(self, api_instance):
+        """Adjust a record from the API before it's upserted."""
+        return api_instance
+
     def update_or_create_instance(self, api_instance):
         """
         Creates and returns an instance if it does not already exist.
@@ -388,6 +600,134 @@ class Synchronizer:
 
         return instance, result
 
+    def _parse_last_update(self, value):
+        raise NotImplementedError
+
+    def get_payload_last_update(self, api_instance):
+        for key in self.last_update_keys:
+            value = api_instance.get(key)
+            if value:
+                return self._parse_last_update(value)
+        return None
+
+    def _payload_digest_cache_name(self, api_instance):
+        return PAYLOAD_DIGEST_CACHE_NAME.format(
+            self.get_model_name(), api_instance[self.lookup_key])
+
+    def is_stale(self, api_instance):
+        """
+        Return True if the record is the same as the last one passed to
+        remember_payload, i.e. a redelivery, or older than it, i.e. arriving
+        out of order.
+
+        Only looks at the cache, never the DB or the API. Records synced
+        some other way aren't remembered, so the related records of a newer
+        record are still synced even if its row is already up to date.
+        """
+        remembered = cache.get(self._payload_digest_cache_name(api_instance))
+        if remembered is None:
+            return False
+        digest, remembered_last_update = remembered
+        if digest == field_digest(api_instance):
+            return True
+        last_update = self.get_payload_last_update(api_instance)
+        return last_update is not None and \
+            remembered_last_update is not None and \
+            last_update < remembered_last_update
+
+    def remember_payload(self, api_instance):
+        """Remember the digest of an applied record for is_stale."""
+        timeout = self.sync_settings['payload_digest_timeout']
+        if timeout:
+            cache.set(self._payload_digest_cache_name(api_instance), (
+                field_digest(api_instance),
+                self.get_payload_last_update(api_instance),
+            ), timeout)
+
+    def bulk_update_or_create_instances(self, api_instances):
+        """
+        Upsert the given records with one query for the existing instances
+        and one bulk write each for the new and changed ones. If a record
+        appears more than once, the last one wins.
+
+        Return a list of (instance, result) for the valid records, those
+        _try_validate accepts. If another process creates one of the records
+        meanwhile, the records are upserted one at a time instead.
+        """
+        api_instances = list({
+            api_instance[self.lookup_key]: api_instance
+            for api_instance in map(self._prepare_api_instance, api_instances)
+            if self._try_validate(api_instance)
+        }.values())
+        existing = self.model_class.objects.in_bulk(
+            [api_instance[self.lookup_key] for api_instance in api_instances])
+
+        results = []
+        for api_instance in api_instances:
+            instance = existing.get(api_instance[self.lookup_key])
+            result = UPDATED
+            if instance is None:
+                instance = self.model_class()
+                result = CREATED
+            try:
+                self._clean_data(api_instance)
+                self._assign_field_data(instance, api_instance)
+            except AttributeError as e:
+                logger.error(
+                    'AttributeError while attempting to sync object {}.'
+                    ' Error: {}'.format(self.model_class, e))
+                continue
+            if result == UPDATED and not self._is_instance_changed(instance):
+                result = SKIPPED
+            results.append((instance, result))
+
+        created = [i for i, result in results if result == CREATED]
+        updated = [i for i, result in results if result == UPDATED]
+        changed_fields = set()
+        for instance in updated:
+            changed_fields.update(instance.tracker.changed())
+
+        update_fields = sorted(changed_fields)
+        if updated and self._has_modified_field():
+            # bulk_update skips pre_save, which sets TimeStampedModel's
+            # modified on save.
+            now = timezone.now()
+            for instance in updated:
+                instance.modified = now
+            if 'modified' not in changed_fields:
+                update_fields.append('modified')
+
+        try:
+            with transaction.atomic():
+                self.model_class.objects.bulk_create(created)
+                if updated:
+                    self.model_class.objects.bulk_update(
+                        updated, update_fields)
+        except IntegrityError as e:
+            logger.warning(
+                'Bulk upsert of {} failed, upserting one at a time: '
+                '{}'.format(self.get_model_name(), e))
+            results = []
+            for api_instance in api_instances:
+                try:
+                    with transaction.atomic():
+                        results.append(
+                            self.update_or_create_instance(api_instance))
+                except InvalidObjectException as e:
+                    logger.warning('{}'.format(e))
+            return results
+
+        logger.info('{}: created {}, updated {}, skipped {}'.format(
+            self.get_model_name(), len(created), len(updated),
+            len(results) - len(created) - len(updated)))
+        return results
+
+    def _has_modified_field(self):
+        return any(
+            field.name == 'modified'
+            for field in self.model_class._meta.concrete_fields
+        )
+
     def prune_stale_records(self, initial_ids, synced_ids):
         """
         Delete records that existed when sync started but were
@@ -474,11 +814,36 @@ class Synchronizer:
     def sync_related(self, instance):
         """
         Sync related objects for the given instance.
+
+        The related synchronizers are independent of each other, so they run
+        at the same time, up to the related_sync_workers setting. Inside a
+        transaction they run one after the other, as other threads' DB
+        connections wouldn't see its changes.
         """
         sync_classes = self.get_related_synchronizers(instance)
+        workers = min(
+            len(sync_classes), self.sync_settings['related_sync_workers'])
 
-        for sync_class in sync_classes:
-            self._relation_sync(*sync_class)
+        if workers <= 1 or connection.in_atomic_block:
+            for sync_class in sync_classes:
+                self._relation_sync(*sync_class)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._relation_sync_in_thread, *sync_class)
+                for sync_class in sync_classes
+            ]
+        for future in futures:
+            # Raise the first error, once they've all finished.
+            future.result()
+
+    @classmethod
+    def _relation_sync_in_thread(cls, synchronizer, filter_params):
+        try:
+            return cls._relation_sync(synchronizer, filter_params)
+        finally:
+            connections.close_all()
 
     def get_related_synchronizers(self, instance):
         """
@@ -0,0 +1,93 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from djpsa.sync.blobstore import BlobStore
+
+
+class TestBlobStore(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = BlobStore(self.root, max_size=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def read(self, digest):
+        with self.store.open(digest) as f:
+            return f.read()
+
+    def test_write_is_content_addressed(self):
+        digest, size = self.store.write([b'abc', b'de'])
+
+        self.assertEqual(digest, hashlib.sha256(b'abcde').hexdigest())
+        self.assertEqual(size, 5)
+        self.assertEqual(self.read(digest), b'abcde')
+
+    def test_same_content_is_stored_once(self):
+        first, _ = self.store.write([b'abcde'])
+        second, _ = self.store.write([b'abc', b'de'])
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.store.size(), 5)
+
+    def test_failed_write_leaves_nothing(self):
+        def chunks():
+            yield b'abc'
+            raise IOError('interrupted')
+
+        with self.assertRaises(IOError):
+            self.store.write(chunks())
+        self.assertEqual(self.store.size(), 0)
+        self.assertEqual(os.listdir(os.path.join(self.root, 'tmp')), [])
+
+    def test_evicts_least_recently_used(self):
+        old, _ = self.store.write([b'aaaa'])
+        used, _ = self.store.write([b'bbbb'])
+        os.utime(self.store.path(old), (1, 1))
+        os.utime(self.store.path(used), (2, 2))
+        # Opening marks it used, so old is now the least recently used.
+        self.read(used)
+
+        new, _ = self.store.write([b'cccc'])
+
+        self.assertFalse(self.store.exists(old))
+        self.assertTrue(self.store.exists(used))
+        self.assertTrue(self.store.exists(new))
+        with self.assertRaises(FileNotFoundError):
+            self.store.open(old)
+
+    def test_keeps_new_blob_larger_than_store(self):
+        digest, _ = self.store.write([b'x' * 20])
+
+        self.assertTrue(self.store.exists(digest))
+
+    def test_walks_tree_only_when_over_size(self):
+        self.store.write([b'aaa'])
+
+        with patch.object(self.store, '_blobs', wraps=self.store._blobs) \
+                as blobs:
+            self.store.write([b'bbb'])
+            blobs.assert_not_called()
+
+            self.store.write([b'cccccc'])
+            blobs.assert_called_once()
+        self.assertLessEqual(self.store.size(), 10)
+
+    def test_evict_removes_stale_tmp_files(self):
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        stale = os.path.join(tmp_dir, 'left.tmp')
+        fresh = os.path.join(tmp_dir, 'writing.tmp')
+        for path in (stale, fresh):
+            open(path, 'wb').close()
+        os.utime(stale, (1, 1))
+
+        self.store.evict()
+
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(fresh))
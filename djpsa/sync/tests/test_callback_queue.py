@@ -0,0 +1,138 @@
+from io import StringIO
+from unittest import TestCase, mock
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from djpsa.sync import callback_queue
+from djpsa.sync.models import CallbackEvent
+from djpsa.sync.management.commands.process_callbacks import \
+    Command as ProcessCallbacksCommand
+
+
+class TestCallbackQueue(TestCase):
+
+    def tearDown(self):
+        CallbackEvent.objects.all().delete()
+
+    def test_claimed_events_are_hidden_from_other_workers(self):
+        first = callback_queue.enqueue('ticket', {'ticket': {'id': 1}})
+        second = callback_queue.enqueue('ticket', {'ticket': {'id': 2}})
+
+        claimed = callback_queue.claim('worker-1', 5, batch_size=1)
+        self.assertEqual([e.id for e in claimed], [first.id])
+        claimed = callback_queue.claim('worker-2', 5)
+        self.assertEqual([e.id for e in claimed], [second.id])
+        self.assertEqual(callback_queue.claim('worker-3', 5), [])
+
+    def test_expired_claim_is_claimed_again(self):
+        event = callback_queue.enqueue('ticket', {})
+        callback_queue.claim('worker-1', 5)
+        CallbackEvent.objects.update(available_at=timezone.now())
+
+        claimed = callback_queue.claim('worker-2', 5)
+        self.assertEqual([e.id for e in claimed], [event.id])
+
+    def test_process(self):
+        handler = mock.Mock()
+        callback_queue.enqueue('ticket', {'ticket': {'id': 1}})
+        event, = callback_queue.claim('worker', 5)
+
+        self.assertTrue(callback_queue.process(event, {'ticket': handler}))
+        handler.assert_called_once_with({'ticket': {'id': 1}})
+        self.assertFalse(CallbackEvent.objects.exists())
+
+    def test_failed_event_is_retried_later(self):
+        handler = mock.Mock(side_effect=ValueError('boom'))
+        callback_queue.enqueue('ticket', {})
+        event, = callback_queue.claim('worker', 5)
+
+        self.assertFalse(callback_queue.process(event, {'ticket': handler}))
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.last_error, 'boom')
+        self.assertGreater(event.available_at, timezone.now())
+        self.assertEqual(callback_queue.claim('worker', 5), [])
+
+        # Given up on after the maximum attempts.
+        CallbackEvent.objects.update(available_at=timezone.now())
+        self.assertEqual(callback_queue.claim('worker', 1), [])
+
+    def test_command_drains_queue(self):
+        handler = mock.Mock()
+        for ticket_id in range(3):
+            callback_queue.enqueue('ticket', {'ticket': {'id': ticket_id}})
+        callback_queue.enqueue('unknown', {})
+        out = StringIO()
+
+        # A view without handle_batch.
+        view = mock.Mock(spec=['handle'], handle=handler)
+        with mock.patch.object(ProcessCallbacksCommand, 'get_views',
+                               return_value={'ticket': view}):
+            call_command('process_callbacks', once=True, stdout=out)
+
+        self.assertEqual(handler.call_count, 3)
+        self.assertIn('Processed 3 callbacks, 0 coalesced, 1 failed.',
+                      out.getvalue())
+        self.assertEqual(
+            list(CallbackEvent.objects.values_list('entity_type', flat=True)),
+            ['unknown'])
+
+
+class TestCallbackCoalescing(TestCase):
+
+    def tearDown(self):
+        CallbackEvent.objects.all().delete()
+
+    def test_events_in_debounce_window_are_coalesced(self):
+        first = callback_queue.enqueue(
+            'ticket', {'ticket': {'id': 1, 'v': 1}}, record_id=1)
+        callback_queue.enqueue(
+            'ticket', {'ticket': {'id': 2}}, record_id=2, debounce=60)
+        latest = callback_queue.enqueue(
+            'ticket', {'ticket': {'id': 1, 'v': 2}}, record_id=1, debounce=60)
+
+        # Only the first event is due, but it brings along the later one for
+        # the same ticket.
+        claimed = callback_queue.claim('worker', 5)
+        self.assertEqual([e.id for e in claimed], [first.id, latest.id])
+
+        kept, coalesced = callback_queue.coalesce(claimed)
+        self.assertEqual([e.id for e in kept], [latest.id])
+        self.assertEqual(coalesced, 1)
+        self.assertFalse(CallbackEvent.objects.filter(id=first.id).exists())
+
+    def test_process_batch(self):
+        handler = mock.Mock()
+        batch_handler = mock.Mock()
+        for version in range(3):
+            callback_queue.enqueue(
+                'ticket', {'ticket': {'id': 1, 'v': version}}, record_id=1)
+        callback_queue.enqueue('ticket', {'ticket': {'id': 2}}, record_id=2)
+        callback_queue.enqueue('client', {'client': {'id': 1}}, record_id=1)
+        events = callback_queue.claim('worker', 5)
+
+        self.assertEqual(
+            callback_queue.process_batch(
+                events, {'ticket': handler, 'client': handler},
+                {'ticket': batch_handler}),
+            (3, 2, 0)
+        )
+        batch_handler.assert_called_once_with(
+            [{'ticket': {'id': 1, 'v': 2}}, {'ticket': {'id': 2}}])
+        handler.assert_called_once_with({'client': {'id': 1}})
+        self.assertFalse(CallbackEvent.objects.exists())
+
+    def test_failed_batch_falls_back_to_single_events(self):
+        handler = mock.Mock()
+        batch_handler = mock.Mock(side_effect=ValueError('boom'))
+        callback_queue.enqueue('ticket', {'ticket': {'id': 1}}, record_id=1)
+        callback_queue.enqueue('ticket', {'ticket': {'id': 2}}, record_id=2)
+
+        self.assertEqual(
+            callback_queue.process_batch(
+                callback_queue.claim('worker', 5),
+                {'ticket': handler}, {'ticket': batch_handler}),
+            (2, 0, 0)
+        )
+        self.assertEqual(handler.call_count, 2)
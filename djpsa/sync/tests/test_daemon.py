@@ -0,0 +1,59 @@
+from io import StringIO
+from unittest import TestCase, mock
+
+from django.core.management import call_command
+
+from djpsa.api.client import APIClient
+from djpsa.halo.records import sync as halo_sync
+from djpsa.sync.grades import parse_schedule
+from djpsa.sync.lease import DBLease
+from djpsa.sync.management.commands.base_sync import BaseSyncCommand
+from djpsa.sync.models import SyncLease
+
+
+class TestParseSchedule(TestCase):
+
+    def test_parse_schedule(self):
+        self.assertEqual(parse_schedule('Every 5 minutes.'), 300)
+        self.assertEqual(parse_schedule('every hour'), 3600)
+        self.assertEqual(parse_schedule('Every 2 days'), 2 * 86400)
+        self.assertEqual(parse_schedule('Daily'), 86400)
+        self.assertIsNone(parse_schedule('When it feels like it'))
+        self.assertIsNone(parse_schedule(''))
+
+
+class TestSyncDaemon(TestCase):
+
+    def tearDown(self):
+        SyncLease.objects.all().delete()
+
+    @mock.patch.object(BaseSyncCommand, 'run_synchronizers')
+    def test_once_runs_each_grade(self, run_synchronizers):
+        call_command('sync_daemon', once=True, stdout=StringIO())
+
+        grades = halo_sync.HaloSyncGrades()
+        ran = [
+            [sync_class for sync_class, _ in call.args[0]]
+            for call in run_synchronizers.call_args_list
+        ]
+        self.assertEqual(ran, [
+            grade.synchronizers for grade in grades.grades.values()
+            if grade.synchronizers
+        ])
+        full = {
+            call.args[1] for call in run_synchronizers.call_args_list
+        }
+        self.assertEqual(full, {True, False})
+        # The lease and shared session are released on exit.
+        self.assertFalse(SyncLease.objects.exists())
+        self.assertIsNone(APIClient.session)
+
+    @mock.patch.object(BaseSyncCommand, 'run_synchronizers')
+    def test_stands_by_while_lease_is_held(self, run_synchronizers):
+        DBLease('djpsa_sync_daemon', 60, owner='other').acquire()
+
+        call_command('sync_daemon', once=True, stdout=StringIO())
+
+        run_synchronizers.assert_not_called()
+        self.assertEqual(
+            SyncLease.objects.get(name='djpsa_sync_daemon').owner, 'other')
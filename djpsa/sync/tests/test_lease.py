@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.utils import timezone
+
+from djpsa.sync.lease import DBLease, RedisLease, FULL
+from djpsa.sync.models import SyncLease
+
+
+class TestDBLease(TestCase):
+
+    def tearDown(self):
+        SyncLease.objects.all().delete()
+
+    def test_one_holder_at_a_time(self):
+        first = DBLease('daemon', 60, owner='first')
+        second = DBLease('daemon', 60, owner='second')
+
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        # Acquiring again renews.
+        self.assertTrue(first.acquire())
+
+        first.release()
+        self.assertTrue(second.acquire())
+        self.assertFalse(first.renew())
+
+    def test_expired_lease_is_taken_over(self):
+        first = DBLease('daemon', 60, owner='first')
+        second = DBLease('daemon', 60, owner='second')
+        first.acquire()
+        SyncLease.objects.filter(name='daemon').update(
+            expires=timezone.now() - timedelta(seconds=1))
+
+        self.assertTrue(second.acquire())
+        self.assertEqual(SyncLease.objects.get(name='daemon').owner, 'second')
+        self.assertFalse(first.renew())
+
+    def test_keep_alive_detects_lost_lease(self):
+        lease = DBLease('daemon', 60, owner='first')
+        lease.acquire()
+        SyncLease.objects.all().delete()
+
+        with lease.keep_alive(interval=0.01):
+            for _ in range(100):
+                if lease.lost:
+                    break
+                time.sleep(0.01)
+        self.assertTrue(lease.lost)
+
+
+@patch('djpsa.sync.lease.get_redis_client')
+class TestRedisLease(TestCase):
+
+    def test_follow_up_only_recorded_while_held(self, get_redis):
+        redis = get_redis.return_value
+        redis.eval.return_value = 0
+        lease = RedisLease('sync:Ticket', 60)
+
+        self.assertFalse(lease.request_follow_up(full=True))
+
+        # The check and the write happen in one script.
+        script, numkeys, *args = redis.eval.call_args[0]
+        self.assertEqual(numkeys, 2)
+        self.assertEqual(args, ['sync:Ticket', 'sync:Ticket:follow_up', FULL])
+        redis.set.assert_not_called()
@@ -0,0 +1,104 @@
+from unittest import TestCase
+
+from django.core.cache import cache
+from django.db.models.signals import post_save
+
+from djpsa.halo import models
+from djpsa.sync.lookup import LookupCache, lookups, \
+    VERSION_CHECK_INTERVAL
+from djpsa.sync.queries import QueryCounter
+
+
+class TestLookupCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        models.Team.objects.create(id=1, name='Support')
+        models.Team.objects.create(id=2, name='Projects')
+        self.lookup = LookupCache(models.Team)
+
+    def tearDown(self):
+        models.Team.objects.all().delete()
+
+    def test_lookups_hit_db_once(self):
+        with QueryCounter() as counter:
+            self.assertEqual(self.lookup.get(1).name, 'Support')
+            self.assertEqual(self.lookup.get_by_name('Projects').id, 2)
+            self.assertEqual(self.lookup.get(2).name, 'Projects')
+        self.assertEqual(counter.count, 1)
+
+    def test_none(self):
+        self.assertIsNone(self.lookup.get(None))
+        self.assertIsNone(self.lookup.get_by_name(None))
+
+    def test_miss_falls_back_to_db_once(self):
+        self.lookup.get(1)
+        models.Team.objects.create(id=3, name='Sales')
+
+        with QueryCounter() as counter:
+            self.assertEqual(self.lookup.get(3).name, 'Sales')
+            self.assertEqual(self.lookup.get(3).name, 'Sales')
+            self.assertIsNone(self.lookup.get(4))
+            self.assertIsNone(self.lookup.get(4))
+        self.assertEqual(counter.count, 2)
+
+    def test_miss_expires(self):
+        self.assertIsNone(self.lookup.get(3))
+        # Created without a save signal, i.e. by another process.
+        models.Team.objects.bulk_create([models.Team(id=3, name='Sales')])
+
+        self.assertIsNone(self.lookup.get(3))
+        self.lookup._misses = {
+            key: missed - VERSION_CHECK_INTERVAL
+            for key, missed in self.lookup._misses.items()
+        }
+        self.assertEqual(self.lookup.get(3).name, 'Sales')
+
+    def test_save_bumps_version(self):
+        lookup = lookups.get(models.Team)
+        self.assertEqual(lookup.get(1).name, 'Support')
+        self.assertIsNone(lookup.get_by_name('Sales'))
+
+        team = models.Team.objects.get(id=1)
+        team.name = 'Service Desk'
+        team.save()
+        models.Team.objects.create(id=3, name='Sales')
+
+        lookup._checked = 0
+        self.assertEqual(lookup.get(1).name, 'Service Desk')
+        self.assertEqual(lookup.get_by_name('Sales').id, 3)
+
+    def test_invalidate_reloads(self):
+        self.lookup.get(1)
+        models.Team.objects.filter(id=1).update(name='Service Desk')
+        other_process = LookupCache(models.Team)
+        other_process.get(1)
+
+        self.lookup.invalidate()
+
+        self.assertEqual(self.lookup.get(1).name, 'Service Desk')
+        # Other processes see the new version on their next check.
+        other_process._checked = 0
+        self.assertEqual(other_process.get(1).name, 'Service Desk')
+
+    def test_proxy_save_bumps_version(self):
+        lookup = lookups.get(models.Team)
+        lookup.get(1)
+        version = lookup._version
+
+        models.TeamTracker.objects.get(id=1).save()
+
+        self.assertNotEqual(lookup._current_version(), version)
+
+    def test_signals_connected_to_registered_models_only(self):
+        senders = {
+            sender for (uid, sender), *_ in post_save.receivers
+            if str(uid).startswith('djpsa_lookup_save')
+        }
+        self.assertIn(id(models.TeamTracker), senders)
+        self.assertNotIn(id(models.Ticket), senders)
+
+    def test_registry_resolves_proxy_models(self):
+        self.assertIs(
+            lookups.get(models.TeamTracker), lookups.get(models.Team))
+        self.assertIsNone(lookups.get(models.Ticket))
@@ -0,0 +1,61 @@
+from unittest import TestCase
+
+from djpsa.halo import models
+from djpsa.sync.mapping import APIField, FieldMapper, \
+    compile_outbound_converters, DATETIME, FOREIGN_KEY, PASSTHROUGH
+
+
+class TestFieldMapper(TestCase):
+
+    def _assign(self, field_mapping, json_data, instance=None):
+        instance = instance or models.Ticket()
+        FieldMapper(models.Ticket, field_mapping).assign(instance, json_data)
+        return instance
+
+    def test_plain_key(self):
+        instance = self._assign({'summary': 'summary'}, {'summary': 'Test'})
+        self.assertEqual(instance.summary, 'Test')
+
+    def test_key_from_api_fields(self):
+        instance = self._assign({'on_hold': APIField()}, {'onhold': True})
+        self.assertTrue(instance.on_hold)
+
+    def test_default(self):
+        instance = self._assign({'flagged': APIField(default=False)}, {})
+        self.assertFalse(instance.flagged)
+
+    def test_keep_existing(self):
+        instance = self._assign(
+            {'urgency': APIField(keep_existing=True)}, {},
+            instance=models.Ticket(urgency=3),
+        )
+        self.assertEqual(instance.urgency, 3)
+
+    def test_alternative_keys(self):
+        mapping = {'category_1': APIField(('category1', 'category_1'))}
+        self.assertEqual(
+            self._assign(mapping, {'category_1': 'b'}).category_1, 'b')
+        self.assertEqual(
+            self._assign(mapping, {'category1': 'a', 'category_1': 'b'})
+            .category_1, 'a')
+
+    def test_skip_empty(self):
+        mapping = {'cost': APIField(parser=float, skip_empty=True)}
+        instance = self._assign(
+            mapping, {'cost': None}, instance=models.Ticket(cost=1.0))
+        self.assertEqual(instance.cost, 1.0)
+        self.assertEqual(self._assign(mapping, {'cost': '2'}).cost, 2.0)
+
+
+class TestOutboundConverters(TestCase):
+
+    def test_kinds(self):
+        converters = compile_outbound_converters(models.Ticket)
+
+        self.assertEqual(converters['summary'], ('summary', PASSTHROUGH))
+        self.assertEqual(
+            converters['date_closed'], ('dateclosed', DATETIME))
+        self.assertEqual(converters['agent'], ('agent_id', FOREIGN_KEY))
+        # TimeStampedModel's fields are DateTimeField subclasses and are
+        # passed through, as before.
+        self.assertEqual(converters['created'], (None, PASSTHROUGH))
@@ -0,0 +1,57 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from djpsa.sync.management.commands.base_sync import BaseSyncCommand
+from djpsa.sync.profiling import SyncProfiler
+
+
+class FakeSynchronizer:
+
+    def persist_page(self, records, results):
+        results.extend(str(record) * 100 for record in records)
+        return results
+
+    def sync(self):
+        results = []
+        for page in range(3):
+            self.persist_page(range(10), results)
+        return len(results), 0, 0, 0
+
+
+class TestSyncProfiler(TestCase):
+
+    def test_writes_stats_and_memory_report(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            profiler = SyncProfiler(output_dir, trace_memory=True)
+            synchronizer = FakeSynchronizer()
+
+            with profiler.profile(synchronizer):
+                self.assertEqual(synchronizer.sync(), (30, 0, 0, 0))
+
+            self.assertEqual(
+                sorted(os.listdir(output_dir)),
+                ['FakeSynchronizer.memory.txt', 'FakeSynchronizer.prof',
+                 'FakeSynchronizer.txt']
+            )
+            with open(os.path.join(
+                    output_dir, 'FakeSynchronizer.memory.txt')) as f:
+                report = f.read()
+            self.assertIn('Page 3: 10 records', report)
+            self.assertIn('Total peak', report)
+
+            # The wrapper is removed from the instance afterwards.
+            self.assertNotIn('persist_page', synchronizer.__dict__)
+
+    def test_profile_memory_implies_profile(self):
+        command = BaseSyncCommand()
+        command.synchronizer_map = {'fake': (FakeSynchronizer, 'Fake')}
+
+        with tempfile.TemporaryDirectory() as output_dir, \
+                patch.object(command, 'run_synchronizers'):
+            command.handle(sync_object='fake', profile=False,
+                           profile_memory=True, profile_output=output_dir)
+
+        self.assertIsNotNone(command.profiler)
+        self.assertTrue(command.profiler.trace_memory)
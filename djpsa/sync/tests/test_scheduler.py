@@ -0,0 +1,94 @@
+import threading
+from unittest import TestCase
+
+from djpsa.halo import models
+from djpsa.halo.records import sync as halo_sync
+from djpsa.sync.scheduler import SyncScheduler
+
+
+class FakeSync:
+    model_class = None
+    related_meta = {}
+
+
+class ClientSync(FakeSync):
+    model_class = models.ClientTracker
+
+
+class SiteSync(FakeSync):
+    model_class = models.SiteTracker
+    related_meta = {'client_id': (models.Client, 'client')}
+
+
+class TeamSync(FakeSync):
+    model_class = models.TeamTracker
+
+
+class TicketSync(FakeSync):
+    model_class = models.TicketTracker
+    related_meta = {
+        'client_id': (models.Client, 'client'),
+        'site_id': (models.Site, 'site'),
+    }
+
+
+class TestSyncScheduler(TestCase):
+
+    def test_dependencies(self):
+        scheduler = SyncScheduler(
+            [TicketSync, SiteSync, ClientSync, TeamSync])
+        dependencies = scheduler.dependencies()
+
+        self.assertEqual(dependencies[TicketSync], {ClientSync, SiteSync})
+        self.assertEqual(dependencies[SiteSync], {ClientSync})
+        self.assertEqual(dependencies[ClientSync], set())
+
+    def test_sequential_runs_in_dependency_order(self):
+        order = []
+        SyncScheduler(
+            [TicketSync, SiteSync, TeamSync, ClientSync]
+        ).run(order.append)
+
+        self.assertEqual(order, [TeamSync, ClientSync, SiteSync, TicketSync])
+
+    def test_parallel_runs_independent_classes_at_once(self):
+        # ClientSync and TeamSync wait for each other, so the run only
+        # finishes if they are running at the same time.
+        barrier = threading.Barrier(2, timeout=5)
+        finished = []
+        lock = threading.Lock()
+
+        def run(sync_class):
+            if sync_class in (ClientSync, TeamSync):
+                barrier.wait()
+            with lock:
+                finished.append(sync_class)
+
+        SyncScheduler(
+            [TicketSync, SiteSync, ClientSync, TeamSync], workers=2
+        ).run(run)
+
+        self.assertEqual(set(finished[:2]), {ClientSync, TeamSync})
+        self.assertEqual(finished[2:], [SiteSync, TicketSync])
+
+    def test_parallel_raises_after_finishing(self):
+        ran = []
+
+        def run(sync_class):
+            ran.append(sync_class)
+            if sync_class is ClientSync:
+                raise ValueError('failed')
+
+        with self.assertRaises(ValueError):
+            SyncScheduler([ClientSync, SiteSync], workers=2).run(run)
+        self.assertEqual(ran, [ClientSync, SiteSync])
+
+    def test_grade_synchronizers(self):
+        grade = halo_sync.HaloSyncGrades().get_grade('operational')
+        order = []
+        SyncScheduler(grade.synchronizers).run(order.append)
+
+        self.assertEqual(sorted(order, key=str),
+                         sorted(grade.synchronizers, key=str))
+        self.assertLess(order.index(halo_sync.ClientSynchronizer),
+                        order.index(halo_sync.TicketSynchronizer))
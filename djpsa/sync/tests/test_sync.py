@@ -1,11 +1,16 @@
+import threading
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 from django.conf import settings
 from django.utils import timezone
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 
+from djpsa.utils import get_djpsa_settings
+from djpsa.sync.models import SyncJob, SyncLease
+from djpsa.sync.queries import QueryCounter, QueryBudgetExceeded, \
+    check_query_budget, RAISE
 from djpsa.sync.sync import Synchronizer, SyncResults, CREATED, UPDATED, \
-    SKIPPED
+    SKIPPED, CoalescedCounts
 
 
 class TestSynchronizer(TestCase):
@@ -222,3 +227,149 @@ class TestSynchronizer(TestCase):
         self.assertEqual(deleted_count, 2)
         mock_get_delete_qset.assert_called_once_with({1, 4})
         mock_delete_qset.delete.assert_called_once()
+
+
+class TestQueryBudget(TestCase):
+
+    def test_query_counter(self):
+        with QueryCounter() as counter:
+            SyncJob.objects.count()
+            SyncJob.objects.count()
+        self.assertEqual(counter.count, 2)
+
+    def test_query_counter_ignores_savepoints(self):
+        with QueryCounter() as counter:
+            with transaction.atomic():
+                with transaction.atomic():
+                    SyncJob.objects.count()
+        self.assertEqual(counter.count, 1)
+
+    def test_check_query_budget_within_budget(self):
+        check_query_budget('Test', 10, 5, 2, action=RAISE)
+
+    def test_check_query_budget_raise(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            check_query_budget('Test', 11, 5, 2, action=RAISE)
+
+    @patch('djpsa.sync.queries.logger')
+    def test_check_query_budget_warn(self, mock_logger):
+        check_query_budget('Test', 11, 5, 2)
+        self.assertTrue(mock_logger.warning.called)
+
+    def test_check_query_budget_disabled(self):
+        check_query_budget('Test', 100, 1, None, action=RAISE)
+        check_query_budget('Test', 100, 0, 1, action=RAISE)
+
+
+class CoalescingSynchronizer(Synchronizer):
+    model_class = MagicMock()
+    client_class = MagicMock()
+    # Called with the instance during each run, to simulate other workers.
+    during_run = None
+    runs = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sync_locking = True
+
+    def get_model_name(self):
+        return 'CoalescingModel'
+
+    def instance_ids(self, filter_params=None):
+        return []
+
+    def prune_stale_records(self, initial_ids, synced_ids):
+        return 0
+
+    def fetch_records(self, results, params=None):
+        CoalescingSynchronizer.runs.append(self.full)
+        if CoalescingSynchronizer.during_run:
+            CoalescingSynchronizer.during_run(self)
+        return results
+
+
+class TestSyncCoalescing(TestCase):
+
+    def setUp(self):
+        CoalescingSynchronizer.runs = []
+        CoalescingSynchronizer.during_run = None
+
+    def tearDown(self):
+        SyncLease.objects.all().delete()
+        SyncJob.objects.filter(entity_name='CoalescingModel').delete()
+
+    def test_requests_during_run_are_coalesced(self):
+        requested = []
+
+        def request_more(synchronizer):
+            if len(CoalescingSynchronizer.runs) == 1:
+                # Two more workers ask for a sync, one of them full.
+                requested.append(CoalescingSynchronizer().sync())
+                requested.append(CoalescingSynchronizer(full=True).sync())
+
+        CoalescingSynchronizer.during_run = request_more
+        CoalescingSynchronizer().sync()
+
+        self.assertEqual(requested, [(0, 0, 0, 0), (0, 0, 0, 0)])
+        self.assertTrue(all(
+            isinstance(counts, CoalescedCounts) for counts in requested))
+        # One follow-up run, upgraded to full.
+        self.assertEqual(CoalescingSynchronizer.runs, [False, True])
+        self.assertEqual(
+            SyncJob.objects.filter(entity_name='CoalescingModel').count(), 2)
+        self.assertFalse(SyncLease.objects.exists())
+
+    def test_scoped_syncs_are_not_locked(self):
+        def scoped_sync(synchronizer):
+            if len(CoalescingSynchronizer.runs) == 1:
+                CoalescingSynchronizer(conditions=[{'client_id': 1}]).sync()
+
+        CoalescingSynchronizer.during_run = scoped_sync
+        CoalescingSynchronizer().sync()
+
+        self.assertEqual(CoalescingSynchronizer.runs, [False, False])
+
+
+class TestSyncRelated(TestCase):
+
+    def setUp(self):
+        self.synchronizer = CoalescingSynchronizer()
+        self.synchronizer.sync_settings['related_sync_workers'] = 4
+        self.related = [(MagicMock(), {'ticket': 1}),
+                        (MagicMock(), {'ticket': 1})]
+        self.synchronizer.get_related_synchronizers = \
+            MagicMock(return_value=self.related)
+
+    def test_related_synchronizers_run_at_once(self):
+        # Each related sync waits for the other, so this only finishes if
+        # they run concurrently.
+        barrier = threading.Barrier(2, timeout=5)
+
+        with patch.object(Synchronizer, '_relation_sync',
+                          side_effect=lambda *args: barrier.wait()) as sync:
+            self.synchronizer.sync_related(MagicMock())
+
+        self.assertEqual(sync.call_count, 2)
+
+    def test_errors_are_raised_after_all_finish(self):
+        def relation_sync(synchronizer, filter_params):
+            if synchronizer is self.related[0][0]:
+                raise ValueError('failed')
+
+        with patch.object(Synchronizer, '_relation_sync',
+                          side_effect=relation_sync) as sync:
+            with self.assertRaises(ValueError):
+                self.synchronizer.sync_related(MagicMock())
+
+        self.assertEqual(sync.call_count, 2)
+
+    def test_one_after_the_other_by_default(self):
+        self.synchronizer.sync_settings['related_sync_workers'] = \
+            get_djpsa_settings()['related_sync_workers']
+
+        with patch('djpsa.sync.sync.ThreadPoolExecutor') as executor, \
+                patch.object(Synchronizer, '_relation_sync') as sync:
+            self.synchronizer.sync_related(MagicMock())
+
+        executor.assert_not_called()
+        self.assertEqual(sync.call_count, 2)
@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+from djpsa.halo import models
+from djpsa.sync.tracker import field_digest
+
+
+class TestDigestFieldTracker(TestCase):
+
+    def _ticket(self, **kwargs):
+        # Instances with a pk set are treated as loaded from the DB, so
+        # their initial values become the saved data.
+        return models.TicketTracker(id=1, status_id=1, **kwargs)
+
+    def test_large_fields_saved_as_digest(self):
+        ticket = self._ticket(details='x' * 10000, udf_data={'a': 1})
+
+        self.assertEqual(
+            ticket.tracker.saved_data['details'], field_digest('x' * 10000))
+        self.assertEqual(
+            ticket.tracker.saved_data['udf_data'], field_digest({'a': 1}))
+        self.assertEqual(ticket.tracker.saved_data['summary'], None)
+
+    def test_unchanged_instance(self):
+        ticket = self._ticket(
+            summary='Printer', details='Broken', udf_data={'a': 1, 'b': 2})
+
+        ticket.details = 'Broken'
+        ticket.udf_data = {'b': 2, 'a': 1}
+
+        self.assertEqual(ticket.tracker.changed(), {})
+
+    def test_changed_digest_fields(self):
+        ticket = self._ticket(details='Broken', udf_data={'a': 1})
+
+        ticket.details = 'Fixed'
+        self.assertTrue(ticket.tracker.has_changed('details'))
+        self.assertFalse(ticket.tracker.has_changed('udf_data'))
+
+        ticket.udf_data = {'a': 2}
+        self.assertEqual(
+            set(ticket.tracker.changed()), {'details', 'udf_data'})
+
+    def test_none_and_empty_differ(self):
+        ticket = self._ticket(details=None)
+
+        ticket.details = ''
+        self.assertTrue(ticket.tracker.has_changed('details'))
+
+    def test_type_is_part_of_digest(self):
+        self.assertNotEqual(field_digest(1), field_digest('1'))
+
+    def test_new_instance(self):
+        ticket = models.TicketTracker(details='New')
+
+        self.assertTrue(ticket.tracker.has_changed('details'))
+        self.assertEqual(ticket.tracker.saved_data, {})
+
+    def test_is_saved_value(self):
+        ticket = self._ticket(summary='Printer', details='Broken')
+
+        self.assertTrue(ticket.tracker.is_saved_value('details', 'Broken'))
+        self.assertFalse(ticket.tracker.is_saved_value('details', 'Fixed'))
+        self.assertTrue(ticket.tracker.is_saved_value('summary', 'Printer'))
@@ -0,0 +1,84 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from djpsa.sync.models import SyncTuning
+from djpsa.sync.sync import Synchronizer, SyncResults
+from djpsa.sync.tuning import PageSizeTuner
+
+
+def make_tuner(default=100):
+    return PageSizeTuner('Ticket', default, (20, 500), 2.0, 1000000)
+
+
+class TestPageSizeTuner(TestCase):
+
+    def tearDown(self):
+        SyncTuning.objects.all().delete()
+
+    def test_slow_pages_shrink(self):
+        tuner = make_tuner()
+        tuner.observe(100, 5.0)
+
+        self.assertEqual(tuner.suggest(100), 50)
+
+    def test_fast_pages_grow_at_most_double(self):
+        tuner = make_tuner()
+        tuner.observe(100, 0.1)
+        tuner.observe(100, 0.1)
+
+        self.assertEqual(tuner.suggest(100), 200)
+        self.assertEqual(tuner.suggest(400), 500)
+
+    def test_large_pages_limited_by_bytes(self):
+        tuner = make_tuner()
+        tuner.observe(100, 0.5, response_bytes=1500000)
+
+        self.assertEqual(tuner.suggest(100), 66)
+
+    def test_nothing_observed(self):
+        self.assertIsNone(make_tuner().suggest(100))
+        self.assertIsNone(make_tuner().save(100))
+
+    def test_saved_size_loaded_next_time(self):
+        self.assertEqual(make_tuner().load(), 100)
+
+        tuner = make_tuner()
+        tuner.observe(100, 0.5)
+        tuner.save(100)
+
+        self.assertEqual(make_tuner().load(), 200)
+
+
+class TestAdaptivePageSize(TestCase):
+
+    def setUp(self):
+        client_class = MagicMock()
+        client_class.return_value.last_response_bytes = None
+
+        class PagedSynchronizer(Synchronizer):
+            model_class = MagicMock()
+            lookup_key = 'id'
+
+            def get_model_name(self):
+                return 'Paged'
+
+            def _unpack_records(self, response):
+                return response
+
+            def persist_page(self, records, results):
+                pass
+
+        PagedSynchronizer.client_class = client_class
+        self.synchronizer = PagedSynchronizer()
+        self.synchronizer.batch_size = 2
+        self.synchronizer.page_size_tuner = make_tuner(default=2)
+
+    def test_only_full_pages_observed(self):
+        self.synchronizer.client.get_page.side_effect = [
+            [{'id': 1}, {'id': 2}],
+            [{'id': 3}],
+        ]
+
+        self.synchronizer.fetch_records(SyncResults())
+
+        self.assertEqual(self.synchronizer.page_size_tuner.records, 2)
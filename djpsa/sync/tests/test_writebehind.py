@@ -0,0 +1,75 @@
+import threading
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from djpsa.sync.writebehind import WriteBehindQueue
+
+
+class Record:
+
+    def __init__(self, pk):
+        self.pk = pk
+
+
+class FakeSynchronizer:
+
+    def __init__(self):
+        self.calls = []
+        self.sent = threading.Event()
+
+    def update_each(self, changes):
+        self.calls.append(changes)
+        self.sent.set()
+        return [(record, Record(record.pk)) for record, _ in changes]
+
+
+class TestWriteBehindQueue(TestCase):
+
+    def setUp(self):
+        self.synchronizer = FakeSynchronizer()
+
+    def test_updates_to_a_record_are_merged(self):
+        queue = WriteBehindQueue(self.synchronizer, flush_interval=60)
+        ticket = Record(1)
+
+        first = queue.update(ticket, {'status': 1, 'agent': 2})
+        second = queue.update(ticket, {'status': 3})
+        queue.update(Record(2), {'status': 1})
+        self.assertEqual(self.synchronizer.calls, [])
+
+        queue.flush()
+
+        self.assertEqual(len(self.synchronizer.calls), 1)
+        record, data = self.synchronizer.calls[0][0]
+        self.assertEqual(data, {'status': 3, 'agent': 2})
+        self.assertIs(first, second)
+        self.assertEqual(first.result(timeout=1).pk, 1)
+        self.assertEqual(len(queue), 0)
+
+    def test_flushes_after_interval(self):
+        queue = WriteBehindQueue(self.synchronizer, flush_interval=0.01)
+
+        future = queue.update(Record(1), {'status': 1})
+
+        self.assertEqual(future.result(timeout=5).pk, 1)
+        self.assertTrue(self.synchronizer.sent.is_set())
+
+    def test_flushes_when_full(self):
+        queue = WriteBehindQueue(
+            self.synchronizer, flush_interval=60, max_pending=2)
+
+        queue.update(Record(1), {'status': 1})
+        queue.update(Record(2), {'status': 1})
+
+        self.assertEqual(len(self.synchronizer.calls), 1)
+        self.assertEqual(len(self.synchronizer.calls[0]), 2)
+
+    def test_errors_are_set_on_futures(self):
+        synchronizer = MagicMock(spec=['update_each'])
+        synchronizer.update_each.side_effect = ValueError('boom')
+
+        with WriteBehindQueue(synchronizer, flush_interval=60) as queue:
+            future = queue.update(Record(1), {'status': 1})
+
+        with self.assertRaises(ValueError):
+            future.result(timeout=1)
@@ -0,0 +1,139 @@
+import hashlib
+import json
+
+from django.db import models
+from model_utils.tracker import FieldInstanceTracker, FieldTracker, \
+    lightweight_deepcopy
+
+# Field types whose values can be large enough that keeping a deep copy of
+# every loaded value is wasteful. These are tracked by digest instead.
+DIGEST_FIELD_TYPES = (models.TextField, models.JSONField)
+
+
+def field_digest(value):
+    """
+    Return a compact digest of the given field value, or None for None.
+
+    The type name is part of the digest so that values which would compare
+    unequal (i.e. 1 and '1') still produce different digests. JSON values
+    are serialized with sorted keys so that dicts compare the same way
+    they would with ==.
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, str):
+        payload = value.encode('utf-8', 'surrogatepass')
+    elif isinstance(value, bytes):
+        payload = value
+    else:
+        payload = json.dumps(
+            value, sort_keys=True, separators=(',', ':'), default=str
+        ).encode('utf-8')
+
+    digest = hashlib.blake2b(
+        type(value).__name__.encode('utf-8'), digest_size=16)
+    digest.update(b'\x00')
+    digest.update(payload)
+    return digest.digest()
+
+
+class DigestSavedData(dict):
+    """
+    Saved field values, where values of digest fields are stored as their
+    digest. model_utils writes into saved_data directly when deferred fields
+    are loaded, so digesting has to happen on assignment.
+    """
+
+    def __init__(self, digest_fields, *args, **kwargs):
+        super().__init__()
+        self.digest_fields = digest_fields
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, key, value):
+        if key in self.digest_fields:
+            value = field_digest(value)
+        else:
+            value = lightweight_deepcopy(value)
+        super().__setitem__(key, value)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+
+class DigestFieldInstanceTracker(FieldInstanceTracker):
+    """
+    FieldInstanceTracker that keeps a digest of large text and JSON values
+    rather than a deep copy, and compares those fields by digest.
+
+    Note that previous() returns the digest for digest fields, as the old
+    value itself is not kept.
+    """
+
+    def __init__(self, instance, fields, field_map, digest_fields):
+        self.digest_fields = digest_fields
+        super().__init__(instance, fields, field_map)
+
+    def set_saved_fields(self, fields=None):
+        if not self.instance.pk or fields is None:
+            saved_data = DigestSavedData(self.digest_fields)
+            if self.instance.pk:
+                saved_data.update(self.current())
+            self.saved_data = saved_data
+        else:
+            self.saved_data.update(self.current(fields=fields))
+
+    def has_changed(self, field):
+        if field not in self.digest_fields:
+            return super().has_changed(field)
+
+        # deferred fields haven't changed
+        if field in self.deferred_fields and \
+                field not in self.instance.__dict__:
+            return False
+        return self.previous(field) != \
+            field_digest(self.get_field_value(field))
+
+    def is_saved_value(self, field, value):
+        """
+        Return True if the given value matches the saved value of the field.
+        """
+        if field in self.digest_fields:
+            return self.previous(field) == field_digest(value)
+        return self.previous(field) == value
+
+
+class DigestFieldTracker(FieldTracker):
+    """
+    Drop-in replacement for model_utils' FieldTracker for synced models.
+
+    Text and JSON fields are tracked by digest, unless digest_fields is given
+    explicitly. All other fields are tracked exactly like FieldTracker.
+    """
+
+    tracker_class = DigestFieldInstanceTracker
+
+    def __init__(self, fields=None, digest_fields=None):
+        super().__init__(fields=fields)
+        self.digest_fields = digest_fields
+
+    def finalize_class(self, sender, **kwargs):
+        if self.digest_fields is None:
+            self.digest_fields = [
+                field.attname for field in sender._meta.fields
+                if isinstance(field, DIGEST_FIELD_TYPES)
+            ]
+        super().finalize_class(sender, **kwargs)
+        self.digest_fields = frozenset(
+            field for field in self.digest_fields if field in self.fields
+        )
+
+    def initialize_tracker(self, sender, instance, **kwargs):
+        if not isinstance(instance, self.model_class):
+            return  # Only init instances of given model (including children)
+        tracker = self.tracker_class(
+            instance, self.fields, self.field_map, self.digest_fields)
+        setattr(instance, self.attname, tracker)
+        tracker.set_saved_fields()
+        instance._instance_initialized = True
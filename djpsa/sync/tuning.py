@@ -0,0 +1,88 @@
+import logging
+
+from djpsa.sync.models import SyncTuning
+
+logger = logging.getLogger(__name__)
+
+# Most a page size changes by after one sync, so one slow run doesn't
+# throw it off.
+MAX_STEP = 2
+
+
+class PageSizeTuner:
+    """
+    Pick an entity's page size from the full pages of its previous syncs.
+
+    Pages should take about target_seconds to fetch and be no bigger than
+    max_bytes. The tuned size is used from the next sync on, since
+    changing it mid-sync would shift the page offsets.
+    """
+
+    def __init__(self, entity_name, default, bounds, target_seconds,
+                 max_bytes):
+        self.entity_name = entity_name
+        self.default = default
+        self.min_size, self.max_size = bounds
+        self.target_seconds = target_seconds
+        self.max_bytes = max_bytes
+        self.records = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.sized_records = 0
+
+    def clamp(self, page_size):
+        return max(self.min_size, min(self.max_size, int(page_size)))
+
+    def load(self):
+        """Return the tuned page size, or the default if not tuned yet."""
+        page_size = SyncTuning.objects.filter(
+            entity_name=self.entity_name
+        ).values_list('page_size', flat=True).first()
+        return self.clamp(page_size or self.default)
+
+    def observe(self, records, seconds, response_bytes=None):
+        """Record a page of the given number of records."""
+        if not records:
+            return
+        self.records += records
+        self.seconds += seconds
+        if response_bytes:
+            self.bytes += response_bytes
+            self.sized_records += records
+
+    def suggest(self, page_size):
+        """
+        Return the page size to use next time, given the one used for the
+        observed pages, or None if nothing was observed.
+        """
+        if not self.records:
+            return None
+
+        candidates = []
+        if self.seconds > 0:
+            candidates.append(
+                self.target_seconds * self.records / self.seconds)
+        if self.bytes:
+            candidates.append(
+                self.max_bytes * self.sized_records / self.bytes)
+        if not candidates:
+            return None
+
+        ideal = min(candidates)
+        ideal = max(page_size / MAX_STEP, min(page_size * MAX_STEP, ideal))
+        return self.clamp(ideal)
+
+    def save(self, page_size):
+        """Store the suggested page size. Return it, or None."""
+        suggested = self.suggest(page_size)
+        if suggested is None:
+            return None
+
+        if suggested != page_size:
+            logger.info('Tuned page size of {} from {} to {}.'.format(
+                self.entity_name, page_size, suggested))
+        SyncTuning.objects.update_or_create(
+            entity_name=self.entity_name,
+            defaults={'page_size': suggested},
+        )
+        return suggested
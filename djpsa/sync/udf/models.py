@@ -1,6 +1,6 @@
 from django.db import models
 from django_extensions.db.models import TimeStampedModel
-from model_utils import FieldTracker
+from djpsa.sync.tracker import DigestFieldTracker
 
 
 class UDFDefinition(TimeStampedModel):
@@ -23,7 +23,7 @@ class UDFDefinition(TimeStampedModel):
 
 
 class UDFDefinitionTracker(UDFDefinition):
-    tracker = FieldTracker()
+    tracker = DigestFieldTracker()
 
     class Meta:
         proxy = True
@@ -0,0 +1,138 @@
+import atexit
+import logging
+import threading
+from concurrent.futures import Future
+
+from django.db import connections
+
+from djpsa.utils import get_djpsa_settings
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingUpdate:
+
+    def __init__(self, record):
+        self.record = record
+        self.data = {}
+        self.future = Future()
+
+
+class WriteBehindQueue:
+    """
+    Queue outbound updates for a synchronizer and send them in batches.
+
+    Updates to the same record are merged, later values winning, until the
+    queue is flushed- flush_interval seconds after the first pending update,
+    once max_pending records are waiting, or when flush() is called.
+
+    update() returns a Future for the record's updated instance, so callers
+    that need to read their writes can wait on it, or call flush(). The
+    Future's result is None if Halo didn't return the record.
+    """
+
+    def __init__(self, synchronizer, flush_interval=None, max_pending=None):
+        djpsa_settings = get_djpsa_settings()
+        self.synchronizer = synchronizer
+        self.flush_interval = flush_interval \
+            if flush_interval is not None \
+            else djpsa_settings['write_behind_interval']
+        self.max_pending = max_pending or \
+            djpsa_settings['write_behind_max_pending']
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Only one flush talks to the synchronizer at a time.
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def update(self, record, data):
+        """Queue field changes for the record. Return a Future."""
+        with self._lock:
+            pending = self._pending.get(record.pk)
+            if pending is None:
+                pending = self._pending[record.pk] = _PendingUpdate(record)
+            pending.record = record
+            pending.data.update(data)
+            future = pending.future
+            full = len(self._pending) >= self.max_pending
+            if not full and self._timer is None:
+                self._timer = threading.Timer(
+                    self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full:
+            self.flush()
+        return future
+
+    def flush(self):
+        """Send every pending update now, and wait for them to finish."""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                batch = list(self._pending.values())
+                self._pending = {}
+
+            if batch:
+                self._send(batch)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+    def _send(self, batch):
+        changes = [(pending.record, dict(pending.data)) for pending in batch]
+        try:
+            if hasattr(self.synchronizer, 'update_each'):
+                # In the order of the changes, matched to Halo's response.
+                results = self.synchronizer.update_each(changes)
+            else:
+                results = [
+                    (record, self.synchronizer.update(record, data))
+                    for record, data in changes
+                ]
+        except Exception as e:
+            logger.exception('Failed to send {} queued updates: {}'.format(
+                len(batch), e))
+            for pending in batch:
+                pending.future.set_exception(e)
+            return
+
+        for pending, (_, instance) in zip(batch, results):
+            pending.future.set_result(instance)
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_behind_queue(sync_class):
+    """Return this process' shared write-behind queue for the class."""
+    with _queues_lock:
+        queue = _queues.get(sync_class)
+        if queue is None:
+            queue = _queues[sync_class] = WriteBehindQueue(sync_class())
+        return queue
+
+
+@atexit.register
+def flush_all():
+    """Flush every shared queue, so no updates are lost at exit."""
+    for queue in list(_queues.values()):
+        try:
+            queue.flush()
+        except Exception as e:
+            logger.error('Failed to flush write-behind queue: {}'.format(e))
@@ -62,6 +62,101 @@ def get_djpsa_settings():
         'callback_root': None,
         'callback_description': 'django-psa',
         'keep_closed_days': 1,
+        # Average ORM queries per synced record allowed for each page, None
+        # to disable. 'warn' logs a warning when over, 'raise' raises
+        # QueryBudgetExceeded, which is useful in tests.
+        'max_queries_per_record': None,
+        'query_budget_action': 'warn',
+        # Synchronizers the sync command runs at once.
+        'sync_workers': 1,
+        # Leases, such as the sync daemon's, are kept in the 'db' or
+        # 'redis'.
+        'lease_backend': 'db',
+        # One sync daemon runs per lease name, so give each tenant its own.
+        'sync_daemon_lease_name': 'djpsa_sync_daemon',
+        'sync_daemon_lease_ttl': 300,
+        # Grades the sync daemon runs as full syncs, to prune deleted records.
+        'sync_daemon_full_grades': ('configuration', 'slow', 'ludicrous_slow'),
+        # Only run one sync per entity at a time, coalescing runs requested
+        # meanwhile into one follow-up run, and returning CoalescedCounts to
+        # their callers. Prefix lock names per tenant. Uses lease_backend.
+        'sync_locking': False,
+        'sync_lock_prefix': 'djpsa_sync',
+        'sync_lock_ttl': 300,
+        # Store callbacks for the process_callbacks command instead of
+        # syncing within the request. Failed callbacks are retried up to
+        # callback_max_attempts times.
+        'queue_callbacks': False,
+        'callback_max_attempts': 5,
+        # Seconds a queued callback waits for more callbacks for the same
+        # record, which are coalesced with it.
+        'callback_debounce_seconds': 5,
+        # Skip callbacks whose record is the same as, or older than, the
+        # last callback's for that record. Digests of applied callback
+        # records are cached for payload_digest_timeout seconds.
+        'skip_stale_callbacks': False,
+        'payload_digest_timeout': 3600,
+        # Related synchronizers, i.e. a ticket's actions and appointments,
+        # run at once by sync_related, each in its own thread with its own
+        # DB connection. 1 runs them one after the other.
+        'related_sync_workers': 1,
+        # Records sent per request by create_many and update_many.
+        'batch_write_size': 50,
+        # Send updates made with update_later through a write-behind queue,
+        # which sends merged updates this many seconds after the first one
+        # is queued, or once this many records are waiting. Updates made in
+        # a transaction are queued once it commits.
+        'write_behind': False,
+        'write_behind_interval': 0.5,
+        'write_behind_max_pending': 50,
+        # Attachment content is cached on disk here, by default in the
+        # system temp directory, and kept under blob_store_max_bytes by
+        # removing the least recently used files.
+        'blob_store_dir': None,
+        'blob_store_max_bytes': 1024 * 1024 * 1024,
+        # Asset details are fetched by this many threads at once, and kept
+        # in memory for asset_detail_cache_ttl seconds, 0 to disable.
+        'asset_detail_workers': 8,
+        'asset_detail_cache_ttl': 60,
+        # Identical GET requests made at once share one request to Halo.
+        # With coalesce_requests_redis, across processes too, in which case
+        # a result is kept in Redis for coalesce_requests_window seconds
+        # for the processes that were waiting on it.
+        'coalesce_requests': False,
+        'coalesce_requests_redis': False,
+        'coalesce_requests_window': 2,
+        # Seconds single records fetched with get_record are cached for, by
+        # endpoint, i.e. {'Tickets': 30, 'Asset': 300}. Our own writes and
+        # callbacks for a record drop its cached copies. At most
+        # record_cache_max_entries are kept per process.
+        'record_cache_ttls': {},
+        'record_cache_max_entries': 1000,
+        # Tune each entity's page size from the time and bytes its pages
+        # took, for the next sync, within page_size_bounds. Pages aim to
+        # take target_page_seconds and stay under max_page_bytes.
+        'adaptive_page_size': False,
+        'page_size_bounds': (20, 500),
+        'target_page_seconds': 2.0,
+        'max_page_bytes': 2 * 1024 * 1024,
+        # Limit the requests in flight to each Halo instance, raising the
+        # limit while responses are healthy and cutting it on 429s, 5xx
+        # responses and latencies over concurrency_latency_tolerance times
+        # the usual for the endpoint. Worker settings such as
+        # related_sync_workers are then upper bounds. Requests waiting over
+        # concurrency_acquire_timeout seconds for a slot raise APIError.
+        'adaptive_concurrency': False,
+        'concurrency_initial': 4,
+        'concurrency_bounds': (1, 16),
+        'concurrency_latency_tolerance': 3.0,
+        'concurrency_acquire_timeout': 120,
+        # Fail fast with CircuitOpenError for circuit_reset_timeout seconds
+        # once a Halo instance fails circuit_failure_threshold requests in a
+        # row, then let one probe request through. The 'redis' backend
+        # shares the circuit between processes.
+        'circuit_breaker': False,
+        'circuit_breaker_backend': 'local',
+        'circuit_failure_threshold': 5,
+        'circuit_reset_timeout': 30,
     }
 
     if hasattr(settings, 'DJPSA_CONF_CALLABLE'):